@@ -36,8 +36,10 @@ st.markdown("### 📂 Explore the Dashboard")
 st.page_link("pages/1-Flight_Overview.py", label="📈 Flight Overview")
 st.page_link("pages/2-Airline_Analysis.py", label="🛩️ Airline Analysis")
 st.page_link("pages/3-Airport_Analysis.py", label="🛬 Airport Analysis")
+st.page_link("pages/7-Route_Analysis.py", label="🛣️ Route Analysis")
 st.page_link("pages/4-Project_Presentation.py", label="🗂️ Project Presentation")
 st.page_link("pages/5-About.py", label="👤 About Me")
+st.page_link("pages/6-Data_Diagnostics.py", label="🧮 Data Diagnostics")
 
 # About Me Section
 st.markdown("---")
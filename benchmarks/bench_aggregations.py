@@ -0,0 +1,47 @@
+"""Per-airline and per-month metrics: the old lambda groupbys vs ``flight_metrics``.
+
+    python benchmarks/bench_aggregations.py --rows 1000000 10000000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.frames import best_of, make_frame  # noqa: E402
+from flight_dashboard.aggregations import flight_metrics  # noqa: E402
+
+
+def lambda_groupby(df, by):
+    # The hand-rolled aggregation the Airline Analysis page used to run three times
+    grouped = df.groupby(by, observed=True).agg(
+        total_flights=("flight_status", "count"),
+        cancelled_flights=("flight_status", lambda x: (x == "Cancelled").sum()),
+        avg_delay=("dep_delay", "mean"),
+    ).reset_index()
+    grouped["cancellation_rate"] = grouped["cancelled_flights"] / grouped["total_flights"] * 100
+    return grouped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>12}  {'group by':<18}{'lambda ms':>11}{'vectorized ms':>15}{'speedup':>10}")
+    for n_rows in args.rows:
+        df = make_frame(n_rows)
+        for by in (["airline"], ["year_month", "airline"], ["origin"]):
+            old = lambda_groupby(df, by)
+            new = flight_metrics(df, by)
+            assert (old["cancelled_flights"].to_numpy() == new["cancelled_flights"].to_numpy()).all()
+
+            old_ms = best_of(lambda: lambda_groupby(df, by), args.repeat)
+            new_ms = best_of(lambda: flight_metrics(df, by), args.repeat)
+            print(f"{n_rows:>12,}  {' x '.join(by):<18}{old_ms:>11.1f}{new_ms:>15.1f}{old_ms / new_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
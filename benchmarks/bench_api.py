@@ -0,0 +1,144 @@
+"""Throughput and latency of the aggregates API against a local instance.
+
+Writes a synthetic dataset, starts ``python -m flight_dashboard.api`` on it,
+and keeps ``--clients`` keep-alive connections busy for ``--seconds`` per
+scenario:
+
+* ``miss``: a new filter on every request, so every request runs its query
+* ``hit``: a fixed set of requests, answered from the response cache
+* ``revalidate``: the same requests with ``If-None-Match``, answered with 304
+* ``hit arrow``: the cached set again, as Arrow IPC instead of JSON
+
+    python benchmarks/bench_api.py --rows 1m --clients 8 --processes 4
+"""
+
+import argparse
+import http.client
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from flight_dashboard.synthetic import parse_rows, write  # noqa: E402
+
+ENDPOINTS = ["kpis", "airlines", "airports", "monthly"]
+
+
+def random_request(rng, days):
+    start, end = sorted(rng.sample(range(len(days)), 2))
+    endpoint = rng.choice(ENDPOINTS)
+    params = {"start": days[start], "end": days[end]}
+    if endpoint == "airports":
+        params["side"] = rng.choice(["origin", "dest"])
+    if endpoint == "monthly" and rng.random() < 0.5:
+        params["by"] = "airline"
+    return f"/api/{endpoint}?{urlencode(params)}"
+
+
+def get(conn, path, headers=None):
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    return response.status, response.getheader("ETag"), len(body)
+
+
+def run_clients(port, clients, seconds, next_request):
+    """Latencies (s) and response bytes of every request sent by ``clients`` threads for ``seconds``."""
+    latencies, sizes, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        mine, my_sizes = [], []
+        while time.perf_counter() < deadline:
+            path, headers, expected = next_request(rng)
+            start = time.perf_counter()
+            status, _, size = get(conn, path, headers)
+            mine.append(time.perf_counter() - start)
+            my_sizes.append(size)
+            assert status == expected, (path, status)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            sizes.extend(my_sizes)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=parse_rows, default=1_000_000, help="e.g. 100k, 1m")
+    parser.add_argument("--format", choices=["csv", "partitioned"], default="csv", help="synthetic source layout")
+    parser.add_argument("--backend", choices=["pandas", "duckdb"], default="pandas")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    work = Path(tempfile.mkdtemp(prefix="bench-api-"))
+    source = write(work / ("flights" if args.format == "partitioned" else "flights.csv"), args.rows, args.format, args.seed)
+    env = dict(os.environ, FLIGHT_DATA_SOURCE=str(source), FLIGHT_DATA_CACHE_DIR=str(work / "cache"), FLIGHT_QUERY_BACKEND=args.backend)
+    server = subprocess.Popen([sys.executable, "-m", "flight_dashboard.api", "--port", str(args.port), "--processes", str(args.processes)],
+                              cwd=ROOT, env=env, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        conn = None
+        started = time.perf_counter()
+        while conn is None:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", args.port, timeout=300)
+                get(conn, "/api")
+            except ConnectionRefusedError:
+                conn = None
+                time.sleep(0.1)
+        # Load the data and every index in each process before timing anything
+        for endpoint in ENDPOINTS * max(args.processes, 1) * 2:
+            get(http.client.HTTPConnection("127.0.0.1", args.port, timeout=300), f"/api/{endpoint}")
+        print(f"{args.rows:,} rows ({args.format}, {args.backend}), {args.processes} process(es): "
+              f"ready in {time.perf_counter() - started:.1f} s\n")
+
+        days = [str(day.date()) for day in pd.date_range("2019-01-01", "2023-12-31")]
+        fixed = [random_request(random.Random(i), days) for i in range(20)]
+        etags = {}
+        for path in fixed:
+            for fmt in ["json", "arrow"]:
+                etags[path, fmt] = get(conn, f"{path}&format={fmt}")[1]
+
+        scenarios = {
+            "miss": lambda rng: (random_request(rng, days), None, 200),
+            "hit": lambda rng: (f"{rng.choice(fixed)}&format=json", None, 200),
+            "revalidate": lambda rng: (f"{(path := rng.choice(fixed))}&format=json", {"If-None-Match": etags[path, "json"]}, 304),
+            "hit arrow": lambda rng: (f"{rng.choice(fixed)}&format=arrow", None, 200),
+        }
+        print(f"{'scenario':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'avg KiB':>10}")
+        for name, next_request in scenarios.items():
+            latencies, sizes = run_clients(args.port, args.clients, args.seconds, next_request)
+            print(f"{name:<12}{len(latencies) / args.seconds:>10,.0f}{np.median(latencies) * 1000:>10.1f}"
+                  f"{np.percentile(latencies, 95) * 1000:>10.1f}{np.mean(sizes) / 1024:>10.1f}")
+    finally:
+        # The server's forked processes share its process group
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Time the pandas and DuckDB backends on random filters.
+
+tests/test_backends.py checks that both return the same results.
+
+    python benchmarks/bench_backends.py --rows 1000000 --cases 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit.config
+import streamlit.logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flight_dashboard.synthetic import write  # noqa: E402
+
+# The cached accessors warn about running outside `streamlit run` on every call;
+# the config is parsed first so it cannot reset the level afterwards
+streamlit.config.get_option("logger.level")
+streamlit.logger.set_log_level("error")
+
+GROUPINGS = [["airline"], ["origin"], ["dest"], ["airline", "dep_time_Period"], ["year_month", "airline"], []]
+
+
+def random_filter(rng, options, first, last):
+    from flight_dashboard.backends import FlightFilter
+
+    start, end = sorted(rng.sample(list(pd.date_range(first, last).date), 2))
+    pick = lambda column, k: tuple(rng.sample(options[column], rng.randint(0, k)))  # noqa: E731
+    return FlightFilter(
+        start, end, pick("airline", 3), pick("origin_city", 2), pick("dest_city", 2), pick("flight_status", 1), pick("origin", 3),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cases", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    work = Path(tempfile.mkdtemp(prefix="check-backends-"))
+    write(work / "flights", args.rows, "partitioned", args.seed)
+    os.environ["FLIGHT_DATA_SOURCE"] = str(work / "flights")
+    os.environ["FLIGHT_DATA_CACHE_DIR"] = str(work / "cache")
+
+    from flight_dashboard.backends import DuckDBBackend, PandasBackend
+
+    pandas_backend, duckdb_backend = PandasBackend(), DuckDBBackend()
+    first, last = pandas_backend.date_bounds()
+    options = {c: pandas_backend.options(c) for c in ["airline", "origin_city", "dest_city", "flight_status", "origin"]}
+
+    rng = random.Random(args.seed)
+    timings = {"pandas": [], "duckdb": []}
+    for _ in range(args.cases):
+        flt = random_filter(rng, options, first, last)
+        for by in GROUPINGS:
+            for backend in (pandas_backend, duckdb_backend):
+                start = time.perf_counter()
+                backend.metrics(flt, by)
+                timings[backend.name].append(time.perf_counter() - start)
+
+    print(f"{args.rows:,} rows, {args.cases} random filters x {len(GROUPINGS)} groupings\n")
+    print(f"{'backend':<10}{'median ms':>12}{'p95 ms':>10}")
+    for name, values in timings.items():
+        print(f"{name:<10}{np.median(values) * 1000:>12.1f}{np.percentile(values, 95) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Payload size and build time of figures built from raw rows vs ``flight_dashboard.charts``.
+
+    python benchmarks/bench_charts.py --rows 1000000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import plotly.express as px
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.frames import best_of, make_frame  # noqa: E402
+from flight_dashboard import charts  # noqa: E402
+from flight_dashboard.aggregations import flight_metrics  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows)
+    daily = flight_metrics(df, ["fl_date", "airline"])
+    cases = {
+        "status pie": (lambda: px.pie(df, names="flight_status"), lambda: charts.pie(df, names="flight_status")),
+        "delay histogram": (lambda: px.histogram(df, x="dep_delay"), lambda: charts.histogram(df, x="dep_delay")),
+        "daily line per airline": (
+            lambda: px.line(daily, x="fl_date", y="cancellation_rate", color="airline"),
+            lambda: charts.line(daily, x="fl_date", y="cancellation_rate", color="airline"),
+        ),
+    }
+
+    print(f"{args.rows:,} rows\n")
+    print(f"{'chart':<25}{'raw KiB':>12}{'charts KiB':>12}{'raw ms':>10}{'charts ms':>11}")
+    for name, (raw, compact) in cases.items():
+        # Build + serialize, which is what every rerun pays before the websocket send
+        raw_ms = best_of(lambda: charts.payload_bytes(raw()), args.repeat)
+        compact_ms = best_of(lambda: charts.payload_bytes(compact()), args.repeat)
+        raw_kib, compact_kib = (charts.payload_bytes(build()) / 1024 for build in (raw, compact))
+        print(f"{name:<25}{raw_kib:>12,.0f}{compact_kib:>12,.1f}{raw_ms:>10.0f}{compact_ms:>11.0f}")
+    assert np.isclose(sum(charts.histogram(df, x="dep_delay").data[0].y), df["dep_delay"].notna().sum())
+
+
+if __name__ == "__main__":
+    main()
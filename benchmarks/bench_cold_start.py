@@ -0,0 +1,105 @@
+"""Time to first render of every page in a freshly started server process.
+
+Each measurement starts a new Python process that renders one page once with
+``AppTest``, the way the first visitor after a restart is served:
+
+* ``cold``: empty data cache directory, nothing prepared (a first deploy)
+* ``disk``: the on-disk caches were built beforehand by
+  ``python -m flight_dashboard.warmup`` (a restart, or a deploy that runs it)
+* ``served``: the process ran ``warmup.warm()`` first, as
+  ``python -m flight_dashboard.warmup --serve`` does before it reports ready;
+  only the render itself is timed
+
+``import`` is the time each process spends importing Streamlit and its
+testing harness before the page starts, included in ``cold`` and ``disk``.
+
+    python benchmarks/bench_cold_start.py --rows 1m
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from flight_dashboard.synthetic import parse_rows, write  # noqa: E402
+
+PAGES = [
+    "Home.py",
+    "pages/1-Flight_Overview.py",
+    "pages/2-Airline_Analysis.py",
+    "pages/3-Airport_Analysis.py",
+    "pages/4-Project_Presentation.py",
+    "pages/5-About.py",
+    "pages/6-Data_Diagnostics.py",
+    "pages/7-Route_Analysis.py",
+]
+
+# Renders one page; prints "<import s> <warm-up s> <render s>"
+WORKER = """
+import sys, time
+start = time.perf_counter()
+import streamlit.config, streamlit.logger
+streamlit.config.get_option("logger.level")
+streamlit.logger.set_log_level("error")
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+if sys.argv[2] == "served":
+    from flight_dashboard import warmup
+    warmup.warm(report=None)
+warmed = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=900).run()
+if app.exception:
+    raise SystemExit(app.exception[0].value)
+print(f"{imported - start:.3f} {warmed - imported:.3f} {time.perf_counter() - warmed:.3f}")
+"""
+
+
+def first_render(page, mode, env):
+    out = subprocess.run([sys.executable, "-c", WORKER, page, mode], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return [float(value) for value in out.split()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=parse_rows, default=1_000_000, help="e.g. 100k, 1m")
+    parser.add_argument("--format", choices=["csv", "partitioned"], default="csv", help="synthetic source layout")
+    parser.add_argument("--modes", nargs="+", choices=["cold", "disk", "served"], default=["cold", "disk", "served"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    work = Path(tempfile.mkdtemp(prefix="bench-cold-start-"))
+    source = write(work / ("flights" if args.format == "partitioned" else "flights.csv"), args.rows, args.format, args.seed)
+    cache = work / "cache"
+    env = dict(os.environ, FLIGHT_DATA_SOURCE=str(source), FLIGHT_DATA_CACHE_DIR=str(cache))
+
+    results = {}
+    for mode in args.modes:
+        if mode != "cold":
+            shutil.rmtree(cache, ignore_errors=True)
+            subprocess.run([sys.executable, "-m", "flight_dashboard.warmup"], cwd=ROOT, env=env, check=True, capture_output=True)
+        for page in PAGES:
+            if mode == "cold":
+                shutil.rmtree(cache, ignore_errors=True)
+            results[page, mode] = first_render(page, mode, env)
+
+    print(f"{args.rows:,} rows ({args.format}): seconds to first render in a new process\n")
+    print(f"{'page':<34}{'import':>8}" + "".join(f"{mode:>10}" for mode in args.modes))
+    for page in PAGES:
+        timings = [results[page, mode] for mode in args.modes]
+        imports = timings[0][0]
+        # cold and disk include the imports; served is the render after the warm-up
+        cells = [render if mode == "served" else imported + render for mode, (imported, _, render) in zip(args.modes, timings)]
+        print(f"{page:<34}{imports:>8.2f}" + "".join(f"{cell:>10.2f}" for cell in cells))
+    if "served" in args.modes:
+        print(f"\nwarm-up before the server reported ready: {results[PAGES[0], 'served'][1]:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
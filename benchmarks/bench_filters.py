@@ -0,0 +1,59 @@
+"""Latency of the sidebar filters: chained ``isin`` scans vs ``FilterIndex``.
+
+    python benchmarks/bench_filters.py --rows 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.frames import best_of, make_frame  # noqa: E402
+from flight_dashboard.indexes import FilterIndex  # noqa: E402
+
+COLUMNS = ["airline", "origin_city", "dest_city", "flight_status"]
+
+
+def chained_isin(df, selections):
+    # What the pages did before: one scan and one intermediate frame per widget
+    for col, values in selections.items():
+        if values:
+            df = df[df[col].isin(values)]
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows)
+    start = time.perf_counter()
+    index = FilterIndex(df, COLUMNS)
+    print(f"{args.rows:,} rows, index built in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    cities = list(df["origin_city"].cat.categories)
+    airlines = list(df["airline"].cat.categories)
+    cases = {
+        "one airline": {"airline": airlines[:1]},
+        "typical (2 airlines, 3 origin cities)": {"airline": airlines[:2], "origin_city": cities[:3]},
+        "status + dest city": {"flight_status": ["Cancelled"], "dest_city": cities[10:12]},
+        "worst (all airlines, 200 cities each side)": {
+            "airline": airlines, "origin_city": cities[:200], "dest_city": cities[:200], "flight_status": ["Completed"],
+        },
+    }
+
+    print(f"{'case':<45}{'isin ms':>10}{'index ms':>10}{'speedup':>10}")
+    for name, selections in cases.items():
+        expected = chained_isin(df, selections)
+        assert index.filter(df, selections).equals(expected)
+        isin_ms = best_of(lambda: chained_isin(df, selections), args.repeat)
+        index_ms = best_of(lambda: index.filter(df, selections), args.repeat)
+        print(f"{name:<45}{isin_ms:>10.2f}{index_ms:>10.2f}{isin_ms / index_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
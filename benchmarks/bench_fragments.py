@@ -0,0 +1,91 @@
+"""Full-page rerun vs fragment rerun time for the widgets that only affect their own section.
+
+Each case flips one local widget back and forth in a headless ``AppTest`` run
+and reports the time of the whole-script rerun that ``AppTest`` performs next
+to the time spent inside the widget's ``st.fragment`` (read from the perf
+registry). With fragments, the second figure is what a browser interaction
+costs: the filters, queries and KPIs outside the fragment are not rerun.
+
+    python benchmarks/bench_fragments.py --rows 1000000
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.suite import ROOT, use_source  # noqa: E402
+from flight_dashboard import perf  # noqa: E402
+from flight_dashboard.synthetic import parse_rows, write  # noqa: E402
+
+# (page script, perf page, section to open first, widget label, fragment stage)
+CASES = [
+    ("pages/1-Flight_Overview.py", "overview", None, "Select Chart Type:", "fragment:flights_over_time"),
+    ("pages/2-Airline_Analysis.py", "airline", ("airline_section", "❌ Cancellation Analysis"), "Chart Type", "fragment:cancel_chart"),
+    ("pages/2-Airline_Analysis.py", "airline", ("airline_section", "🔁 Compare Airlines"), "Select up to 2 Airlines to Compare:", "fragment:compare_airlines"),
+    ("pages/3-Airport_Analysis.py", "airport", ("airport_section", "🔍 Compare Airports"), "Select Two Airports to Compare", "fragment:compare_airports"),
+]
+
+
+def widget(app, label):
+    return next(w for w in [*app.radio, *app.multiselect] if w.label == label)
+
+
+def choices(app, label):
+    # Two values to flip between: the radio options, or two different pairs for a multiselect
+    w = widget(app, label)
+    if w.type == "radio":
+        return list(w.options)
+    return [list(w.options[:2]), list(w.options[1:3])]
+
+
+def bench_case(script, page, section, label, stage, flips, timeout):
+    app = AppTest.from_file(str(ROOT / script), default_timeout=timeout).run()
+    if section:
+        app.radio(key=section[0]).set_value(section[1]).run()
+    values = choices(app, label)
+    registry = perf.load_registry()
+    full, fragment = [], []
+    for i in range(flips):
+        before = registry.seconds(page, stage)
+        widget(app, label).set_value(values[i % 2])
+        start = time.perf_counter()
+        app.run()
+        full.append((time.perf_counter() - start) * 1000)
+        fragment.append((registry.seconds(page, stage) - before) * 1000)
+        if app.exception:
+            raise RuntimeError(f"{script}: {app.exception[0].value}")
+    # The first two flips build the figures; the rest reuse the figure cache like a real session
+    return statistics.median(full[2:] or full), statistics.median(fragment[2:] or fragment)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=parse_rows, default=1_000_000, help="e.g. 100k, 1m")
+    parser.add_argument("--flips", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args(argv)
+
+    # Stage timings are recorded but not logged line by line
+    perf.PERF_ENABLED = True
+    perf.log.setLevel("WARNING")
+    with tempfile.TemporaryDirectory() as work:
+        path = Path(work) / "flights.csv"
+        write(path, args.rows, "csv")
+        use_source(path, Path(work) / "cache")
+
+        print(f"{args.rows:,} rows\n")
+        print(f"{'widget':<40}{'full rerun ms':>15}{'fragment ms':>13}{'saved':>8}")
+        for script, page, section, label, stage in CASES:
+            full, fragment = bench_case(script, page, section, label, stage, args.flips, args.timeout)
+            print(f"{label[:38]:<40}{full:>15.1f}{fragment:>13.1f}{1 - fragment / full:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Time merged delay sketches against exact percentiles on random filters.
+
+The sketches are built per month and merged, the way partitioned datasets
+store them. For every sketch, random month range, group and status selection,
+and grouping (per group, per month, overall), the merged percentiles are timed
+against sorting the filtered rows, which is what a rerun would have to do
+without the sketches. tests/test_sketches.py checks their accuracy.
+
+    python benchmarks/bench_sketches.py --rows 1m --cases 50
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.frames import make_frame  # noqa: E402
+from flight_dashboard.sketches import PERCENTILES, SKETCHES, DelaySketches, percentile_column  # noqa: E402
+from flight_dashboard.synthetic import parse_rows  # noqa: E402
+
+
+def exact_percentiles(df, key, delay, qs=PERCENTILES):
+    """Nearest-rank percentiles of ``delay`` per ``key`` (or overall), by sorting the rows."""
+    values = df[delay].to_numpy(dtype=np.float64, na_value=np.nan)
+    has_delay = ~np.isnan(values)
+    if key is None:
+        codes, labels = np.zeros(int(has_delay.sum()), dtype=np.int64), pd.Index([None])
+    else:
+        codes, labels = pd.factorize(df[key].to_numpy()[has_delay], sort=True)
+    values = values[has_delay]
+    order = np.lexsort((values, codes))
+    sizes = np.bincount(codes, minlength=len(labels))
+    present = sizes > 0
+    starts = (np.cumsum(sizes) - sizes)[present]
+    ranks = np.maximum(np.ceil(np.outer(sizes[present], qs)), 1).astype(np.int64)
+    result = pd.DataFrame(values[order][starts[:, None] + ranks - 1], columns=[percentile_column(q) for q in qs])
+    result.insert(0, "flights", sizes[present])
+    if key is not None:
+        result.insert(0, key, np.asarray(labels)[present])
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=parse_rows, default=1_000_000, help="e.g. 100k, 1m")
+    parser.add_argument("--cases", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows, args.seed)
+    start = time.perf_counter()
+    sketches = DelaySketches.from_cells([DelaySketches.aggregate(month) for _, month in df.groupby("year_month", sort=True)])
+    print(f"{args.rows:,} rows; sketched per month and merged in {time.perf_counter() - start:.2f} s "
+          f"({sum(len(cells) for cells in sketches.cells.values()):,} cells)")
+
+    months = sorted(df["year_month"].unique())
+    rng = random.Random(args.seed)
+    timings = {"sketch": [], "exact": []}
+    for _ in range(args.cases):
+        first, last = sorted(rng.sample(months, 2))
+        for name, (group, delay, filters) in SKETCHES.items():
+            groups = tuple(rng.sample(sorted(df[group].cat.categories), rng.randint(0, 3)))
+            statuses = tuple(rng.sample(sorted(df["flight_status"].cat.categories), rng.randint(0, 1))) if filters else ()
+            for by in ["group", "year_month", None]:
+                start = time.perf_counter()
+                sketches.percentiles(name, by, first, last, groups, statuses)
+                timings["sketch"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                rows = df[df["year_month"].between(first, last)]
+                if groups:
+                    rows = rows[rows[group].isin(groups)]
+                if statuses:
+                    rows = rows[rows["flight_status"].isin(statuses)]
+                key = {"group": group, "year_month": "year_month", None: None}[by]
+                exact_percentiles(rows, key, delay)
+                timings["exact"].append(time.perf_counter() - start)
+
+    print(f"{args.cases} random filters x {len(SKETCHES)} sketches x 3 groupings\n")
+    print(f"{'method':<10}{'median ms':>12}{'p95 ms':>10}")
+    for method, values in timings.items():
+        print(f"{method:<10}{np.median(values) * 1000:>12.1f}{np.percentile(values, 95) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Check that N server processes share one copy of the flights frame.
+
+Starts ``--workers`` processes that each load the frame through
+``data.load_flights`` (what every Streamlit server process does on its first
+page view) and read every column. It then sums their proportional set size
+(PSS) from ``/proc/<pid>/smaps_rollup``. Pages mapped by several processes are
+split between them in PSS, so the sum counts the shared file once. The check
+passes when the combined PSS, minus that of N idle interpreters, stays within
+``--tolerance`` times one copy of the frame. A run with the shared file
+disabled is reported alongside for comparison.
+
+A cold start is checked first: all workers are started at once on an empty
+cache directory, as a fresh deploy of several server processes would. Every
+one of them must load the frame, the directory must end up with one shared
+file and no leftover temp files, and every worker must map that file. Their
+PSS is reported but not checked, since each of them also parsed the source
+and its heap keeps some of that. Linux only.
+
+    python benchmarks/check_shared_memory.py --rows 1m --workers 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from flight_dashboard.synthetic import parse_rows, write  # noqa: E402
+
+# Imports the data layer, loads the frame and reads every byte of it so its pages are
+# resident ("idle" stops after the imports), reports the time taken, then waits
+WORKER = """
+import sys, time
+start = time.perf_counter()
+import numpy as np
+import pandas as pd
+from flight_dashboard import data
+
+def buffers(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return [values.cat.codes.to_numpy()]
+    if isinstance(values.array, pd.arrays.IntegerArray):
+        return [values.array._data, values.array._mask]
+    return [values.to_numpy()]
+
+if sys.argv[1] == "load":
+    df = data.load_flights()
+    for col in df.columns:
+        for buffer in buffers(df[col]):
+            buffer.view(np.uint8).sum()
+print(f"{time.perf_counter() - start:.3f}", flush=True)
+sys.stdin.read()
+"""
+
+
+def memory_kib(pid):
+    """Rss, Pss and private KiB of a process from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split()[:2]
+        fields[name.rstrip(":")] = int(value)
+    return {"rss": fields["Rss"], "pss": fields["Pss"], "private": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def run_workers(n, mode, env, together=False):
+    """Start ``n`` workers one after another (or all at once); returns [(load seconds, memory)] while all are alive."""
+    workers, loads = [], []
+
+    def loaded(proc):
+        line = proc.stdout.readline()
+        if not line:
+            raise SystemExit(f"FAIL: worker {proc.pid} exited while loading:\n{proc.stderr.read()}")
+        return float(line)
+
+    try:
+        for _ in range(n):
+            proc = subprocess.Popen([sys.executable, "-c", WORKER, mode], cwd=ROOT, env=env, text=True,
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            workers.append(proc)
+            if not together:
+                loads.append(loaded(proc))
+        if together:
+            loads = [loaded(proc) for proc in workers]
+        return [(load, {**memory_kib(proc.pid), "inodes": mapped_inodes(proc.pid)}) for load, proc in zip(loads, workers)]
+    finally:
+        for proc in workers:
+            proc.stdin.close()
+            proc.wait()
+
+
+def mapped_inodes(pid, suffix=".arrow"):
+    """Inodes of the files ending in ``suffix`` mapped by a process, "(deleted)" ones included."""
+    inodes = set()
+    for line in Path(f"/proc/{pid}/maps").read_text().splitlines():
+        fields = line.split(maxsplit=5)
+        if len(fields) == 6 and fields[5].removesuffix(" (deleted)").endswith(suffix):
+            inodes.add(int(fields[4]))
+    return inodes
+
+
+def report(title, results, baseline_kib):
+    print(f"\n{title}")
+    print(f"{'worker':>8}{'load s':>9}{'RSS MiB':>10}{'PSS MiB':>10}{'private MiB':>13}")
+    for i, (load, mem) in enumerate(results):
+        print(f"{i:>8}{load:>9.2f}{mem['rss'] / 1024:>10.0f}{mem['pss'] / 1024:>10.0f}{mem['private'] / 1024:>13.0f}")
+    data_kib = sum(mem["pss"] for _, mem in results) - baseline_kib
+    print(f"combined PSS above {len(results)} idle interpreters: {data_kib / 1024:,.0f} MiB")
+    return data_kib
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=parse_rows, default=1_000_000, help="e.g. 100k, 1m")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed multiple of one frame copy")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work:
+        source = Path(work) / "flights.csv"
+        write(source, args.rows, "csv")
+        cache = Path(work) / "cache"
+        env = {**os.environ, "FLIGHT_DATA_SOURCE": str(source), "FLIGHT_DATA_CACHE_DIR": str(cache)}
+
+        # Every worker starts on the empty cache at once and builds the caches itself
+        cold = run_workers(args.workers, "load", env, together=True)
+        published = sorted(path.name for path in cache.iterdir() if path.suffix in (".arrow", ".part"))
+        shared_inode = {path.stat().st_ino for path in cache.glob("*.arrow")}
+        unshared = [i for i, (_, mem) in enumerate(cold) if mem["inodes"] != shared_inode]
+        frame_kib = sum(p.stat().st_size for p in cache.glob("*.arrow")) / 1024
+        print(f"{args.rows:,} rows, shared frame {frame_kib / 1024:,.0f} MiB, {args.workers} workers")
+
+        # Idle interpreters run side by side too, so their shared libraries are split the same way
+        baseline = sum(mem["pss"] for _, mem in run_workers(args.workers, "idle", env))
+        print(f"{args.workers} idle interpreters: {baseline / 1024:,.0f} MiB PSS")
+        cold = report("cold start (all workers at once on an empty cache)", cold, baseline)
+        print(f"cache directory: {published}")
+        shared = report("shared (memory-mapped Arrow file)", run_workers(args.workers, "load", env), baseline)
+        private = report("private (FLIGHT_SHARED_MEMORY=0)", run_workers(args.workers, "load", {**env, "FLIGHT_SHARED_MEMORY": "0"}), baseline)
+
+    limit = args.tolerance * frame_kib
+    print(f"\nshared: {shared / frame_kib:.2f} copies of the frame (limit {args.tolerance:.2f}); "
+          f"private: {private / frame_kib:.2f} copies; cold start: {cold / frame_kib:.2f} copies, "
+          f"{args.workers - len(unshared)} of {args.workers} workers mapping the published file")
+    if len(published) != 1 or not published[0].endswith(".arrow"):
+        print("FAIL: the cold start did not leave exactly one shared file")
+        sys.exit(1)
+    if unshared:
+        print(f"FAIL: cold-started workers {unshared} do not map the published file")
+        sys.exit(1)
+    if shared > limit:
+        print("FAIL: the workers do not share the frame")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
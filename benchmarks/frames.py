@@ -0,0 +1,20 @@
+"""Generated frames shaped like the cleaned flights data, for the benchmark scripts."""
+
+import time
+
+from flight_dashboard.synthetic import generate
+
+
+def make_frame(n_rows, seed=0):
+    # The full cleaned schema with the sample's cardinalities and skew, see flight_dashboard.synthetic
+    return generate(n_rows, seed)
+
+
+def best_of(fn, repeat):
+    """Fastest of ``repeat`` runs of ``fn``, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
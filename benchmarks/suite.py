@@ -0,0 +1,201 @@
+"""Offline benchmark suite: load, filter and aggregate per page, then every page end to end.
+
+Each size gets a synthetic cleaned CSV (cached under ``--work``), so nothing is
+downloaded. Per size the suite times the load path (CSV parse, Parquet cache
+build and read, indexes, cube), the filter and aggregate steps behind each
+analysis page, and a cold and a warm headless ``AppTest`` run of every page.
+Results are written as JSON; ``--compare`` diffs two result files.
+
+    python benchmarks/suite.py --sizes 100k 1m
+    python benchmarks/suite.py --sizes 10m 30m --repeat 1
+    python benchmarks/suite.py --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+import streamlit.config  # noqa: E402
+import streamlit.logger  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.frames import best_of  # noqa: E402
+from flight_dashboard import data  # noqa: E402
+from flight_dashboard.aggregations import flight_metrics  # noqa: E402
+from flight_dashboard.cube import OverviewCube, flights_by_year, kpis, status_counts  # noqa: E402
+from flight_dashboard.indexes import DateIndex, FilterIndex  # noqa: E402
+from flight_dashboard.synthetic import SIZES, parse_rows, write  # noqa: E402
+
+# The cached accessors warn about running outside `streamlit run` on every call;
+# the config is parsed first so it cannot reset the level afterwards
+streamlit.config.get_option("logger.level")
+streamlit.logger.set_log_level("error")
+
+PAGES = ["Home.py", *sorted(str(p.relative_to(ROOT)) for p in (ROOT / "pages").glob("*.py"))]
+
+# A slowdown beyond this ratio is reported as a regression by --compare
+REGRESSION_RATIO = 1.2
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def use_source(path, cache_dir):
+    # Point the data layer at a generated file and drop every shared resource
+    data.DATA_SOURCE = str(path)
+    data.CACHE_DIR = Path(cache_dir)
+    st.cache_resource.clear()
+
+
+def bench_load(path, repeat):
+    results = {}
+    _, results["csv_parse"] = timed(lambda: data.read_flights(path))
+    _, results["cache_build"] = timed(lambda: data.load_flights(path))
+    results["cache_read"] = best_of(lambda: data.load_flights(path), repeat)
+    df = data.load_flights(path)
+    results["date_index"] = best_of(lambda: DateIndex(df["fl_date"]), repeat)
+    results["filter_index"] = best_of(lambda: FilterIndex(df, data.FILTER_COLUMNS), repeat)
+    results["overview_cube"] = best_of(lambda: OverviewCube.build(df), repeat)
+    return results
+
+
+def bench_pages(path, repeat):
+    """(page, stage) -> ms for the filter and aggregate steps each analysis page runs."""
+    df = data.load_flights(path)
+    date_index, filter_index = DateIndex(df["fl_date"]), FilterIndex(df, data.FILTER_COLUMNS)
+    cube = OverviewCube.build(df)
+
+    # A typical sidebar: the middle year, two busy airlines, completed flights, the busiest origins
+    start, end = pd.Timestamp("2021-01-01"), pd.Timestamp("2021-12-31")
+    airlines = df["airline"].value_counts().index[:2].tolist()
+    origins = df["origin"].value_counts().index[:3].tolist()
+    selections = {"airline": airlines, "flight_status": ["Completed"]}
+    lo, hi = date_index.bounds(start, end)
+    airline_rows = filter_index.filter(df, selections, lo, hi)
+    airport_rows = filter_index.filter(df, {"origin": origins})
+    cells = cube.slice(start, end, airlines, None, None, ["Completed"])
+
+    steps = {
+        ("overview", "filter"): lambda: cube.slice(start, end, airlines, None, None, ["Completed"]),
+        ("overview", "aggregate"): lambda: (kpis(cells), flights_by_year(cells), status_counts(cells)),
+        ("airline", "filter"): lambda: filter_index.filter(df, selections, *date_index.bounds(start, end)),
+        ("airline", "aggregate"): lambda: (
+            flight_metrics(airline_rows, ["airline"]),
+            flight_metrics(airline_rows, ["airline", "dep_time_Period"]),
+            flight_metrics(airline_rows, ["year_month", "airline"]),
+        ),
+        ("airport", "filter"): lambda: filter_index.filter(df, {"origin": origins}),
+        ("airport", "aggregate"): lambda: (flight_metrics(airport_rows, ["origin"]), flight_metrics(airport_rows, ["dest"])),
+    }
+    return {key: best_of(step, repeat) for key, step in steps.items()}
+
+
+def bench_apptest(timeout):
+    """page -> {"cold": ms, "warm": ms}; cold starts with no shared resources, warm reuses them."""
+    st.cache_resource.clear()
+    results = {}
+    for page in PAGES:
+        timings = {}
+        for run in ("cold", "warm"):
+            if run == "cold":
+                st.cache_resource.clear()
+            app, timings[run] = timed(lambda: AppTest.from_file(str(ROOT / page), default_timeout=timeout).run())
+            if app.exception:
+                raise RuntimeError(f"{page}: {app.exception[0].value}")
+        results[page] = timings
+    return results
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run_suite(sizes, repeat, work, seed, timeout):
+    records = []
+    for n_rows in sizes:
+        path = work / f"flights-{n_rows}-{seed}.csv"
+        if not path.exists():
+            print(f"generating {n_rows:,} rows -> {path}", flush=True)
+            write(path, n_rows, "csv", seed)
+        use_source(path, work / f"cache-{n_rows}-{seed}")
+        # Start from an empty Parquet cache so cache_build measures a cold start
+        for cached in data.CACHE_DIR.glob("flights-*"):
+            cached.unlink()
+
+        for stage, ms in bench_load(path, repeat).items():
+            records.append({"rows": n_rows, "page": "load", "stage": stage, "ms": ms})
+        for (page, stage), ms in bench_pages(path, repeat).items():
+            records.append({"rows": n_rows, "page": page, "stage": stage, "ms": ms})
+        for page, timings in bench_apptest(timeout).items():
+            for run, ms in timings.items():
+                records.append({"rows": n_rows, "page": page, "stage": f"apptest_{run}", "ms": ms})
+
+        for r in records:
+            if r["rows"] == n_rows:
+                print(f"{n_rows:>12,}  {r['page']:<36}{r['stage']:<16}{r['ms']:>12.1f} ms", flush=True)
+    return records
+
+
+def compare(old_path, new_path, ratio=REGRESSION_RATIO):
+    """Print old vs new timings; returns the number of regressions beyond ``ratio``."""
+    old, new = (pd.DataFrame(json.loads(Path(p).read_text())["results"]) for p in (old_path, new_path))
+    merged = old.merge(new, on=["rows", "page", "stage"], suffixes=("_old", "_new"))
+    merged["ratio"] = merged["ms_new"] / merged["ms_old"]
+    regressions = merged["ratio"] > ratio
+    for _, r in merged.iterrows():
+        flag = "  REGRESSION" if r["ratio"] > ratio else ""
+        print(f"{r['rows']:>12,}  {r['page']:<36}{r['stage']:<16}{r['ms_old']:>10.1f}{r['ms_new']:>10.1f}{r['ratio']:>8.2f}x{flag}")
+    print(f"\n{int(regressions.sum())} of {len(merged)} timings slower than {ratio:.2f}x")
+    return int(regressions.sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=parse_rows, default=[SIZES["100k"], SIZES["1m"]],
+                        help="row counts, e.g. 100k 1m 10m 30m")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per AppTest run")
+    parser.add_argument("--work", type=Path, default=ROOT / ".cache" / "bench", help="generated data and caches")
+    parser.add_argument("--out", type=Path, help="result file (default benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    revision = git_revision()
+    records = run_suite(args.sizes, args.repeat, args.work, args.seed, args.timeout)
+    stamp = datetime.now(timezone.utc)
+    out = args.out or ROOT / "benchmarks" / "results" / f"{stamp:%Y%m%dT%H%M%S}-{revision['commit']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "meta": {
+            **revision, "timestamp": stamp.isoformat(), "python": platform.python_version(),
+            "pandas": pd.__version__, "streamlit": st.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count(), "repeat": args.repeat, "seed": args.seed,
+        },
+        "results": records,
+    }, indent=2))
+    print(f"\nresults -> {out}")
+
+
+if __name__ == "__main__":
+    main()
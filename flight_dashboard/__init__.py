@@ -0,0 +1 @@
+"""Shared building blocks for the Flight Delay and Cancellation dashboard pages."""
@@ -0,0 +1,86 @@
+"""Vectorized airline / airport / month metrics shared by the analysis pages."""
+
+import numpy as np
+import pandas as pd
+
+# A flight counts as delayed when it left more than 15 minutes late
+DELAY_THRESHOLD = 15
+
+
+def _group_ids(df, by):
+    # Combine the integer codes of every key column into one group id per row.
+    # Categorical keys already carry their codes; anything else is factorized once.
+    ids = np.zeros(len(df), dtype=np.int64)
+    valid = np.ones(len(df), dtype=bool)
+    levels = []
+    for col in by:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values, sort=True)
+        valid &= codes >= 0
+        ids = ids * len(uniques) + codes
+        levels.append(uniques)
+    if valid.all():
+        return ids, slice(None), levels
+    return ids[valid], valid, levels
+
+
+def _key_columns(group_keys, by, levels, df):
+    if not by:
+        return {}
+    shape = [len(level) for level in levels]
+    columns = {}
+    for col, level, codes in zip(by, levels, np.unravel_index(group_keys, shape)):
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            columns[col] = pd.Categorical.from_codes(codes, dtype=df[col].dtype)
+        else:
+            columns[col] = level.take(codes)
+    return columns
+
+
+def flight_metrics(df, by):
+    """Flight, cancellation and delay metrics per group of ``by``, in one vectorized pass.
+
+    An empty ``by`` returns a single row of totals.
+
+    Rows are mapped to integer group ids from the key columns' codes, and every
+    metric is a single ``np.bincount`` over those ids, so no Python code runs
+    per group and no per-group frames are built.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    ids, valid, levels = _group_ids(df, by)
+
+    # Compact the id space when the key combinations far outnumber the rows
+    group_keys = np.arange(int(np.prod([len(level) for level in levels])))
+    if len(group_keys) > 4 * max(len(ids), 1):
+        group_keys, ids = np.unique(ids, return_inverse=True)
+    n_groups = len(group_keys)
+
+    cancelled = df["cancelled"].to_numpy()[valid]
+    dep_delay = df["dep_delay"].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+    arr_delay = df["arr_delay"].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+    has_dep, has_arr = ~np.isnan(dep_delay), ~np.isnan(arr_delay)
+
+    # Missing delays (cancelled flights) add zero to the sums and are left out of the counts
+    total = np.bincount(ids, minlength=n_groups)
+    dep_count = np.bincount(ids, weights=has_dep, minlength=n_groups)
+    arr_count = np.bincount(ids, weights=has_arr, minlength=n_groups)
+    dep_sum = np.bincount(ids, weights=np.where(has_dep, dep_delay, 0), minlength=n_groups)
+    arr_sum = np.bincount(ids, weights=np.where(has_arr, arr_delay, 0), minlength=n_groups)
+
+    observed = total > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        metrics = pd.DataFrame({
+            **_key_columns(group_keys[observed], by, levels, df),
+            "total_flights": total[observed],
+            "cancelled_flights": np.bincount(ids, weights=cancelled, minlength=n_groups)[observed].astype(np.int64),
+            "delayed_flights": np.bincount(ids, weights=dep_delay > DELAY_THRESHOLD, minlength=n_groups)[observed].astype(np.int64),
+            "dep_delay_sum": dep_sum[observed],
+            "avg_dep_delay": np.where(dep_count > 0, dep_sum / dep_count, np.nan)[observed],
+            "arr_delay_sum": arr_sum[observed],
+            "avg_arr_delay": np.where(arr_count > 0, arr_sum / arr_count, np.nan)[observed],
+        })
+    metrics["cancellation_rate"] = metrics["cancelled_flights"] / metrics["total_flights"] * 100
+    return metrics
@@ -0,0 +1,155 @@
+"""Airport index behind the Airport Analysis page.
+
+Flights are pre-aggregated per airport x side (departures from it as the
+origin, arrivals at it as the destination) x month when the data is loaded.
+Rankings and comparisons of any set of airports then sum those few cells
+with ``np.bincount`` instead of grouping the flights again.
+"""
+
+import numpy as np
+import pandas as pd
+
+from flight_dashboard.aggregations import _group_ids, _key_columns
+
+# Side -> (airport code column, city column) of the flights
+SIDES = {"origin": ("origin", "origin_city"), "dest": ("dest", "dest_city")}
+
+
+class AirportIndex:
+    """Flights, cancellations and delay sums keyed by airport x side x month.
+
+    ``airports`` maps each airport code to its city and a search label such as
+    "ORD · Chicago, IL", ordered by departures. ``cells`` stays sorted by
+    ``year_month``, so a month range is a contiguous slice.
+    """
+
+    KEYS = ["airport", "city", "side", "year_month"]
+    MEASURES = ["flights", "cancelled", "dep_delay_sum", "dep_delay_count", "arr_delay_sum", "arr_delay_count"]
+
+    def __init__(self, airports, cells):
+        self.airports = airports
+        self.cells = cells
+        # Airport code -> search label, for option lists that match codes and cities alike
+        self.labels = dict(zip(airports["airport"], airports["label"]))
+        self.months, month_codes = np.unique(cells["year_month"].to_numpy(), return_inverse=True)
+        self._codes = {
+            "airport": (cells["airport"].cat.codes.to_numpy(), len(cells["airport"].cat.categories)),
+            "year_month": (month_codes.astype(np.int16), len(self.months)),
+        }
+        self._sides = cells["side"].to_numpy()
+        self._measures = {name: cells[name].to_numpy(dtype=np.float64) for name in self.MEASURES}
+
+    @classmethod
+    def build(cls, df):
+        return cls.from_cells(cls.aggregate(df))
+
+    @classmethod
+    def aggregate(cls, df):
+        """Cells of ``df`` keyed by ``KEYS``.
+
+        Cells of disjoint months never overlap, so cells aggregated per
+        partition can simply be concatenated and passed to ``from_cells``.
+        """
+        def values(col):
+            return df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        dep_delay, arr_delay = values("dep_delay"), values("arr_delay")
+        measures = {
+            "flights": np.ones(len(df)),
+            "cancelled": df["cancelled"].to_numpy(dtype=np.float64),
+            "dep_delay_sum": np.nan_to_num(dep_delay),
+            "dep_delay_count": ~np.isnan(dep_delay),
+            "arr_delay_sum": np.nan_to_num(arr_delay),
+            "arr_delay_count": ~np.isnan(arr_delay),
+        }
+        frames = []
+        for side, (code, city) in SIDES.items():
+            keys = [code, city, "year_month"]
+            ids, valid, levels = _group_ids(df, keys)
+            groups, ids = np.unique(ids, return_inverse=True)
+            sums = {name: np.bincount(ids, weights=values[valid], minlength=len(groups)) for name, values in measures.items()}
+            columns = _key_columns(groups, keys, levels, df)
+            frames.append(pd.DataFrame({
+                "airport": np.asarray(columns[code], dtype=object),
+                "city": np.asarray(columns[city], dtype=object),
+                "side": side,
+                "year_month": columns["year_month"],
+                **sums,
+            }))
+        cells = pd.concat(frames, ignore_index=True)
+        return cells.astype({name: np.int32 for name in ["flights", "cancelled", "dep_delay_count", "arr_delay_count"]})
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Index over ``cells``, labelling the airports they contain."""
+        cells = cells.dropna(subset=["airport"])
+        departures = cells[cells["side"] == "origin"].groupby("airport", observed=True)["flights"].sum()
+        # Busiest airports first, so the default selections and the option lists start with them
+        codes = departures.reindex(cells["airport"].unique(), fill_value=0).sort_values(ascending=False, kind="stable").index
+        # An airport's city is the one most of its flights name
+        cities = (cells.groupby(["airport", "city"], observed=True)["flights"].sum()
+                  .sort_values(ascending=False, kind="stable").reset_index().drop_duplicates("airport").set_index("airport")["city"])
+        airports = pd.DataFrame({"airport": codes, "city": cities.reindex(codes).fillna("").to_numpy()})
+        airports["label"] = np.where(airports["city"] != "", airports["airport"] + " · " + airports["city"], airports["airport"])
+
+        indexed = pd.DataFrame({
+            "airport": pd.Categorical(cells["airport"].astype(str), categories=codes),
+            "side": cells["side"].to_numpy(dtype=object),
+            "year_month": cells["year_month"].to_numpy(dtype=np.int32),
+            **{name: cells[name].to_numpy() for name in cls.MEASURES},
+        })
+        return cls(airports.reset_index(drop=True), indexed.sort_values("year_month", kind="stable", ignore_index=True))
+
+    @property
+    def codes(self):
+        """Airport codes, busiest first."""
+        return self.airports["airport"].tolist()
+
+    def metrics(self, side="origin", by=("airport",), first=None, last=None, airports=()):
+        """Flight, cancellation and delay metrics of one ``side`` per group of ``by``.
+
+        ``by`` is any of ``airport`` and ``year_month``; airport groups also
+        get their city and label. ``first`` and ``last`` are inclusive yyyymm
+        months and empty ``airports`` mean all airports.
+        """
+        by = list(by)
+        months = self._codes["year_month"][0]
+        first_code = 0 if first is None else int(np.searchsorted(self.months, first, "left"))
+        last_code = len(self.months) if last is None else int(np.searchsorted(self.months, last, "right"))
+        # Cells are in month order, so the month range is one slice
+        lo, hi = (int(i) for i in np.searchsorted(months, [first_code, last_code]))
+        keep = self._sides[lo:hi] == side
+        if airports:
+            wanted = np.flatnonzero(self.cells["airport"].cat.categories.isin(list(airports)))
+            keep &= np.isin(self._codes["airport"][0][lo:hi], wanted)
+        positions = np.flatnonzero(keep) + lo
+
+        ids = np.zeros(len(positions), dtype=np.int64)
+        shape = []
+        for col in by:
+            codes, size = self._codes[col]
+            ids = ids * size + codes[positions]
+            shape.append(size)
+        sums = {name: np.bincount(ids, weights=values[positions], minlength=int(np.prod(shape)))
+                for name, values in self._measures.items()}
+        observed = np.flatnonzero(sums["flights"] > 0)
+        sums = {name: values[observed] for name, values in sums.items()}
+        keys = {}
+        for col, codes in zip(by, np.unravel_index(observed, shape) if by else []):
+            keys[col] = self.months[codes] if col == "year_month" else pd.Categorical.from_codes(codes, dtype=self.cells["airport"].dtype)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            metrics = pd.DataFrame({
+                **keys,
+                "total_flights": sums["flights"].astype(np.int64),
+                "cancelled_flights": sums["cancelled"].astype(np.int64),
+                "avg_dep_delay": sums["dep_delay_sum"] / sums["dep_delay_count"],
+                "avg_arr_delay": sums["arr_delay_sum"] / sums["arr_delay_count"],
+                "cancellation_rate": 100 * sums["cancelled"] / sums["flights"],
+            })
+        if "airport" in by:
+            metrics["airport"] = metrics["airport"].astype(str)
+            labels = self.airports.set_index("airport").reindex(metrics["airport"])
+            metrics.insert(1, "city", labels["city"].to_numpy())
+            metrics.insert(2, "label", labels["label"].to_numpy())
+        return metrics
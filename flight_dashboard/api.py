@@ -0,0 +1,275 @@
+"""Headless HTTP API serving the dashboard's aggregates as JSON or Arrow IPC.
+
+Other systems get the numbers the pages show without running a Streamlit
+script per request. The handlers call the same query backend, airport index
+and KPI helper as the pages:
+
+* ``/api/kpis``: total, delayed, cancelled and on-time flights (Flight Overview)
+* ``/api/airlines``: flight, cancellation and delay metrics per airline
+* ``/api/airports``: metrics per airport as origin or destination (Airport Analysis)
+* ``/api/monthly``: metrics per month, optionally per airline / status / origin too
+
+Filters are query parameters: ``start`` and ``end`` (YYYY-MM-DD) and, repeated
+for several values, ``airline``, ``origin_city``, ``dest_city``, ``status`` and
+``origin``. ``GET /api`` lists the parameters of every endpoint. Responses are
+JSON unless ``format=arrow`` is given or the ``Accept`` header asks for
+``application/vnd.apache.arrow.stream``.
+
+Every response has an ETag derived from the dataset fingerprint and the
+normalized request. A client revalidating with ``If-None-Match`` gets a 304
+before any query runs. Encoded bodies are kept in an LRU cache until the
+dataset changes.
+
+    python -m flight_dashboard.api --port 8502 --processes 4
+    curl 'localhost:8502/api/airlines?start=2023-01-01&end=2023-06-30'
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import tornado.httpserver
+import tornado.ioloop
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+from flight_dashboard import data
+from flight_dashboard.airports import SIDES
+from flight_dashboard.backends import FlightFilter, PandasBackend, load_backend
+from flight_dashboard.cube import kpis
+from flight_dashboard.schema import SCHEMA_VERSION
+
+log = logging.getLogger(__name__)
+
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+JSON_TYPE = "application/json"
+
+# Encoded responses kept per process; the dataset fingerprint is re-checked once a
+# minute, so clients may reuse a response for that long without revalidating
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("FLIGHT_API_CACHE_ENTRIES", "512"))
+MAX_AGE = 60
+
+# Query parameter -> FlightFilter field; repeat a parameter to select several values
+FILTER_PARAMS = {"airline": "airlines", "origin_city": "origin_cities", "dest_city": "dest_cities", "status": "statuses", "origin": "origins"}
+DATE_PARAMS = ["start", "end"]
+MONTHLY_GROUPS = ["airline", "flight_status", "origin"]
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _one(params, name, default=None):
+    values = params.get(name, [])
+    if len(values) > 1:
+        raise BadRequest(f"{name} takes a single value")
+    return values[0] if values else default
+
+
+def parse_filter(params, backend):
+    """FlightFilter of the request; a missing start or end is the first or last flight date."""
+    dates = [_one(params, name) for name in DATE_PARAMS]
+    start = end = None
+    if any(dates):
+        try:
+            dates = [pd.Timestamp(value).date() if value else None for value in dates]
+        except ValueError as err:
+            raise BadRequest(f"dates must be YYYY-MM-DD: {err}") from None
+        first, last = backend.date_bounds()
+        start, end = dates[0] or first.date(), dates[1] or last.date()
+        if start > end:
+            raise BadRequest("start is after end")
+    return FlightFilter(start, end, **{field: tuple(params.get(name, [])) for name, field in FILTER_PARAMS.items()})
+
+
+def kpi_rows(params, backend):
+    return pd.DataFrame([kpis(backend.overview_cells(parse_filter(params, backend)))])
+
+
+def airline_rows(params, backend):
+    return backend.metrics(parse_filter(params, backend), ["airline"])
+
+
+def airport_rows(params, backend):
+    # The airport index is monthly, so the date range is widened to whole months
+    flt = parse_filter(params, backend)
+    side = _one(params, "side", "origin")
+    if side not in SIDES:
+        raise BadRequest(f"side must be one of {list(SIDES)}")
+    try:
+        min_flights = int(_one(params, "min_flights", "1"))
+    except ValueError:
+        raise BadRequest("min_flights must be an integer") from None
+    first, last = (flt.start.year * 100 + flt.start.month, flt.end.year * 100 + flt.end.month) if flt.start else (None, None)
+    metrics = backend.airport_index().metrics(side, ["airport"], first, last, params.get("airport", []))
+    return metrics[metrics["total_flights"] >= min_flights].reset_index(drop=True)
+
+
+def monthly_rows(params, backend):
+    by = params.get("by", [])
+    if set(by) - set(MONTHLY_GROUPS):
+        raise BadRequest(f"by must be among {MONTHLY_GROUPS}")
+    return backend.metrics(parse_filter(params, backend), ["year_month", *by])
+
+
+# Endpoint -> (rows function, accepted query parameters besides "format")
+ENDPOINTS = {
+    "kpis": (kpi_rows, [*DATE_PARAMS, *FILTER_PARAMS]),
+    "airlines": (airline_rows, [*DATE_PARAMS, *FILTER_PARAMS]),
+    "airports": (airport_rows, [*DATE_PARAMS, "airport", "side", "min_flights"]),
+    "monthly": (monthly_rows, [*DATE_PARAMS, *FILTER_PARAMS, "by"]),
+}
+
+
+def encode(frame, fmt, fingerprint):
+    if fmt == "arrow":
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({"dataset": fingerprint})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    rows = frame.to_json(orient="records", date_format="iso")
+    return f'{{"dataset": "{fingerprint}", "rows": {rows}}}'.encode()
+
+
+class ResponseCache:
+    """Bounded LRU of encoded response bodies; the first lookup after the dataset changes empties it."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.fingerprint = None
+        self._entries = OrderedDict()
+
+    def get(self, key, fingerprint):
+        if fingerprint != self.fingerprint:
+            self._entries.clear()
+            self.fingerprint = fingerprint
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        return None
+
+    def put(self, key, body):
+        self._entries[key] = body
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class AggregateHandler(tornado.web.RequestHandler):
+    # Handlers run on the process's single IO loop thread, so the backend and the
+    # response cache are never used concurrently; --processes scales out instead
+    def initialize(self, cache, backend):
+        self.cache = cache
+        self.backend = backend
+        self._etag = None
+
+    def _format(self):
+        fmt = self.get_query_argument("format", None)
+        if fmt is None:
+            return "arrow" if ARROW_TYPE in self.request.headers.get("Accept", "") else "json"
+        if fmt not in ("json", "arrow"):
+            raise BadRequest("format must be json or arrow")
+        return fmt
+
+    def compute_etag(self):
+        return self._etag
+
+    def get(self, endpoint):
+        if endpoint not in ENDPOINTS:
+            raise tornado.web.HTTPError(404)
+        rows, accepted = ENDPOINTS[endpoint]
+        params = {name: [value.decode() for value in values] for name, values in self.request.query_arguments.items()}
+        try:
+            fmt = self._format()
+            params.pop("format", None)
+            unknown = sorted(set(params) - set(accepted))
+            if unknown:
+                raise BadRequest(f"unknown parameters {unknown}; {endpoint} accepts {accepted}")
+        except BadRequest as err:
+            return self._bad_request(err)
+
+        fingerprint = data.load_fingerprint()
+        key = endpoint, tuple(sorted((name, tuple(values)) for name, values in params.items())), fmt
+        self._etag = '"' + hashlib.blake2b(repr((fingerprint, SCHEMA_VERSION, key)).encode(), digest_size=16).hexdigest() + '"'
+        self.set_etag_header()
+        self.set_header("Cache-Control", f"max-age={MAX_AGE}")
+        self.set_header("Vary", "Accept")
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        body = self.cache.get(key, fingerprint)
+        if body is None:
+            try:
+                frame = rows(params, self.backend)
+            except BadRequest as err:
+                return self._bad_request(err)
+            body = encode(frame, fmt, fingerprint)
+            self.cache.put(key, body)
+        self.set_header("Content-Type", ARROW_TYPE if fmt == "arrow" else JSON_TYPE)
+        self.write(body)
+
+    def _bad_request(self, err):
+        self.clear_header("ETag")
+        self.clear_header("Cache-Control")
+        self.set_status(400)
+        self.set_header("Content-Type", JSON_TYPE)
+        self.finish(json.dumps({"error": str(err)}))
+
+
+class IndexHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write({"endpoints": {f"/api/{name}": accepted + ["format"] for name, (_, accepted) in ENDPOINTS.items()}})
+
+
+def api_backend():
+    """The configured backend; pandas gets a bounded row cache of its own instead of a session's."""
+    backend = load_backend()
+    return PandasBackend(rows_cache=OrderedDict()) if backend.name == "pandas" else backend
+
+
+def make_app(cache=None, backend=None):
+    cache = cache or ResponseCache()
+    backend = backend or api_backend()
+    return tornado.web.Application([
+        (r"/api/?", IndexHandler),
+        (r"/api/([a-z]+)", AggregateHandler, {"cache": cache, "backend": backend}),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard's aggregates over HTTP as JSON or Arrow IPC.")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--processes", type=int, default=1, help="server processes sharing the port (0: one per CPU)")
+    args = parser.parse_args(argv)
+
+    # The cached accessors warn about running outside `streamlit run` on every call;
+    # the config is parsed first so it cannot reset the level afterwards
+    import streamlit.config
+    import streamlit.logger
+
+    streamlit.config.get_option("logger.level")
+    streamlit.logger.set_log_level("error")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    sockets = tornado.netutil.bind_sockets(args.port, args.address)
+    if args.processes != 1:
+        # Forked before any data is read (Arrow's thread pools do not survive a fork);
+        # every process then maps the same shared Arrow file of the frame
+        tornado.process.fork_processes(args.processes)
+    server = tornado.httpserver.HTTPServer(make_app())
+    server.add_sockets(sockets)
+    log.info("serving /api on http://%s:%d", args.address, args.port)
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""Pluggable query backends behind the analysis pages.
+
+Pages describe what they want as a ``FlightFilter`` plus group-by keys, and a
+backend answers with small aggregated frames:
+
+* ``PandasBackend`` (default) answers from the shared in-memory frame, its
+  indexes and the overview cube.
+* ``DuckDBBackend`` compiles each request into one SQL query over the local
+  Parquet data, so filters and aggregation run inside DuckDB and only the
+  aggregated rows reach Python; the flights never have to fit in memory.
+
+Set ``FLIGHT_QUERY_BACKEND=duckdb`` to use DuckDB (``pip install duckdb``).
+"""
+
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from flight_dashboard import data, perf
+from flight_dashboard.aggregations import DELAY_THRESHOLD, flight_metrics
+from flight_dashboard.airports import SIDES, AirportIndex
+from flight_dashboard.cube import OverviewCube
+from flight_dashboard.routes import RouteIndex
+from flight_dashboard.sketches import PERCENTILES, SKETCHES, DelaySketches, percentile_column
+from flight_dashboard.sampling import estimate_metrics
+
+log = logging.getLogger(__name__)
+
+QUERY_BACKEND = os.environ.get("FLIGHT_QUERY_BACKEND", "pandas")
+
+
+# Cache of filtered row positions, per session unless the backend is given its own:
+# (index ref, lo, hi, rows or None) per filter
+ROWS_CACHE_KEY = "filtered_rows"
+ROWS_CACHE_ENTRIES = 16
+
+# Columns the overview KPIs and charts are computed from
+OVERVIEW_COLUMNS = ["year", "flight_status", "flights", "delayed"]
+
+
+def label_months(metrics):
+    """``metrics`` with its integer yyyymm ``year_month`` keys shown as "YYYY-MM" labels.
+
+    Rows are grouped on the integer key stored in the data; only the aggregated
+    rows are formatted.
+    """
+    if "year_month" not in metrics.columns:
+        return metrics
+    key = metrics["year_month"].astype("int64")
+    return metrics.assign(year_month=(key // 100).astype(str) + "-" + (key % 100).astype(str).str.zfill(2))
+
+
+@dataclass(frozen=True)
+class FlightFilter:
+    """Sidebar filter state; empty selections mean "all", ``None`` dates mean the whole range."""
+
+    start: object = None
+    end: object = None
+    airlines: tuple = ()
+    origin_cities: tuple = ()
+    dest_cities: tuple = ()
+    statuses: tuple = ()
+    origins: tuple = ()
+
+    def selections(self):
+        """Selected values keyed by the column they filter."""
+        return {
+            "airline": list(self.airlines),
+            "origin_city": list(self.origin_cities),
+            "dest_city": list(self.dest_cities),
+            "flight_status": list(self.statuses),
+            "origin": list(self.origins),
+        }
+
+
+def whole_months(flt):
+    """``flt`` with its dates widened to the first day of the start month and the last day of the end month.
+
+    Delay percentiles are answered over whole months, the resolution of the
+    precomputed sketches, on every backend and code path.
+    """
+    if flt.start is None:
+        return flt
+    start, end = pd.Timestamp(flt.start), pd.Timestamp(flt.end)
+    return replace(flt, start=start.replace(day=1).date(), end=(end + pd.offsets.MonthEnd(0)).date())
+
+
+class PandasBackend:
+    """Answers queries from the shared frame, its date/filter indexes and the overview cube."""
+
+    name = "pandas"
+
+    def __init__(self, rows_cache=None):
+        # Callers outside a Streamlit session (the HTTP API) pass their own dict,
+        # since st.session_state there would be one process-wide store
+        self.rows_cache = rows_cache
+
+    def _window(self, flt):
+        if flt.start is None:
+            return None
+        return data.data_window(flt.start, flt.end)
+
+    def _cube(self, window):
+        with perf.stage("load:cube") as record:
+            cube = data.load_overview_cube(window)
+            record.rows_out = len(cube.cells)
+        return cube
+
+    def _filtered(self, flt):
+        window = self._window(flt)
+        with perf.stage("load") as record:
+            df = data.load_window(window)
+            date_index, filter_index = data.load_window_indexes(window)
+            record.rows_out = len(df)
+
+        # Row positions are kept per session (or in the backend's own cache) and keyed by
+        # the filter values, so every page of the session reuses them; an entry only
+        # counts for the index it came from
+        selections = flt.selections()
+        key = (window, flt.start, flt.end, tuple((column, frozenset(values)) for column, values in selections.items() if values))
+        cache = self.rows_cache if self.rows_cache is not None else st.session_state.setdefault(ROWS_CACHE_KEY, OrderedDict())
+        hit = key in cache and cache[key][0]() is filter_index
+        with perf.stage("filter:cached" if hit else "filter", rows_in=len(df)) as record:
+            if hit:
+                cache.move_to_end(key)
+            else:
+                lo, hi = date_index.bounds(flt.start, flt.end) if flt.start is not None else (0, len(df))
+                cache[key] = weakref.ref(filter_index), lo, hi, filter_index.select(selections, lo, hi)
+                cache.move_to_end(key)
+                while len(cache) > ROWS_CACHE_ENTRIES:
+                    cache.popitem(last=False)
+            _, lo, hi, rows = cache[key]
+            filtered = df.iloc[lo:hi] if rows is None else df.take(rows)
+            record.rows_out = len(filtered)
+        return filtered
+
+    def date_bounds(self):
+        return data.load_date_bounds()
+
+    def options(self, column, start=None, end=None):
+        window = data.data_window(start, end) if start is not None else None
+        if column in OverviewCube.DIMENSIONS:
+            return self._cube(window).options(column)
+        return data.load_window_indexes(window)[1].values(column)
+
+    def metrics(self, flt, by=()):
+        df = self._filtered(flt)
+        with perf.stage(f"aggregate:{','.join(by)}", rows_in=len(df)) as record:
+            metrics = flight_metrics(df, list(by))
+            record.rows_out = len(metrics)
+        return label_months(metrics)
+
+    def overview_cells(self, flt):
+        if flt.origins:
+            cells = self.metrics(flt, ["year", "flight_status"])
+            return cells.rename(columns={"total_flights": "flights", "delayed_flights": "delayed"})[OVERVIEW_COLUMNS]
+        cube = self._cube(self._window(flt))
+        with perf.stage("filter:cube", rows_in=len(cube.cells)) as record:
+            start, end = (flt.start, flt.end) if flt.start is not None else (cube.min_date, cube.max_date)
+            cells = cube.slice(start, end, *(list(v) for v in (flt.airlines, flt.origin_cities, flt.dest_cities, flt.statuses)))
+            record.rows_out = len(cells)
+        return cells
+
+    def delay_percentiles(self, flt, group, delay, by="group"):
+        # Merged from the precomputed sketches, whose dates are whole months; a filter
+        # on any other column is answered by sketching the filtered rows of the same months
+        name = f"{group}_{delay[:3]}"
+        _, _, keys = SKETCHES[name]
+        selected = {column for column, values in flt.selections().items() if values}
+        if selected - {group, *keys}:
+            rows = self._filtered(whole_months(flt))
+            sketches, first, last, flt = DelaySketches.build(rows, [name]), None, None, FlightFilter()
+        else:
+            sketches = data.load_delay_sketches()
+            first, last = (flt.start.year * 100 + flt.start.month, flt.end.year * 100 + flt.end.month) if flt.start is not None else (None, None)
+        with perf.stage(f"sketch:{name}") as record:
+            percentiles = sketches.percentiles(name, by, first, last, flt.selections()[group], flt.statuses)
+            record.rows_out = len(percentiles)
+        return label_months(percentiles)
+
+    def route_index(self):
+        with perf.stage("load:routes") as record:
+            routes = data.load_route_index()
+            record.rows_out = len(routes.cells)
+        return routes
+
+    def airport_index(self):
+        with perf.stage("load:airports") as record:
+            airports = data.load_airport_index()
+            record.rows_out = len(airports.cells)
+        return airports
+
+
+def _sql_string(value):
+    """``value`` as a SQL string literal; DDL such as CREATE VIEW cannot take bound parameters."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class DuckDBBackend:
+    """Compiles each request into one DuckDB query over the local Parquet data.
+
+    Partitioned datasets are scanned with hive partitioning, so the date range
+    also prunes whole fl_year/fl_month directories before any file is opened.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, source=None):
+        import duckdb
+
+        source = source or data.DATA_SOURCE
+        self._partitioned = data.is_partitioned(source)
+        if self._partitioned:
+            files = _sql_string(Path(source) / "fl_year=*" / "fl_month=*" / "*.parquet")
+            scan = f"read_parquet({files}, hive_partitioning = true, hive_types = {{'fl_year': INTEGER, 'fl_month': INTEGER}})"
+        else:
+            # Single-file sources are queried through the typed Parquet cache; the
+            # frame itself is never loaded
+            scan = f"read_parquet({_sql_string(data.build_cache(source))})"
+        self._con = duckdb.connect()
+        self._con.execute(f"CREATE VIEW flights AS SELECT * FROM {scan}")
+        self._routes = None
+        self._routes_lock = threading.Lock()
+        self._airports = None
+        self._airports_lock = threading.Lock()
+
+    def _where(self, flt):
+        clauses, params = [], []
+        if flt.start is not None:
+            clauses.append("fl_date BETWEEN ? AND ?")
+            params += [pd.Timestamp(flt.start), pd.Timestamp(flt.end)]
+            if self._partitioned:
+                clauses.append("fl_year * 100 + fl_month BETWEEN ? AND ?")
+                params += [flt.start.year * 100 + flt.start.month, flt.end.year * 100 + flt.end.month]
+        for column, values in flt.selections().items():
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params += [str(value) for value in values]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _query(self, name, sql, params):
+        # A cursor per query: the connection is shared by every session of the server
+        with perf.stage(f"query:{name}") as record:
+            result = self._con.cursor().execute(sql, params).df()
+            record.rows_out = len(result)
+        return result
+
+    def date_bounds(self):
+        first, last = self._con.cursor().execute("SELECT min(fl_date), max(fl_date) FROM flights").fetchone()
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def options(self, column, start=None, end=None):
+        where, params = self._where(FlightFilter(start, end))
+        rows = self._con.cursor().execute(f"SELECT DISTINCT {column} FROM flights{where} ORDER BY 1", params).fetchall()
+        return [row[0] for row in rows if row[0] is not None]
+
+    def metrics(self, flt, by=()):
+        # Partitions written before year_month was stored still have it in their directory names
+        keys = ["fl_year * 100 + fl_month AS year_month" if key == "year_month" and self._partitioned else key for key in by]
+        where, params = self._where(flt)
+        # Positional, so a derived year_month never binds to a stored column of that name
+        positions = ", ".join(str(i) for i in range(1, len(by) + 1))
+        group = f" GROUP BY {positions} ORDER BY {positions}" if by else ""
+        sql = f"""
+            SELECT {''.join(k + ', ' for k in keys)}
+                count(*) AS total_flights,
+                sum(cancelled)::BIGINT AS cancelled_flights,
+                count(*) FILTER (WHERE dep_delay > {DELAY_THRESHOLD}) AS delayed_flights,
+                coalesce(sum(dep_delay), 0)::DOUBLE AS dep_delay_sum,
+                avg(dep_delay)::DOUBLE AS avg_dep_delay,
+                coalesce(sum(arr_delay), 0)::DOUBLE AS arr_delay_sum,
+                avg(arr_delay)::DOUBLE AS avg_arr_delay,
+                100.0 * sum(cancelled) / count(*) AS cancellation_rate
+            FROM flights{where}{group}"""
+        metrics = self._query(','.join(by), sql, params)
+        return label_months(metrics[metrics["total_flights"] > 0])
+
+    def overview_cells(self, flt):
+        where, params = self._where(flt)
+        return self._query("overview", f"""
+            SELECT year::SMALLINT AS year, flight_status, count(*) AS flights,
+                   count(*) FILTER (WHERE dep_delay > {DELAY_THRESHOLD}) AS delayed
+            FROM flights{where} GROUP BY ALL ORDER BY ALL""", params)
+
+    def delay_percentiles(self, flt, group, delay, by="group"):
+        # Exact nearest-rank percentiles over the same whole months as the pandas
+        # backend's sketches; DuckDB computes them inside the query
+        where, params = self._where(whole_months(flt))
+        where = f"{where} AND {delay} IS NOT NULL" if where else f" WHERE {delay} IS NOT NULL"
+        key = {"group": group, "year_month": "fl_year * 100 + fl_month" if self._partitioned else "year_month", None: None}[by]
+        select, group_by = (f"{key} AS {'year_month' if by == 'year_month' else group}, ", " GROUP BY 1 ORDER BY 1") if key else ("", "")
+        result = self._query(f"percentiles:{group},{delay}", f"""
+            SELECT {select}count(*) AS flights, quantile_disc({delay}, {list(PERCENTILES)}) AS q
+            FROM flights{where}{group_by}""", params)
+        values = pd.DataFrame(result.pop("q").tolist(), columns=[percentile_column(q) for q in PERCENTILES], index=result.index)
+        return label_months(pd.concat([result, values.astype("float64")], axis=1))
+
+    def route_index(self):
+        # Built once from one aggregate query and shared by every session of the server
+        with self._routes_lock:
+            if self._routes is None:
+                year_month = "fl_year * 100 + fl_month" if self._partitioned else "year_month"
+                cells = self._query("routes", f"""
+                    SELECT origin_city, dest_city, {year_month} AS year_month, airline,
+                           count(*)::INTEGER AS flights,
+                           sum(cancelled)::INTEGER AS cancelled,
+                           coalesce(sum(dep_delay), 0)::DOUBLE AS dep_delay_sum,
+                           count(dep_delay)::INTEGER AS dep_delay_count,
+                           coalesce(sum(arr_delay), 0)::DOUBLE AS arr_delay_sum,
+                           count(arr_delay)::INTEGER AS arr_delay_count,
+                           coalesce(sum(distance), 0)::DOUBLE AS distance_sum
+                    FROM flights GROUP BY 1, 2, 3, 4""", [])
+                self._routes = RouteIndex.from_cells(cells)
+        return self._routes
+
+    def airport_index(self):
+        # Built once from one aggregate query per side and shared by every session of the server
+        with self._airports_lock:
+            if self._airports is None:
+                year_month = "fl_year * 100 + fl_month" if self._partitioned else "year_month"
+                sides = [f"""
+                    SELECT {code} AS airport, {city} AS city, '{side}' AS side, {year_month} AS year_month,
+                           count(*)::INTEGER AS flights,
+                           sum(cancelled)::INTEGER AS cancelled,
+                           coalesce(sum(dep_delay), 0)::DOUBLE AS dep_delay_sum,
+                           count(dep_delay)::INTEGER AS dep_delay_count,
+                           coalesce(sum(arr_delay), 0)::DOUBLE AS arr_delay_sum,
+                           count(arr_delay)::INTEGER AS arr_delay_count
+                    FROM flights GROUP BY 1, 2, 3, 4""" for side, (code, city) in SIDES.items()]
+                self._airports = AirportIndex.from_cells(self._query("airports", " UNION ALL ".join(sides), []))
+        return self._airports
+
+
+def estimated_metrics(flt, by=()):
+    """``metrics`` estimated from the stratified sample, with ``*_ci`` 95% half-widths.
+
+    Answered in memory from the small sample for either backend; progressive
+    pages draw these while the exact metrics are computed.
+    """
+    sample = data.load_sample()
+    with perf.stage(f"estimate:{','.join(by)}", rows_in=len(sample)) as record:
+        mask = np.ones(len(sample), dtype=bool)
+        if flt.start is not None:
+            mask &= sample["fl_date"].between(pd.Timestamp(flt.start), pd.Timestamp(flt.end)).to_numpy()
+        for column, values in flt.selections().items():
+            if values:
+                mask &= sample[column].isin(values).to_numpy()
+        metrics = estimate_metrics(sample[mask], list(by))
+        record.rows_out = len(metrics)
+    return label_months(metrics[metrics["sampled_rows"] > 0])
+
+
+@st.cache_resource(show_spinner="Connecting query backend...")
+def load_backend(name=None):
+    """The configured backend, shared by every session; falls back to pandas."""
+    name = name or QUERY_BACKEND
+    if name == "duckdb":
+        try:
+            return DuckDBBackend()
+        except ImportError:
+            log.warning("FLIGHT_QUERY_BACKEND=duckdb but duckdb is not installed; using pandas")
+    return PandasBackend()
@@ -0,0 +1,306 @@
+"""Chart helpers that keep the Plotly payload sent on every rerun small.
+
+Every helper builds its figure from pre-aggregated rows: counts, pie slices and
+histogram bins are computed here in pandas/numpy instead of letting Plotly
+serialize one value per flight. Line and scatter traces are downsampled with
+LTTB above ``MAX_POINTS`` points per figure and switch to WebGL (``scattergl``)
+above ``WEBGL_POINTS`` points in total. ``show`` renders a figure and records
+its serialized size; ``show_cached`` first looks the figure up in a shared LRU
+cache keyed on the page's normalized filter state.
+
+In progressive mode (``FLIGHT_PROGRESSIVE=1`` or ``?progressive=1``)
+``show_progressive`` first draws a figure estimated from the stratified sample,
+with 95% confidence intervals, and ``refine`` later replaces it with the exact
+figure once the full computation has run. Pages call ``begin`` at the start of
+every run, so placeholders left by an interrupted run are never refined.
+"""
+
+import dataclasses
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from flight_dashboard import perf
+from flight_dashboard.data import load_fingerprint
+from flight_dashboard.sampling import SAMPLE_FRACTION
+
+log = logging.getLogger(__name__)
+
+# Points kept per line/scatter figure, shared by its traces; longer traces are
+# downsampled with LTTB, but never below MIN_TRACE_POINTS each
+MAX_POINTS = 2000
+MIN_TRACE_POINTS = 100
+
+# Total points above which line/scatter traces render with WebGL
+WEBGL_POINTS = 1000
+
+# Decimals kept for float columns; more digits only add bytes to the JSON
+FLOAT_DECIMALS = 3
+
+# Built figures kept across reruns and sessions
+FIGURE_CACHE_ENTRIES = 256
+
+# Draw sample estimates before the exact figures (or ?progressive=1 per page view)
+PROGRESSIVE = os.environ.get("FLIGHT_PROGRESSIVE", "") not in ("", "0")
+
+# Estimated figures of this script run still waiting for their exact version
+_pending = threading.local()
+
+
+def lttb(x, y, n_out):
+    """Indices of the ``n_out`` points Largest-Triangle-Three-Buckets keeps from (x, y)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # First and last points are always kept; the rest is split into n_out - 2 buckets,
+    # and each bucket's mean is the third corner of the previous bucket's triangles
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sizes = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / sizes
+    mean_y = np.add.reduceat(np.nan_to_num(y), edges) / sizes
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[keep[i]], y[keep[i]]
+        area = np.abs((ax - mean_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay))
+        keep[i + 1] = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+    return keep
+
+
+def _positions(values):
+    # LTTB needs numeric x: dates as int64, numbers as-is, labels (e.g. "2023-04") by rank
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy().astype(np.int64)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy()
+    return np.arange(len(values))
+
+
+def downsample(frame, x, y, color=None, max_points=MAX_POINTS):
+    """``frame`` reduced to about ``max_points`` points, shared evenly by the ``color`` traces."""
+    if len(frame) <= max_points:
+        return frame
+    groups = [frame] if color is None else [g for _, g in frame.groupby(color, observed=True, sort=False)]
+    per_trace = max(max_points // len(groups), MIN_TRACE_POINTS)
+    parts = []
+    for group in groups:
+        group = group.sort_values(x)
+        parts.append(group.iloc[lttb(_positions(group[x]), group[y].to_numpy(), per_trace)])
+    return pd.concat(parts, ignore_index=True)
+
+
+def compact(frame):
+    """``frame`` with float columns rounded to ``FLOAT_DECIMALS``."""
+    floats = frame.select_dtypes("floating").columns
+    return frame.round({col: FLOAT_DECIMALS for col in floats}) if len(floats) else frame
+
+
+def counts(frame, names, color=None):
+    """Row counts per ``names`` (and ``color``) value, as a ``count`` column."""
+    by = [names] if color is None else [names, color]
+    return frame.groupby(by, observed=True).size().reset_index(name="count")
+
+
+def line(frame, x, y, color=None, **kwargs):
+    frame = compact(downsample(frame, x, y, color))
+    kwargs.setdefault("render_mode", "webgl" if len(frame) > WEBGL_POINTS else "svg")
+    return px.line(frame, x=x, y=y, color=color, **kwargs)
+
+
+def scatter(frame, x, y, color=None, **kwargs):
+    frame = compact(downsample(frame, x, y, color))
+    kwargs.setdefault("render_mode", "webgl" if len(frame) > WEBGL_POINTS else "svg")
+    return px.scatter(frame, x=x, y=y, color=color, **kwargs)
+
+
+def bar(frame, x, y=None, color=None, **kwargs):
+    """Bar chart of ``y``, or of the row count per ``x`` (and ``color``) when ``y`` is None."""
+    if y is None:
+        frame, y = counts(frame, x, color), "count"
+    return px.bar(compact(frame), x=x, y=y, color=color, **kwargs)
+
+
+def pie(frame, names, values=None, **kwargs):
+    """Pie of ``values``, or of the row count per ``names`` when ``values`` is None."""
+    if values is None:
+        frame, values = counts(frame, names), "count"
+    return px.pie(compact(frame), names=names, values=values, **kwargs)
+
+
+def histogram(frame, x, nbins=50, **kwargs):
+    """Histogram of ``x`` binned with numpy, so only the bin counts are sent."""
+    values = frame[x].to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    heights, edges = np.histogram(values, bins=nbins)
+    bins = pd.DataFrame({x: (edges[:-1] + edges[1:]) / 2, "count": heights})
+    fig = px.bar(compact(bins), x=x, y="count", **kwargs)
+    fig.update_traces(width=float(edges[1] - edges[0]) if len(values) else None)
+    return fig.update_layout(bargap=0)
+
+
+def percentile_bars(frame, x, percentiles=("p50", "p90", "p99"), **kwargs):
+    """Grouped bars of the ``percentiles`` columns (e.g. from ``delay_percentiles``) per ``x``."""
+    values = frame.melt(id_vars=x, value_vars=list(percentiles), var_name="percentile", value_name="delay")
+    return bar(values, x=x, y="delay", color="percentile", barmode="group", **kwargs)
+
+
+def percentile_box(frame, x, title=None, color="#0a9396"):
+    """Box per ``x`` drawn from precomputed percentiles: p25-p75 box, p50 line, p10/p90 whiskers."""
+    frame = compact(frame)
+    fig = go.Figure(go.Box(x=frame[x], q1=frame["p25"], median=frame["p50"], q3=frame["p75"],
+                           lowerfence=frame["p10"], upperfence=frame["p90"], marker_color=color, name=""))
+    return fig.update_layout(title=title, template="plotly_white", showlegend=False)
+
+
+def payload_bytes(fig):
+    """Size of the figure JSON that Streamlit sends to the browser."""
+    return len(pio.to_json(fig, validate=False))
+
+
+def show(fig, name=None, size=None, key=None):
+    """Render ``fig`` full width and record its payload size for the diagnostics page."""
+    st.plotly_chart(fig, use_container_width=True, key=key)
+    name = name or fig.layout.title.text or f"chart {len(st.session_state.get('chart_payloads', {})) + 1}"
+    size = size or payload_bytes(fig)
+    st.session_state.setdefault("chart_payloads", {})[name] = size
+    log.debug("chart %r: %d bytes", name, size)
+
+
+def _canonical(value):
+    # Equal filter states must hash equally: selections are order-free, dates are ISO strings
+    if dataclasses.is_dataclass(value):
+        value = dataclasses.asdict(value)
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+def figure_key(name, *state):
+    """Hash of a chart name and the filter state it was built from."""
+    payload = json.dumps([name, _canonical(state)], sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class FigureCache:
+    """Bounded LRU of built figures and their payload sizes, shared by every session.
+
+    Entries belong to one dataset fingerprint; the first lookup after the
+    dataset changes empties the cache.
+    """
+
+    def __init__(self, max_entries=FIGURE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.fingerprint = None
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def has(self, key, fingerprint=None):
+        """Whether ``key`` is cached for the dataset ``fingerprint``."""
+        with self._lock:
+            return fingerprint == self.fingerprint and key in self._entries
+
+    def get(self, key, build, fingerprint=None):
+        """(figure, payload bytes) for ``key``, calling ``build()`` on a miss."""
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                self._entries.clear()
+                self.fingerprint = fingerprint
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        # Built outside the lock so one slow figure does not stall other sessions
+        fig = build()
+        entry = fig, payload_bytes(fig)
+        with self._lock:
+            if fingerprint == self.fingerprint:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+
+@st.cache_resource
+def load_figure_cache():
+    return FigureCache()
+
+
+def show_cached(name, state, build):
+    """Render the figure ``build()`` makes for ``state``, reusing it while the state and dataset are unchanged."""
+    # Timed together: the build on a cache miss and Streamlit's serialization of the figure
+    with perf.stage(f"chart:{name}"):
+        fig, size = load_figure_cache().get(figure_key(name, state), build, load_fingerprint())
+        show(fig, name, size)
+
+
+def progressive_enabled():
+    """Whether this rerun draws estimates first: the server flag or ``?progressive=1`` on the page URL."""
+    return PROGRESSIVE or st.query_params.get("progressive", "") not in ("", "0")
+
+
+def error_bars(frame, column):
+    """``error_y`` keyword for ``column`` when ``frame`` holds its ``_ci`` half-widths (sample estimates)."""
+    return {"error_y": f"{column}_ci"} if f"{column}_ci" in frame.columns else {}
+
+
+def show_progressive(name, state, estimate, build):
+    """Like ``show_cached``, but in progressive mode draw ``estimate()`` now and ``build()`` at ``refine``.
+
+    The estimate is only drawn while the exact figure is not cached yet.
+    """
+    if not progressive_enabled() or load_figure_cache().has(figure_key(name, state), load_fingerprint()):
+        show_cached(name, state, build)
+        return
+    chart, note = st.empty(), st.empty()
+    with perf.stage(f"chart:{name}:estimate"):
+        # Keyed apart from the exact figure, which may come out identical
+        with chart:
+            show(estimate(), name, key=f"{name}:estimate")
+    note.caption(f"Estimated from a {SAMPLE_FRACTION:.0%} stratified sample, with 95% confidence intervals; refining…")
+    if not hasattr(_pending, "charts"):
+        _pending.charts = []
+    _pending.charts.append((chart, note, name, state, build))
+
+
+def begin():
+    """Forget the estimates of an earlier run that stopped before its ``refine``.
+
+    A rerun interrupted by a new widget value never reaches ``refine``; its
+    placeholders belong to elements Streamlit has already discarded.
+    """
+    _pending.charts = []
+
+
+def refine():
+    """Replace the estimated figures drawn so far in this run with their exact versions."""
+    pending, _pending.charts = getattr(_pending, "charts", []), []
+    for chart, note, name, state, build in pending:
+        with chart:
+            show_cached(name, state, build)
+        note.empty()
@@ -0,0 +1,108 @@
+"""Pre-aggregated cube answering the Flight Overview KPIs and charts."""
+
+import numpy as np
+import pandas as pd
+
+from flight_dashboard.aggregations import DELAY_THRESHOLD
+from flight_dashboard.indexes import DateIndex, FilterIndex
+
+
+class OverviewCube:
+    """Flight counts and delay sums keyed by date x airline x origin_city x dest_city x flight_status.
+
+    A coarse rollup without the city dimensions is kept alongside the full cube;
+    it is much smaller and answers every query that does not filter on cities.
+    """
+
+    DIMENSIONS = ["fl_date", "airline", "origin_city", "dest_city", "flight_status"]
+    COARSE_DIMENSIONS = ["fl_date", "airline", "flight_status"]
+
+    def __init__(self, cells, coarse):
+        self.cells = cells
+        self.coarse = coarse
+        self._cells_dates = DateIndex(cells["fl_date"])
+        self._coarse_dates = DateIndex(coarse["fl_date"])
+        self._cells_filters = FilterIndex(cells, self.DIMENSIONS[1:])
+        self._coarse_filters = FilterIndex(coarse, self.COARSE_DIMENSIONS[1:])
+
+    MEASURES = ["flights", "delayed", "dep_delay_sum", "dep_delay_count", "arr_delay_sum", "arr_delay_count"]
+
+    @classmethod
+    def build(cls, df):
+        return cls.from_cells(cls.aggregate(df))
+
+    @classmethod
+    def aggregate(cls, df):
+        """Full-dimension cells of ``df``.
+
+        Cells of disjoint date ranges never overlap, so cells aggregated per
+        partition can simply be concatenated and passed to ``from_cells``.
+        """
+        measures = df[cls.DIMENSIONS + ["dep_delay", "arr_delay"]].assign(
+            delayed=(df["dep_delay"] > DELAY_THRESHOLD).astype(np.int32))
+        return measures.groupby(cls.DIMENSIONS, observed=True).agg(
+            flights=("delayed", "size"),
+            delayed=("delayed", "sum"),
+            dep_delay_sum=("dep_delay", "sum"),
+            dep_delay_count=("dep_delay", "count"),
+            arr_delay_sum=("arr_delay", "sum"),
+            arr_delay_count=("arr_delay", "count"),
+        ).reset_index()
+
+    @classmethod
+    def from_cells(cls, cells):
+        coarse = cells.groupby(cls.COARSE_DIMENSIONS, observed=True)[cls.MEASURES].sum().reset_index()
+        return cls(cls._by_date(cells), cls._by_date(coarse))
+
+    @staticmethod
+    def _by_date(cube):
+        # Cells stay sorted by date so a date range is a contiguous slice
+        cube = cube.sort_values("fl_date", kind="stable", ignore_index=True)
+        cube["year"] = cube["fl_date"].dt.year.astype(np.int16)
+        return cube
+
+    @property
+    def min_date(self):
+        return self._coarse_dates.min_date
+
+    @property
+    def max_date(self):
+        return self._coarse_dates.max_date
+
+    def options(self, column):
+        """Sorted distinct values of a dimension, for the sidebar widgets."""
+        values = self.cells[column]
+        return sorted(values.cat.categories) if isinstance(values.dtype, pd.CategoricalDtype) else sorted(values.unique())
+
+    def slice(self, start, end, airlines=None, origin_cities=None, dest_cities=None, statuses=None):
+        """Cells inside [start, end] matching every non-empty selection."""
+        selections = {"airline": airlines, "flight_status": statuses}
+        if origin_cities or dest_cities:
+            selections.update(origin_city=origin_cities, dest_city=dest_cities)
+            lo, hi = self._cells_dates.bounds(start, end)
+            return self._cells_filters.filter(self.cells, selections, lo, hi)
+
+        lo, hi = self._coarse_dates.bounds(start, end)
+        return self._coarse_filters.filter(self.coarse, selections, lo, hi)
+
+
+def kpis(cells):
+    """Total, delayed, cancelled and on-time flight counts of a cube slice."""
+    total = int(cells["flights"].sum())
+    delayed = int(cells["delayed"].sum())
+    cancelled = int(cells.loc[cells["flight_status"] == "Cancelled", "flights"].sum())
+    return {
+        "total_flights": total,
+        "delayed_flights": delayed,
+        "cancelled_flights": cancelled,
+        "on_time_flights": total - delayed - cancelled,
+    }
+
+
+def flights_by_year(cells):
+    return cells.groupby("year")["flights"].sum().reset_index(name="count")
+
+
+def status_counts(cells):
+    counts = cells.groupby("flight_status", observed=True)["flights"].sum().sort_values(ascending=False)
+    return counts.rename_axis("Status").reset_index(name="Count")
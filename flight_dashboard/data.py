@@ -0,0 +1,350 @@
+"""Shared flight data layer used by every analysis page."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.request import urlopen
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import streamlit as st
+
+from flight_dashboard.airports import AirportIndex
+from flight_dashboard.cube import OverviewCube
+from flight_dashboard.dataset import PartitionedDataset
+from flight_dashboard.indexes import DateIndex, FilterIndex
+from flight_dashboard.routes import RouteIndex
+from flight_dashboard.sampling import combine_samples, stratified_sample
+from flight_dashboard.schema import SCHEMA_VERSION, add_time_keys, apply_schema, memory_report
+from flight_dashboard.shared import map_frame, publish_frame
+from flight_dashboard.sketches import DelaySketches
+
+DATA_URL = "https://www.dropbox.com/scl/fi/cdrfwk27h6sszbqg2k82b/Flight_Canselled_Delay_C.csv?rlkey=0nnticgct444wwqqjk50ctov4&st=aazxpeja&dl=1"
+
+# A URL, a local CSV path or a Parquet dataset directory built by flight_dashboard.etl;
+# a local source lets the app run without network
+DATA_SOURCE = os.environ.get("FLIGHT_DATA_SOURCE", DATA_URL)
+CACHE_DIR = Path(os.environ.get("FLIGHT_DATA_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache"))
+
+# Map the single-file frame from a shared Arrow file, so server processes on one
+# host share one copy of it through the page cache (FLIGHT_SHARED_MEMORY=0 to disable)
+SHARED_MEMORY = os.environ.get("FLIGHT_SHARED_MEMORY", "1") not in ("", "0")
+
+# Columns behind the sidebar multiselect widgets
+FILTER_COLUMNS = ["airline", "origin", "dest", "origin_city", "dest_city", "flight_status"]
+
+
+def _is_url(source):
+    return str(source).startswith(("http://", "https://"))
+
+
+def is_partitioned(source=None):
+    """Whether the source is a year/month partitioned Parquet dataset directory."""
+    source = source or DATA_SOURCE
+    return not _is_url(source) and Path(source).is_dir()
+
+
+def write_atomically(path, write):
+    """Call ``write(tmp)`` on a unique temp file next to ``path``, then move it into place.
+
+    Concurrent writers never share a temp file and readers only ever see a
+    complete ``path``. If ``write`` fails but another process has published
+    ``path`` in the meantime, that copy is kept and the failure is ignored.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    # mkstemp creates the file private to its owner; caches are world-readable like before
+    os.fchmod(fd, 0o644)
+    os.close(fd)
+    try:
+        write(partial)
+        os.replace(partial, path)
+    except OSError:
+        if not path.exists():
+            raise
+    finally:
+        Path(partial).unlink(missing_ok=True)
+
+
+def fetch_source(source):
+    """Return a local path for ``source``, downloading it once if it is a URL."""
+    if not _is_url(source):
+        return Path(source)
+
+    target = CACHE_DIR / "downloads" / f"{hashlib.sha1(source.encode()).hexdigest()[:16]}.csv"
+    if not target.exists():
+        def download(partial):
+            with urlopen(source) as response, open(partial, "wb") as out:
+                shutil.copyfileobj(response, out, length=1 << 20)
+
+        write_atomically(target, download)
+    return target
+
+
+def _file_digest(path, memo):
+    stat = path.stat()
+    entry = memo.get(str(path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["digest"]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    memo[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest.hexdigest()}
+    return digest.hexdigest()
+
+
+def fingerprint(path):
+    """Content hash of a CSV file or a Parquet dataset directory.
+
+    File digests are memoized on size and mtime so warm starts skip re-hashing.
+    """
+    path = Path(path).resolve()
+    memo_file = CACHE_DIR / "fingerprints.json"
+    try:
+        memo = json.loads(memo_file.read_text())
+    except (OSError, ValueError):
+        # Missing or unreadable: the digests are recomputed and the memo rewritten
+        memo = {}
+    known = dict(memo)
+
+    if path.is_dir():
+        digest = hashlib.blake2b(digest_size=16)
+        for part in sorted(path.rglob("*.parquet")):
+            digest.update(f"{part.relative_to(path)}:{_file_digest(part, memo)}\n".encode())
+        result = digest.hexdigest()
+    else:
+        result = _file_digest(path, memo)
+
+    if memo != known:
+        write_atomically(memo_file, lambda partial: Path(partial).write_text(json.dumps(memo, indent=2)))
+    return result
+
+
+def read_raw(source=None):
+    """Read the cleaned flights data without the schema.
+
+    ``source`` is either the cleaned CSV, parsed with the multi-threaded Arrow
+    parser, or a Parquet dataset directory written by ``flight_dashboard.etl``.
+    """
+    source = source or DATA_SOURCE
+    if is_partitioned(source):
+        return PartitionedDataset(source).read()
+    return pd.read_csv(source, parse_dates=["fl_date"], engine="pyarrow")
+
+
+def sort_by_date(df):
+    """Rows in ascending ``fl_date`` order, which every ``DateIndex`` relies on."""
+    if df["fl_date"].is_monotonic_increasing:
+        return df
+    return df.sort_values("fl_date", kind="stable", ignore_index=True)
+
+
+def read_flights(source=None):
+    """Parse the cleaned flights CSV, add the time keys, apply the compact dtype policy and sort by date."""
+    return sort_by_date(apply_schema(add_time_keys(read_raw(source))))
+
+
+def cache_path(source=None):
+    """Path of the typed Parquet cache of ``source``, named after its content and the schema version."""
+    path = fetch_source(source or DATA_SOURCE)
+    return CACHE_DIR / f"flights-{fingerprint(path)}-v{SCHEMA_VERSION}.parquet"
+
+
+def _write_cache(source, cached):
+    raw = add_time_keys(read_raw(fetch_source(source or DATA_SOURCE)))
+    df = sort_by_date(apply_schema(raw))
+    report = memory_report(raw, df)
+    write_atomically(cached.with_suffix(".memory.json"),
+                     lambda partial: report.to_json(partial, orient="records", indent=2))
+    # Processes starting together all build the frame; whichever finishes
+    # last replaces an identical cache file
+    write_atomically(cached, lambda partial: df.to_parquet(partial, index=False))
+    return df
+
+
+def build_cache(source=None):
+    """Path of the typed Parquet cache of ``source``, building it on first use.
+
+    Unlike ``load_flights`` it neither keeps the frame nor publishes the
+    shared Arrow file, for readers that query the Parquet file directly.
+    """
+    cached = cache_path(source)
+    if not cached.exists():
+        _write_cache(source, cached)
+    return cached
+
+
+def load_flights(source=None):
+    """Load the typed frame from the local Parquet cache, building it on first use.
+
+    With ``SHARED_MEMORY`` the frame is published once as a memory-mapped Arrow
+    file next to the cache and every process maps that instead.
+    """
+    cached = cache_path(source)
+    mapped = cached.with_suffix(".arrow")
+    if SHARED_MEMORY and mapped.exists():
+        return map_frame(mapped)
+
+    if cached.exists():
+        df = pd.read_parquet(cached, memory_map=True)
+    else:
+        df = _write_cache(source, cached)
+
+    if SHARED_MEMORY:
+        publish_frame(df, mapped)
+        return map_frame(mapped)
+    return df
+
+
+def load_memory_report(source=None):
+    """Per-column memory report recorded when the Parquet cache was built, or None."""
+    report = cache_path(source).with_suffix(".memory.json")
+    return pd.read_json(report, orient="records") if report.exists() else None
+
+
+# cache_resource hands every page and every session the same frame instead of
+# unpickling a private copy on each rerun the way cache_data does, so callers
+# must treat it as read-only (the mapped frame's arrays are)
+@st.cache_resource(show_spinner="Loading flight data...")
+def load_data():
+    return load_flights()
+
+
+@st.cache_resource(show_spinner="Indexing flight dates...")
+def load_date_index():
+    return DateIndex(load_data()["fl_date"])
+
+
+@st.cache_resource(show_spinner="Indexing filter columns...")
+def load_filter_index():
+    return FilterIndex(load_data(), FILTER_COLUMNS)
+
+
+def _cache_months(path, batch_size=1 << 16):
+    """Rows of the Parquet cache at ``path`` one ``year_month`` at a time.
+
+    The cache is sorted by date, so each month is one run of rows; it is read
+    in batches and never held whole.
+    """
+    pending = []
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        frame = batch.to_pandas()
+        months = frame["year_month"].to_numpy()
+        bounds = [0, *(np.flatnonzero(months[1:] != months[:-1]) + 1), len(frame)]
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if pending and pending[-1]["year_month"].iat[0] != months[lo]:
+                yield pd.concat(pending, ignore_index=True)
+                pending = []
+            pending.append(frame.iloc[lo:hi])
+    if pending:
+        yield pd.concat(pending, ignore_index=True)
+
+
+@st.cache_resource(show_spinner="Sampling flight data...")
+def load_sample():
+    """Stratified sample of the whole dataset behind the progressive estimates.
+
+    It is stored next to the Parquet cache, so a new process reads the small
+    sample instead of waiting for the full frame before its first render. The
+    data is sampled one month at a time, from the partitions of a partitioned
+    dataset or from the Parquet cache of a single file, without loading it whole.
+    """
+    path = CACHE_DIR / f"sample-{load_fingerprint()}-v{SCHEMA_VERSION}.parquet"
+    if path.exists():
+        return pd.read_parquet(path)
+    # Strata are airline x month, so every month holds whole strata
+    if is_partitioned():
+        dataset = PartitionedDataset(DATA_SOURCE)
+        months = (apply_schema(add_time_keys(dataset.read(month, month))) for month in dataset.partitions())
+    else:
+        months = _cache_months(build_cache())
+    sample = combine_samples(stratified_sample(rows, seed=int(rows["year_month"].iat[0])) for rows in months)
+    write_atomically(path, lambda partial: sample.to_parquet(partial, index=False))
+    return sample
+
+
+@st.cache_resource(ttl=60, show_spinner=False)
+def load_fingerprint():
+    """Fingerprint of the configured dataset, re-checked at most once a minute."""
+    return fingerprint(fetch_source(DATA_SOURCE))
+
+
+def data_window(start, end):
+    """Cache key naming the partitions a date range needs.
+
+    Partitioned sources are loaded month-window by month-window so a narrow
+    date range only reads its own partitions; a single-file source always
+    maps to the one shared frame (``None``).
+    """
+    if not is_partitioned():
+        return None
+    return (start.year, start.month), (end.year, end.month)
+
+
+@st.cache_resource(show_spinner="Reading flight dates...")
+def load_date_bounds():
+    """First and last flight date, without loading a partitioned dataset's rows."""
+    if is_partitioned():
+        return PartitionedDataset(DATA_SOURCE).date_bounds()
+    date_index = load_date_index()
+    return date_index.min_date, date_index.max_date
+
+
+@st.cache_resource(max_entries=4, show_spinner="Loading flight data...")
+def load_window(window):
+    """Rows of the partitions in ``window``, or the shared frame for a single-file source."""
+    if window is None:
+        return load_data()
+    return sort_by_date(apply_schema(add_time_keys(PartitionedDataset(DATA_SOURCE).read(*window))))
+
+
+@st.cache_resource(max_entries=4, show_spinner="Indexing flight data...")
+def load_window_indexes(window):
+    """(DateIndex, FilterIndex) over ``load_window(window)``."""
+    if window is None:
+        return load_date_index(), load_filter_index()
+    df = load_window(window)
+    return DateIndex(df["fl_date"]), FilterIndex(df, FILTER_COLUMNS)
+
+
+@st.cache_resource(max_entries=4, show_spinner="Building overview cube...")
+def load_overview_cube(window=None):
+    """Overview cube of ``window``; partitioned sources assemble it from stored per-partition cells."""
+    if window is None:
+        return OverviewCube.build(load_data())
+    return OverviewCube.from_cells(PartitionedDataset(DATA_SOURCE).read_aggregates(*window))
+
+
+@st.cache_resource(show_spinner="Indexing flight routes...")
+def load_route_index():
+    """Route index of the whole dataset; partitioned sources are aggregated one partition at a time."""
+    if not is_partitioned():
+        return RouteIndex.build(load_data())
+    dataset = PartitionedDataset(DATA_SOURCE)
+    cells = [RouteIndex.aggregate(apply_schema(add_time_keys(dataset.read(month, month)))) for month in dataset.partitions()]
+    return RouteIndex.from_cells(pd.concat(cells, ignore_index=True))
+
+
+@st.cache_resource(show_spinner="Indexing airports...")
+def load_airport_index():
+    """Airport index of the whole dataset; partitioned sources are aggregated one partition at a time."""
+    if not is_partitioned():
+        return AirportIndex.build(load_data())
+    dataset = PartitionedDataset(DATA_SOURCE)
+    cells = [AirportIndex.aggregate(apply_schema(add_time_keys(dataset.read(month, month)))) for month in dataset.partitions()]
+    return AirportIndex.from_cells(pd.concat(cells, ignore_index=True))
+
+
+@st.cache_resource(show_spinner="Sketching delay percentiles...")
+def load_delay_sketches():
+    """Delay sketches of the whole dataset; partitioned sources merge the ones stored per partition."""
+    if is_partitioned():
+        return PartitionedDataset(DATA_SOURCE).read_sketches()
+    return DelaySketches.build(load_data())
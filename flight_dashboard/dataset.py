@@ -0,0 +1,116 @@
+"""Flights stored as year/month partitioned Parquet, with per-partition cube cells and delay sketches."""
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from flight_dashboard.cube import OverviewCube
+from flight_dashboard.schema import add_time_keys, apply_schema
+from flight_dashboard.sketches import SKETCHES, DelaySketches
+
+# Partition directories; named so they never collide with the data's own year/month columns
+PARTITION_KEYS = ("fl_year", "fl_month")
+AGGREGATES_DIR = "_aggregates"
+
+
+def partition_dir(root, year, month):
+    return Path(root) / f"{PARTITION_KEYS[0]}={year}" / f"{PARTITION_KEYS[1]}={month:02d}"
+
+
+def write_frame(df, path):
+    """Write ``df`` as Parquet with int32 dictionary indices.
+
+    pandas picks int8 or int16 category codes depending on how many values a
+    chunk happens to contain; widening them keeps every part file on the same
+    Arrow schema so any set of files can be read back as one table.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fields = [pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type)) if pa.types.is_dictionary(f.type) else f
+              for f in table.schema]
+    pq.write_table(table.cast(pa.schema(fields, metadata=table.schema.metadata)), path)
+
+
+class PartitionedDataset:
+    """A dataset directory laid out as ``fl_year=YYYY/fl_month=MM/*.parquet``.
+
+    Reads only touch the partitions that overlap the requested months, and the
+    overview cube cells and delay sketches of every partition are kept under
+    ``_aggregates`` so they can be refreshed one partition at a time.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def partitions(self):
+        """Sorted (year, month) pairs present in the dataset."""
+        found = []
+        for month_dir in self.root.glob(f"{PARTITION_KEYS[0]}=*/{PARTITION_KEYS[1]}=*"):
+            year = int(month_dir.parent.name.split("=")[1])
+            found.append((year, int(month_dir.name.split("=")[1])))
+        return sorted(found)
+
+    def _files(self, root, first=None, last=None, pattern="*.parquet"):
+        files = []
+        for partition in self.partitions():
+            if (first is None or partition >= first) and (last is None or partition <= last):
+                files.extend(sorted(partition_dir(root, *partition).glob(pattern)))
+        return files
+
+    def _read(self, files, columns=None):
+        return ds.dataset(files, format="parquet").to_table(columns=columns).to_pandas()
+
+    def read(self, first=None, last=None):
+        """Rows of the partitions between the (year, month) pairs ``first`` and ``last`` inclusive.
+
+        A range without partitions gives no rows but still every column, typed
+        like the stored ones.
+        """
+        files = self._files(self.root, first, last)
+        if not files:
+            return pq.read_schema(self._any_file()).empty_table().to_pandas()
+        return self._read(files)
+
+    def _any_file(self):
+        files = self._files(self.root)
+        if not files:
+            raise ValueError(f"no flights in {self.root}: expected {PARTITION_KEYS[0]}=YYYY/{PARTITION_KEYS[1]}=MM/*.parquet")
+        return files[0]
+
+    def date_bounds(self):
+        """First and last flight date, read from the first and last partitions only."""
+        self._any_file()
+        first, last = self.partitions()[0], self.partitions()[-1]
+        head = self._read(self._files(self.root, first, first), columns=["fl_date"])["fl_date"]
+        tail = self._read(self._files(self.root, last, last), columns=["fl_date"])["fl_date"]
+        return head.min(), tail.max()
+
+    def write_aggregates(self, partitions):
+        """Recompute the cube cells and delay sketches of ``partitions`` from their rows."""
+        for year, month in partitions:
+            df = apply_schema(add_time_keys(self.read((year, month), (year, month))))
+            target = partition_dir(self.root / AGGREGATES_DIR, year, month)
+            target.mkdir(parents=True, exist_ok=True)
+            write_frame(OverviewCube.aggregate(df), target / "cube.parquet")
+            for name, cells in DelaySketches.aggregate(df).items():
+                write_frame(cells, target / f"sketch-{name}.parquet")
+
+    def read_aggregates(self, first=None, last=None):
+        """Cube cells of the partitions between ``first`` and ``last`` inclusive."""
+        return self._read(self._files(self.root / AGGREGATES_DIR, first, last, "cube.parquet"))
+
+    def read_sketches(self):
+        """Delay sketches of every partition, merged.
+
+        Partitions written before the sketches existed are sketched from their rows.
+        """
+        parts = []
+        for year, month in self.partitions():
+            stored = partition_dir(self.root / AGGREGATES_DIR, year, month)
+            if all((stored / f"sketch-{name}.parquet").exists() for name in SKETCHES):
+                parts.append({name: pd.read_parquet(stored / f"sketch-{name}.parquet") for name in SKETCHES})
+            else:
+                parts.append(DelaySketches.aggregate(apply_schema(add_time_keys(self.read((year, month), (year, month))))))
+        return DelaySketches.from_cells(parts)
@@ -0,0 +1,91 @@
+"""Sidebar filters shared by the analysis pages.
+
+The selection lives in ``st.session_state`` as one ``FlightFilter``, so moving
+from one page to another keeps the date range and the selected values. Each
+page renders only the widgets it needs: a widget starts from the shared value
+and writes its changes back, and the page gets a ``FlightFilter`` holding just
+the fields it shows.
+"""
+
+import dataclasses
+
+import streamlit as st
+
+from flight_dashboard.backends import FlightFilter
+
+# Session key of the shared FlightFilter
+FILTER_KEY = "flight_filter"
+
+# FlightFilter field -> (widget label, column the options come from)
+FIELDS = {
+    "airlines": ("Select Airline(s):", "airline"),
+    "origin_cities": ("Select Origin City:", "origin_city"),
+    "dest_cities": ("Select Destination City:", "dest_city"),
+    "statuses": ("Select Flight Status:", "flight_status"),
+    "origins": ("Select Airports (code or city)", "origin"),
+}
+
+
+def current():
+    """The shared filter state of this session."""
+    return st.session_state.get(FILTER_KEY, FlightFilter())
+
+
+def _update(**changes):
+    st.session_state[FILTER_KEY] = dataclasses.replace(current(), **changes)
+
+
+def _seed(key, value):
+    # Widget state is dropped when a page without the widget runs, so every
+    # widget is seeded from the shared filter whenever its own state is missing
+    if key not in st.session_state:
+        st.session_state[key] = value
+
+
+def date_range(backend):
+    """Date range widget bounded by the data; returns (start, end) as dates."""
+    first, last = backend.date_bounds()
+    min_date, max_date = first.date(), last.date()
+    shared = current()
+    start = min(max(shared.start or min_date, min_date), max_date)
+    end = max(min(shared.end or max_date, max_date), start)
+    _seed("filter_dates", (start, end))
+
+    picked = st.sidebar.date_input("📅 Select Date Range:", min_value=min_date, max_value=max_date, key="filter_dates")
+    # While only the first day of a new range is picked, keep the previous range
+    if len(picked) == 2:
+        start, end = picked
+    _update(start=start, end=end)
+    return start, end
+
+
+def multiselect(backend, field, start=None, end=None, options=None, format_func=str):
+    """Multiselect for a FlightFilter ``field``; options default to the backend's values in the date range.
+
+    The widget's search box matches what ``format_func`` shows for each option.
+    """
+    label, column = FIELDS[field]
+    if options is None:
+        options = backend.options(column, start, end)
+    key = f"filter_{field}"
+    # Values outside the options (e.g. after the date range changed) are dropped
+    allowed = set(options)
+    if key in st.session_state:
+        st.session_state[key] = [value for value in st.session_state[key] if value in allowed]
+    _seed(key, [value for value in getattr(current(), field) if value in allowed])
+
+    values = st.sidebar.multiselect(label, options=options, format_func=format_func, key=key)
+    _update(**{field: tuple(values)})
+    return tuple(values)
+
+
+def sidebar_filters(backend, fields, dates=True, options=None, labels=None):
+    """Render the date range (if ``dates``) and a multiselect per field; returns the page's FlightFilter.
+
+    ``options`` and ``labels`` optionally give a field its option list and a
+    function that labels each option.
+    """
+    options, labels = options or {}, labels or {}
+    start, end = date_range(backend) if dates else (None, None)
+    selected = {field: multiselect(backend, field, start, end, options.get(field), labels.get(field, str)) for field in fields}
+    return FlightFilter(start, end, **selected)
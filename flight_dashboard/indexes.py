@@ -0,0 +1,114 @@
+"""Load-time indexes that let the pages filter without scanning every row."""
+
+import numpy as np
+import pandas as pd
+
+
+class DateIndex:
+    """Binary-search index over a frame sorted by ``fl_date``.
+
+    A date range becomes two ``searchsorted`` lookups and a positional slice,
+    which shares memory with the indexed frame instead of copying it.
+    """
+
+    def __init__(self, dates):
+        self._dates = pd.Series(dates).to_numpy()
+        if not (self._dates[1:] >= self._dates[:-1]).all():
+            raise ValueError("DateIndex needs the dates sorted in ascending order")
+
+    @property
+    def min_date(self):
+        return pd.Timestamp(self._dates[0])
+
+    @property
+    def max_date(self):
+        return pd.Timestamp(self._dates[-1])
+
+    def bounds(self, start, end):
+        """Row positions [lo, hi) of the dates between ``start`` and ``end`` inclusive."""
+        lo = self._dates.searchsorted(np.datetime64(pd.Timestamp(start)), side="left")
+        hi = self._dates.searchsorted(np.datetime64(pd.Timestamp(end)), side="right")
+        return int(lo), int(hi)
+
+    def slice(self, df, start, end):
+        lo, hi = self.bounds(start, end)
+        return df.iloc[lo:hi]
+
+
+# Columns with at most this many values keep one packed bitmap per value. Wider
+# columns keep a sorted row-id list per value instead (the "array container" of
+# a roaring bitmap), so memory stays one int32 per row however many cities there are.
+DENSE_CARDINALITY = 64
+
+
+class _BitmapColumn:
+    def __init__(self, codes, n_values):
+        self.n_rows = len(codes)
+        self.bitmaps = np.stack([np.packbits(codes == code) for code in range(n_values)]) if n_values else None
+
+    def mask(self, codes, lo, hi):
+        if not codes:
+            return np.zeros(hi - lo, dtype=bool)
+        first, last = lo // 8, -(-hi // 8)
+        bits = np.bitwise_or.reduce(self.bitmaps[codes, first:last], axis=0)
+        return np.unpackbits(bits)[lo - first * 8:hi - first * 8].view(bool)
+
+
+class _PostingColumn:
+    def __init__(self, codes, n_values):
+        self.rows = np.argsort(codes, kind="stable").astype(np.int32)
+        self.offsets = np.searchsorted(codes[self.rows], np.arange(n_values + 1))
+
+    def mask(self, codes, lo, hi):
+        mask = np.zeros(hi - lo, dtype=bool)
+        for code in codes:
+            rows = self.rows[self.offsets[code]:self.offsets[code + 1]]
+            rows = rows[rows.searchsorted(lo):rows.searchsorted(hi)]
+            mask[rows - lo] = True
+        return mask
+
+
+class FilterIndex:
+    """Per-value row sets for the sidebar multiselect columns.
+
+    A filter combination is an OR over the selected values of each column, an
+    AND across columns and a single final gather, instead of one ``isin`` scan
+    and one intermediate frame per widget.
+    """
+
+    def __init__(self, df, columns):
+        self.n_rows = len(df)
+        self._lookup = {}
+        self._columns = {}
+        for col in columns:
+            values = df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype("category")
+            codes = values.cat.codes.to_numpy()
+            n_values = len(values.cat.categories)
+            self._lookup[col] = {value: code for code, value in enumerate(values.cat.categories)}
+            column_cls = _BitmapColumn if n_values <= DENSE_CARDINALITY else _PostingColumn
+            self._columns[col] = column_cls(codes, n_values)
+
+    def values(self, column):
+        """Sorted distinct values of an indexed column, for the sidebar widgets."""
+        return sorted(self._lookup[column])
+
+    def select(self, selections, lo=0, hi=None):
+        """Sorted row positions in [lo, hi) matching every non-empty selection.
+
+        Returns None when no selection is active, meaning every row in the range.
+        """
+        hi = self.n_rows if hi is None else hi
+        mask = None
+        for col, values in selections.items():
+            if not values:
+                continue
+            lookup = self._lookup[col]
+            codes = [lookup[value] for value in values if value in lookup]
+            column_mask = self._columns[col].mask(codes, lo, hi)
+            mask = column_mask if mask is None else np.logical_and(mask, column_mask, out=mask)
+        return None if mask is None else np.flatnonzero(mask) + lo
+
+    def filter(self, df, selections, lo=0, hi=None):
+        """Rows of ``df`` (the indexed frame) in [lo, hi) matching ``selections``."""
+        rows = self.select(selections, lo, hi)
+        return df.iloc[lo:hi] if rows is None else df.take(rows)
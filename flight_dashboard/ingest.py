@@ -0,0 +1,63 @@
+"""Incremental ingestion of new raw months into a partitioned flights dataset.
+
+Only the year/month partitions present in the new file are touched: they are
+replaced (or, with ``--append``, extended) and their cube cells are
+recomputed, while every other partition and its aggregates stay as they are.
+
+    python -m flight_dashboard.ingest flights_2024_01.csv data/flights
+"""
+
+import argparse
+import shutil
+import time
+from pathlib import Path
+
+from flight_dashboard import etl
+from flight_dashboard.dataset import PartitionedDataset, partition_dir
+
+
+def ingest(source, root, chunk_rows, append=False):
+    """Clean ``source`` and merge its partitions into ``root``; returns (rows, partitions)."""
+    root = Path(root)
+    stamp = time.strftime("%Y%m%d%H%M%S")
+    staging = root / f".staging-{stamp}"
+    try:
+        rows, partitions = etl.run(source, staging, chunk_rows, part_prefix=f"part-{stamp}")
+        for year, month in partitions:
+            staged, target = partition_dir(staging, year, month), partition_dir(root, year, month)
+            if append and target.exists():
+                for part in staged.iterdir():
+                    part.rename(target / part.name)
+            else:
+                # Swap the whole partition in with renames so readers never see it half-written
+                target.parent.mkdir(parents=True, exist_ok=True)
+                retired = target.with_name(f".{target.name}-{stamp}")
+                if target.exists():
+                    target.rename(retired)
+                staged.rename(target)
+                shutil.rmtree(retired, ignore_errors=True)
+        PartitionedDataset(root).write_aggregates(partitions)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return rows, partitions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add or replace months of a partitioned flights dataset from a raw BTS CSV.")
+    parser.add_argument("source", help="raw flights CSV holding the new months (path or URL)")
+    parser.add_argument("root", help="dataset directory built by flight_dashboard.etl")
+    parser.add_argument("--append", action="store_true", help="add rows to existing partitions instead of replacing them")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--memory-mb", type=int, default=512, help="approximate peak memory for the cleaning step")
+    size.add_argument("--chunk-rows", type=int, help="rows per chunk (overrides --memory-mb)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows, partitions = ingest(args.source, args.root, args.chunk_rows or etl.chunk_rows_for(args.memory_mb), args.append)
+    months = ", ".join(f"{year}-{month:02d}" for year, month in partitions)
+    print(f"{rows:,} rows {'appended to' if args.append else 'written to'} {len(partitions)} partitions "
+          f"({months}) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
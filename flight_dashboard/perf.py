@@ -0,0 +1,197 @@
+"""Opt-in per-rerun timing of the load, filter, aggregate and chart stages.
+
+Enable with ``FLIGHT_PERF=1`` for every session, or per browser tab with the
+``?perf=1`` query parameter. Each page calls ``start(page)`` first and
+``report()`` last, and wraps each fragment's body in ``fragment(name)``, so
+reruns of just that fragment are timed and reported too. The data layer and
+chart helpers wrap their work in ``stage(name)``, which records wall time,
+rows in/out and the peak memory growth. Timings from the current rerun are
+listed in a sidebar "perf" expander, logged at INFO as one JSON line per stage
+on the ``flight_dashboard.perf`` logger, and summed per page and stage in a
+Prometheus text exposition. Handlers are left to the entry point
+(``python -m flight_dashboard.warmup --serve`` logs INFO to stderr). Set
+``FLIGHT_PERF_PROM_FILE`` to have the exposition written for node_exporter's
+textfile collector.
+
+Peak memory comes from ``tracemalloc`` when it is tracing (``PYTHONTRACEMALLOC=1``)
+and otherwise from the growth of the process's peak RSS. The RSS figure is free
+but only moves when a stage pushes the process past its previous peak.
+"""
+
+import json
+import logging
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import streamlit as st
+
+from flight_dashboard.data import write_atomically
+
+log = logging.getLogger(__name__)
+
+PERF_ENABLED = os.environ.get("FLIGHT_PERF", "") not in ("", "0")
+PROM_FILE = os.environ.get("FLIGHT_PERF_PROM_FILE")
+
+_current = threading.local()
+
+
+@dataclass
+class Stage:
+    page: str
+    name: str
+    ms: float = 0.0
+    rows_in: int = None
+    rows_out: int = None
+    peak_mb: float = 0.0
+
+
+def _peak_bytes():
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PerfRegistry:
+    """Process-wide totals per (page, stage), rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = defaultdict(int)
+        self._seconds = defaultdict(float)
+        self._peak = defaultdict(float)
+        self._rows = {}
+
+    def observe(self, stage):
+        key = stage.page, stage.name
+        with self._lock:
+            self._count[key] += 1
+            self._seconds[key] += stage.ms / 1000
+            self._peak[key] = max(self._peak[key], stage.peak_mb * 2**20)
+            if stage.rows_out is not None:
+                self._rows[key] = stage.rows_out
+
+    def seconds(self, page, name):
+        """Total wall time recorded for one stage of ``page``."""
+        with self._lock:
+            return self._seconds.get((page, name), 0.0)
+
+    def prometheus(self):
+        def series(metric, values):
+            return [f'{metric}{{page="{page}",stage="{name}"}} {value:g}' for (page, name), value in sorted(values.items())]
+
+        with self._lock:
+            lines = [
+                "# HELP flight_dashboard_stage_seconds Wall time spent in each page stage.",
+                "# TYPE flight_dashboard_stage_seconds summary",
+                *series("flight_dashboard_stage_seconds_sum", self._seconds),
+                *series("flight_dashboard_stage_seconds_count", self._count),
+                "# HELP flight_dashboard_stage_peak_bytes Largest peak memory growth seen in a stage.",
+                "# TYPE flight_dashboard_stage_peak_bytes gauge",
+                *series("flight_dashboard_stage_peak_bytes", self._peak),
+                "# HELP flight_dashboard_stage_rows_out Rows produced by the last run of a stage.",
+                "# TYPE flight_dashboard_stage_rows_out gauge",
+                *series("flight_dashboard_stage_rows_out", self._rows),
+            ]
+        return "\n".join(lines) + "\n"
+
+
+@st.cache_resource
+def load_registry():
+    return PerfRegistry()
+
+
+def enabled():
+    """Whether this rerun is being timed: the server flag or ``?perf=1`` on the page URL."""
+    return PERF_ENABLED or st.query_params.get("perf", "") not in ("", "0")
+
+
+# Session key of the page last started, which fragment reruns report under
+PAGE_KEY = "perf_page"
+
+
+def start(page):
+    """Begin timing a rerun of ``page``; stages are only recorded while it is enabled."""
+    st.session_state[PAGE_KEY] = page
+    _current.page = page if enabled() else None
+    _current.stages = []
+
+
+@contextmanager
+def _timed(page, name, rows_in):
+    record = Stage(page, name, rows_in=rows_in)
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    else:
+        base = _peak_bytes()
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.ms = (time.perf_counter() - started) * 1000
+        record.peak_mb = max(_peak_bytes() - base, 0) / 2**20
+        _current.stages.append(record)
+
+
+def stage(name, rows_in=None):
+    """Context manager timing one stage; set ``.rows_out`` on the yielded record.
+
+    Outside a timed rerun it yields a throwaway record and measures nothing.
+    """
+    page = getattr(_current, "page", None)
+    if page is None:
+        return nullcontext(Stage("", name))
+    return _timed(page, name, rows_in)
+
+
+@contextmanager
+def fragment(name):
+    """Time the body of an ``st.fragment`` as the stage ``fragment:<name>``.
+
+    Within a full page run it is one more stage of the page. A rerun of only
+    the fragment runs neither the page's ``start`` nor its ``report``, so it
+    gets its own timing scope under the session's page, reported in the
+    fragment's body since fragments cannot write to the sidebar.
+    """
+    if getattr(_current, "page", None) is not None:
+        with stage(f"fragment:{name}") as record:
+            yield record
+        return
+    start(st.session_state.get(PAGE_KEY, "unknown"))
+    try:
+        with stage(f"fragment:{name}") as record:
+            yield record
+    finally:
+        report(st.container())
+
+
+def report(panel=None):
+    """Publish the stages of this rerun: perf expander (in the sidebar or ``panel``), log lines and Prometheus totals."""
+    page, stages = getattr(_current, "page", None), getattr(_current, "stages", [])
+    if page is None:
+        return
+    registry = load_registry()
+    for record in stages:
+        registry.observe(record)
+        log.info(json.dumps(asdict(record)))
+    if PROM_FILE:
+        # Sessions report concurrently; each writes its own temp file and replaces the file whole
+        text = registry.prometheus()
+        write_atomically(PROM_FILE, lambda partial: Path(partial).write_text(text))
+
+    with (panel or st.sidebar).expander("⏱️ perf", expanded=False):
+        if stages:
+            total = sum(record.ms for record in stages)
+            st.caption(f"{len(stages)} stages, {total:,.1f} ms in total this rerun")
+            st.dataframe([asdict(record) | {"ms": round(record.ms, 2), "peak_mb": round(record.peak_mb, 1)} for record in stages],
+                         column_order=["name", "ms", "rows_in", "rows_out", "peak_mb"], hide_index=True, use_container_width=True)
+        st.code(registry.prometheus(), language="text")
+    _current.page = None
@@ -0,0 +1,171 @@
+"""Route index behind the Route Analysis page.
+
+Every origin city -> destination city pair gets a compact integer route id
+when the data is loaded. Flights are pre-aggregated per route x month x
+airline. Rankings, searches and drill-downs then sum those cells with
+``np.bincount`` instead of grouping the flights on two string columns.
+"""
+
+import numpy as np
+import pandas as pd
+
+from flight_dashboard.aggregations import _group_ids, _key_columns
+
+# Route label separator, e.g. "Chicago, IL → New York, NY"
+ARROW = " → "
+
+
+class RouteIndex:
+    """Flights, cancellations, delay and distance sums keyed by route id x month x airline.
+
+    ``routes`` maps each route id (its row position) to its cities and label.
+    ``cells`` stays sorted by ``year_month``, so a month range is a contiguous
+    slice, and the cell positions of every route are kept as well, so a route
+    drill-down only touches that route's cells.
+    """
+
+    KEYS = ["origin_city", "dest_city", "year_month", "airline"]
+    MEASURES = ["flights", "cancelled", "dep_delay_sum", "dep_delay_count", "arr_delay_sum", "arr_delay_count", "distance_sum"]
+
+    def __init__(self, routes, cells):
+        self.routes = routes
+        self.cells = cells
+        # Integer codes of the three keys, from which group ids are computed directly
+        self.months, month_codes = np.unique(cells["year_month"].to_numpy(), return_inverse=True)
+        self._codes = {
+            "route_id": (cells["route_id"].to_numpy(), len(routes)),
+            "year_month": (month_codes.astype(np.int16), len(self.months)),
+            "airline": (cells["airline"].cat.codes.to_numpy(), len(cells["airline"].cat.categories)),
+        }
+        self._measures = {name: cells[name].to_numpy(dtype=np.float64) for name in self.MEASURES}
+        # Cell positions of each route, in month order: route r owns _by_route[_route_starts[r]:_route_starts[r + 1]]
+        self._by_route = np.argsort(cells["route_id"].to_numpy(), kind="stable")
+        self._route_starts = np.concatenate([[0], np.cumsum(np.bincount(cells["route_id"], minlength=len(routes)))])
+
+    @classmethod
+    def build(cls, df):
+        return cls.from_cells(cls.aggregate(df))
+
+    @classmethod
+    def aggregate(cls, df):
+        """Cells of ``df`` keyed by ``KEYS``.
+
+        Cells of disjoint months never overlap, so cells aggregated per
+        partition can simply be concatenated and passed to ``from_cells``.
+        """
+        def values(col):
+            return df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        dep_delay, arr_delay, distance = values("dep_delay"), values("arr_delay"), values("distance")
+        measures = {
+            "flights": np.ones(len(df)),
+            "cancelled": df["cancelled"].to_numpy(dtype=np.float64),
+            "dep_delay_sum": np.nan_to_num(dep_delay),
+            "dep_delay_count": ~np.isnan(dep_delay),
+            "arr_delay_sum": np.nan_to_num(arr_delay),
+            "arr_delay_count": ~np.isnan(arr_delay),
+            "distance_sum": np.nan_to_num(distance),
+        }
+        ids, valid, levels = _group_ids(df, cls.KEYS)
+        groups, ids = np.unique(ids, return_inverse=True)
+        sums = {name: np.bincount(ids, weights=values[valid], minlength=len(groups)) for name, values in measures.items()}
+        keys = _key_columns(groups, cls.KEYS, levels, df)
+        counts = {name: sums[name].astype(np.int32) for name in ["flights", "cancelled", "dep_delay_count", "arr_delay_count"]}
+        return pd.DataFrame({**keys, **sums, **counts})[cls.KEYS + cls.MEASURES]
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Index over ``cells``, numbering the city pairs they contain."""
+        cells = cells.dropna(subset=["origin_city", "dest_city", "airline"])
+        cells = cells.astype({col: "category" for col in ["origin_city", "dest_city", "airline"]})
+        ids, _, levels = _group_ids(cells, ["origin_city", "dest_city"])
+        pairs, route_ids = np.unique(ids, return_inverse=True)
+
+        routes = pd.DataFrame(_key_columns(pairs, ["origin_city", "dest_city"], levels, cells))
+        routes["route"] = routes["origin_city"].astype(str) + ARROW + routes["dest_city"].astype(str)
+        indexed = pd.DataFrame({
+            "route_id": route_ids.astype(np.int32),
+            "year_month": cells["year_month"].to_numpy(dtype=np.int32),
+            "airline": cells["airline"].array,
+            **{name: cells[name].to_numpy() for name in cls.MEASURES},
+        })
+        return cls(routes, indexed.sort_values("year_month", kind="stable", ignore_index=True))
+
+    @property
+    def airlines(self):
+        return sorted(self.cells["airline"].cat.categories)
+
+    def search(self, text):
+        """Route ids whose origin or destination city contains ``text`` (case-insensitive)."""
+        # Matched against the few hundred city names, then mapped to routes through their codes
+        hit = np.zeros(len(self.routes), dtype=bool)
+        for col in ["origin_city", "dest_city"]:
+            cities = self.routes[col]
+            matches = np.append(cities.cat.categories.str.contains(text, case=False, regex=False), False)
+            hit |= matches[cities.cat.codes.to_numpy()]
+        return np.flatnonzero(hit)
+
+    def metrics(self, by=("route_id",), first=None, last=None, airlines=(), routes=None):
+        """Flight, cancellation, delay and distance metrics per group of ``by``.
+
+        ``by`` is any of ``route_id``, ``year_month`` and ``airline``; route
+        groups also get their cities and label. ``first`` and ``last`` are
+        inclusive yyyymm months. Empty ``airlines`` mean all airlines and
+        ``routes`` (route ids) defaults to all routes.
+        """
+        by = list(by)
+        months = self._codes["year_month"][0]
+        first_code = 0 if first is None else int(np.searchsorted(self.months, first, "left"))
+        last_code = len(self.months) if last is None else int(np.searchsorted(self.months, last, "right"))
+        if routes is not None:
+            # Only the selected routes' cells, then the month range among them
+            positions = np.concatenate([self._by_route[self._route_starts[r]:self._route_starts[r + 1]] for r in routes] or [[]]).astype(np.int64)
+            positions = positions[(months[positions] >= first_code) & (months[positions] < last_code)]
+        else:
+            # Cells are in month order, so the month range is one slice
+            lo, hi = np.searchsorted(months, [first_code, last_code])
+            positions = slice(int(lo), int(hi))
+        if airlines:
+            wanted = np.flatnonzero(self.cells["airline"].cat.categories.isin(list(airlines)))
+            keep = np.isin(self._codes["airline"][0][positions], wanted)
+            positions = np.flatnonzero(keep) + positions.start if isinstance(positions, slice) else positions[keep]
+
+        # One group id per cell, from the key codes; sums are bincounts over those ids
+        n_cells = positions.stop - positions.start if isinstance(positions, slice) else len(positions)
+        ids = np.zeros(n_cells, dtype=np.int64)
+        shape = []
+        for col in by:
+            codes, size = self._codes[col]
+            ids = ids * size + codes[positions]
+            shape.append(size)
+        groups = np.arange(int(np.prod(shape)))
+        if len(groups) > 4 * max(len(ids), 1):
+            groups, ids = np.unique(ids, return_inverse=True)
+        sums = {name: np.bincount(ids, weights=values[positions], minlength=len(groups))
+                for name, values in self._measures.items()}
+        observed = sums["flights"] > 0
+        sums = {name: values[observed] for name, values in sums.items()}
+        key_codes = np.unravel_index(groups[observed], shape) if by else []
+        keys = {}
+        for col, codes in zip(by, key_codes):
+            if col == "route_id":
+                keys[col] = codes.astype(np.int32)
+            elif col == "year_month":
+                keys[col] = self.months[codes]
+            else:
+                keys[col] = pd.Categorical.from_codes(codes, dtype=self.cells["airline"].dtype)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            metrics = pd.DataFrame({
+                **keys,
+                "total_flights": sums["flights"].astype(np.int64),
+                "cancelled_flights": sums["cancelled"].astype(np.int64),
+                "avg_dep_delay": sums["dep_delay_sum"] / sums["dep_delay_count"],
+                "avg_arr_delay": sums["arr_delay_sum"] / sums["arr_delay_count"],
+                "cancellation_rate": 100 * sums["cancelled"] / sums["flights"],
+                "avg_distance": sums["distance_sum"] / sums["flights"],
+            })
+        if "route_id" in by:
+            labels = self.routes.take(metrics["route_id"].to_numpy())
+            metrics = pd.concat([labels.reset_index(drop=True), metrics], axis=1)
+        return metrics
@@ -0,0 +1,125 @@
+"""Stratified sample of the flights and the metrics estimated from it.
+
+The sample keeps ``SAMPLE_FRACTION`` of every airline x month stratum (at least
+``MIN_STRATUM_ROWS`` rows), drawn once when the data is loaded; a partitioned
+dataset is sampled one month partition at a time. Estimates weight each sampled
+row by its stratum's inverse sampling fraction. Rates and averages are ratio
+estimates whose 95% confidence half-widths come from the linearized
+variance of stratified sampling. That variance counts filtered-out rows as
+zeros of the domain, so the intervals stay valid for any filter.
+"""
+
+import numpy as np
+import pandas as pd
+
+from flight_dashboard.aggregations import DELAY_THRESHOLD, _group_ids, _key_columns
+from flight_dashboard.schema import apply_schema
+
+SAMPLE_FRACTION = 0.01
+MIN_STRATUM_ROWS = 30
+STRATA = ["airline", "year_month"]
+
+# Normal quantile of a two-sided 95% interval
+Z_95 = 1.96
+
+
+def stratified_sample(df, fraction=SAMPLE_FRACTION, strata=STRATA, min_rows=MIN_STRATUM_ROWS, seed=0):
+    """Rows of ``df`` sampled per stratum, with their stratum id, stratum size and stratum sample size."""
+    codes = df.groupby(strata, observed=True, sort=False).ngroup().to_numpy()
+    sizes = np.bincount(codes)
+    take = np.minimum(sizes, np.maximum(np.ceil(sizes * fraction), min_rows)).astype(np.int64)
+
+    # A random order within each stratum; the first `take` rows of each are kept
+    order = np.lexsort((np.random.default_rng(seed).random(len(df)), codes))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    rank = np.arange(len(df)) - starts[codes[order]]
+    keep = np.sort(order[rank < take[codes[order]]])
+
+    strata_of_kept = codes[keep]
+    return df.take(keep).reset_index(drop=True).assign(
+        stratum=strata_of_kept.astype(np.int32),
+        stratum_rows=sizes[strata_of_kept],
+        stratum_sample=take[strata_of_kept],
+    )
+
+
+def combine_samples(samples):
+    """One sample from samples of disjoint strata, e.g. one per month partition.
+
+    Stratum ids are renumbered so they stay distinct across the samples, and the
+    categorical columns get the union of their categories.
+    """
+    parts, offset = [], 0
+    for sample in samples:
+        parts.append(sample.assign(stratum=(sample["stratum"] + offset).astype(np.int32)))
+        offset += int(sample["stratum"].max()) + 1 if len(sample) else 0
+    # Categoricals with different categories concatenate as objects; the schema recasts them
+    return apply_schema(pd.concat(parts, ignore_index=True))
+
+
+def estimate_metrics(rows, by, z=Z_95):
+    """``flight_metrics`` columns estimated from (filtered) sample ``rows``, plus ``*_ci`` half-widths.
+
+    ``cancellation_rate``, ``avg_dep_delay`` and ``avg_arr_delay`` get a
+    ``_ci`` column; ``sampled_rows`` is the number of sample rows behind each group.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    ids, valid, levels = _group_ids(rows, by)
+    stratum = rows["stratum"].to_numpy()[valid].astype(np.int64)
+    n_strata = int(stratum.max()) + 1 if len(stratum) else 1
+
+    # Cells are (group, stratum) pairs; every estimate is a weighted sum over cells
+    cells, cell = np.unique(ids * n_strata + stratum, return_inverse=True)
+    groups, group_of_cell = np.unique(cells // n_strata, return_inverse=True)
+    cell_N = np.zeros(len(cells))
+    cell_n = np.zeros(len(cells))
+    cell_N[cell] = rows["stratum_rows"].to_numpy()[valid]
+    cell_n[cell] = rows["stratum_sample"].to_numpy()[valid]
+    weight = cell_N / np.maximum(cell_n, 1)
+
+    def per_cell(values):
+        return np.bincount(cell, weights=values, minlength=len(cells))
+
+    def per_group(values):
+        return np.bincount(group_of_cell, weights=values, minlength=len(groups))
+
+    def ratio(values, domain):
+        # Ratio estimate R = Y / X and its linearized variance, where z_i = d_i (y_i - R)
+        # over all n_h sample rows of each stratum (zero outside the group or filter)
+        a = per_cell(np.where(domain, values, 0))
+        b = per_cell(domain)
+        c = per_cell(np.where(domain, values * values, 0))
+        x = per_group(weight * b)
+        r = per_group(weight * a) / x
+        rc = r[group_of_cell]
+        sum_z, sum_z2 = a - rc * b, c - 2 * rc * a + rc * rc * b
+        s2 = np.where(cell_n > 1, (sum_z2 - sum_z * sum_z / np.maximum(cell_n, 1)) / np.maximum(cell_n - 1, 1), 0)
+        variance = per_group(cell_N ** 2 * (1 - cell_n / np.maximum(cell_N, 1)) / np.maximum(cell_n, 1) * s2) / x ** 2
+        return r, z * np.sqrt(np.maximum(variance, 0))
+
+    ones = np.ones(len(cell))
+    cancelled = rows["cancelled"].to_numpy()[valid].astype(np.float64)
+    dep_delay = rows["dep_delay"].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+    arr_delay = rows["arr_delay"].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+    has_dep, has_arr = ~np.isnan(dep_delay), ~np.isnan(arr_delay)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cancellation_rate, cancellation_ci = ratio(cancelled * 100, np.ones(len(cell), dtype=bool))
+        avg_dep_delay, dep_ci = ratio(np.nan_to_num(dep_delay), has_dep)
+        avg_arr_delay, arr_ci = ratio(np.nan_to_num(arr_delay), has_arr)
+        metrics = pd.DataFrame({
+            **_key_columns(groups, by, levels, rows),
+            "total_flights": np.rint(per_group(weight * per_cell(ones))).astype(np.int64),
+            "cancelled_flights": np.rint(per_group(weight * per_cell(cancelled))).astype(np.int64),
+            "delayed_flights": np.rint(per_group(weight * per_cell(dep_delay > DELAY_THRESHOLD))).astype(np.int64),
+            "dep_delay_sum": per_group(weight * per_cell(np.where(has_dep, dep_delay, 0))),
+            "avg_dep_delay": avg_dep_delay,
+            "avg_dep_delay_ci": dep_ci,
+            "arr_delay_sum": per_group(weight * per_cell(np.where(has_arr, arr_delay, 0))),
+            "avg_arr_delay": avg_arr_delay,
+            "avg_arr_delay_ci": arr_ci,
+            "cancellation_rate": cancellation_rate,
+            "cancellation_rate_ci": cancellation_ci,
+            "sampled_rows": per_group(per_cell(ones)).astype(np.int64),
+        })
+    return metrics
@@ -0,0 +1,130 @@
+"""Explicit column types for the cleaned flights frame, plus a memory report."""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Bump whenever the dtypes or row order below change so existing on-disk caches are rebuilt.
+SCHEMA_VERSION = 4
+
+# Labels stored once per distinct value instead of once per row
+CATEGORY_COLUMNS = [
+    "airline", "origin", "dest", "origin_city", "dest_city",
+    "flight_status", "diverted_status", "cancellation_code", "cancellation_reason",
+    "month", "day", "dep_time_Period", "arr_time_Period",
+]
+
+# 0/1 flags and the 0 (Mon) - 6 (Sun) weekday
+INT8_COLUMNS = ["cancelled", "diverted", "day_of_week"]
+
+# hhmm clock times (max 2400) and calendar years
+INT16_COLUMNS = [
+    "year", "crs_dep_time", "dep_time", "wheels_off", "wheels_on", "crs_arr_time", "arr_time",
+]
+
+# yyyymm month keys
+INT32_COLUMNS = ["year_month"]
+
+# Delay minutes, durations and distances never need more than float32 precision
+FLOAT32_COLUMNS = [
+    "dep_delay", "arr_delay",
+    "delay_due_carrier", "delay_due_weather", "delay_due_nas",
+    "delay_due_security", "delay_due_late_aircraft",
+    "taxi_out", "taxi_in", "crs_elapsed_time", "elapsed_time", "air_time", "distance",
+]
+
+
+def _int_dtype(series, preferred):
+    # Nullable integers keep the NaNs of cancelled flights; widen rather than overflow.
+    # A column without values (e.g. an empty month window) keeps the preferred width.
+    values = series.dropna()
+    for dtype in (preferred, "int16", "int32", "int64"):
+        info = np.iinfo(dtype)
+        if values.empty or (values.min() >= info.min and values.max() <= info.max):
+            break
+    return dtype.capitalize() if series.isna().any() else dtype
+
+
+def _fallback_dtype(series):
+    # Columns the schema does not list still get a compact type
+    if series.dtype == object:
+        return "category" if series.nunique() <= len(series) // 2 else None
+    if series.dtype == np.float64:
+        return "float32"
+    if series.dtype == np.int64:
+        return _int_dtype(series, "int8")
+    return None
+
+
+def dtype_policy(df):
+    """Map each column of ``df`` to the compact dtype it should be stored as."""
+    policy = {}
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            policy[col] = "category"
+        elif col in INT8_COLUMNS:
+            policy[col] = _int_dtype(df[col], "int8")
+        elif col in INT16_COLUMNS:
+            policy[col] = _int_dtype(df[col], "int16")
+        elif col in INT32_COLUMNS:
+            policy[col] = _int_dtype(df[col], "int32")
+        elif col in FLOAT32_COLUMNS:
+            policy[col] = "float32"
+        elif (dtype := _fallback_dtype(df[col])) is not None:
+            policy[col] = dtype
+    return policy
+
+
+def add_time_keys(df):
+    """``df`` with the ``year``, ``year_month`` (yyyymm) and ``day_of_week`` keys it lacks.
+
+    They are derived from ``fl_date`` once, when the data is loaded, so pages
+    group on plain integer columns instead of converting dates on every rerun.
+    """
+    dates = df["fl_date"].dt
+    keys = {
+        "year": lambda: dates.year,
+        "year_month": lambda: dates.year * 100 + dates.month,
+        "day_of_week": lambda: dates.dayofweek,
+    }
+    missing = {col: derive() for col, derive in keys.items() if col not in df.columns}
+    return df.assign(**missing) if missing else df
+
+
+def apply_schema(df):
+    """Cast ``df`` to the compact dtypes chosen by ``dtype_policy``."""
+    return df.astype(dtype_policy(df))
+
+
+def memory_report(before, after):
+    """Bytes held by each column before and after the dtype policy."""
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "bytes_before": before.memory_usage(deep=True, index=False),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_after": after.memory_usage(deep=True, index=False),
+    })
+    report["saved_pct"] = (1 - report["bytes_after"] / report["bytes_before"]) * 100
+    return report.rename_axis("column").reset_index().sort_values("bytes_before", ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-column memory of a flights CSV before and after the dtype policy.")
+    parser.add_argument("csv", help="path or URL of the cleaned flights CSV")
+    parser.add_argument("--rows", type=int, help="project the totals to this many rows")
+    args = parser.parse_args(argv)
+
+    before = pd.read_csv(args.csv, parse_dates=["fl_date"], engine="pyarrow")
+    report = memory_report(before, apply_schema(before))
+    print(report.to_string(index=False, float_format="{:.1f}".format))
+
+    total_before, total_after = report["bytes_before"].sum(), report["bytes_after"].sum()
+    print(f"\n{len(before):,} rows: {total_before / 2**20:,.1f} MiB -> {total_after / 2**20:,.1f} MiB")
+    if args.rows:
+        scale = args.rows / len(before)
+        print(f"projected for {args.rows:,} rows: {total_before * scale / 2**30:,.2f} GiB -> {total_after * scale / 2**30:,.2f} GiB")
+
+
+if __name__ == "__main__":
+    main()
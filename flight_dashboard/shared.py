@@ -0,0 +1,116 @@
+"""The typed flights frame published as one memory-mapped Arrow IPC file.
+
+Every server process maps the same file read-only and wraps its buffers in
+pandas arrays without copying them, so the OS page cache holds one physical
+copy of the data however many Streamlit processes run behind the load
+balancer. A further worker maps a file that is already in the page cache
+instead of parsing and holding its own copy.
+
+The file stores plain fixed-width columns only. Categoricals are written as
+their codes, nullable integers as their values plus a byte mask, and the pandas
+dtypes are recorded in the schema metadata. That way no column needs a
+conversion (and therefore a private copy) when it is mapped.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+from pandas.core.internals import BlockManager
+from pandas.core.internals.api import make_block
+
+# Schema metadata key holding the per-column pandas layout
+LAYOUT_KEY = b"flight_dashboard.layout"
+
+
+def _mask_name(column):
+    return f"__mask__{column}"
+
+
+def publish_frame(df, path):
+    """Write ``df`` to ``path`` as an uncompressed Arrow IPC file laid out for ``map_frame``.
+
+    If ``path`` already exists, another process published the same frame first
+    and its file is kept.
+    """
+    names, arrays, layout = [], [], []
+
+    def add(name, values):
+        names.append(name)
+        # from_pandas=False keeps NaN as a float value instead of turning it into a null
+        arrays.append(pa.array(values, from_pandas=False))
+
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            layout.append({"name": col, "kind": "category", "categories": series.cat.categories.tolist(),
+                           "ordered": bool(series.cat.ordered)})
+            add(col, series.cat.codes.to_numpy())
+        elif isinstance(series.array, pd.arrays.IntegerArray):
+            layout.append({"name": col, "kind": "masked"})
+            add(col, series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+            add(_mask_name(col), series.isna().to_numpy().view(np.uint8))
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufM":
+            layout.append({"name": col, "kind": "numpy"})
+            add(col, series.to_numpy())
+        else:
+            # Anything else (e.g. object strings) is stored as Arrow and copied when mapped
+            layout.append({"name": col, "kind": "arrow"})
+            names.append(col)
+            arrays.append(pa.Array.from_pandas(series))
+
+    table = pa.table(arrays, names=names).replace_schema_metadata({LAYOUT_KEY: json.dumps(layout)})
+    # Every writer has a temp file of its own and the first one to finish publishes
+    # it. Linking never replaces a published file, so processes starting together on
+    # an empty cache all map that same file instead of each keeping its own copy
+    path = Path(path)
+    fd, partial = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    os.fchmod(fd, 0o644)
+    os.close(fd)
+    try:
+        with pa.OSFile(partial, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(table), 1))
+        os.link(partial, path)
+    except FileExistsError:
+        pass
+    finally:
+        Path(partial).unlink(missing_ok=True)
+
+
+def map_frame(path):
+    """Map a file written by ``publish_frame`` as a DataFrame whose columns are views of the file."""
+    reader = ipc.open_file(pa.memory_map(str(path), "r"))
+    layout = json.loads(reader.schema.metadata[LAYOUT_KEY])
+    table = reader.read_all()
+
+    def view(name):
+        # Read-only numpy view of the mapped buffer; the file holds a single batch
+        column = table.column(name)
+        if column.num_chunks == 1:
+            return column.chunk(0).to_numpy(zero_copy_only=True)
+        return column.combine_chunks().to_numpy(zero_copy_only=False)
+
+    columns = []
+    for spec in layout:
+        name, kind = spec["name"], spec["kind"]
+        if kind == "category":
+            dtype = pd.CategoricalDtype(spec["categories"], ordered=spec["ordered"])
+            columns.append(pd.Categorical.from_codes(view(name), dtype=dtype, validate=False))
+        elif kind == "masked":
+            columns.append(pd.arrays.IntegerArray(view(name), view(_mask_name(name)).view(bool)))
+        elif kind == "numpy":
+            columns.append(view(name))
+        else:
+            columns.append(table.column(name).to_pandas().array)
+
+    # One block per column: building the frame the usual way would consolidate
+    # same-typed columns into new 2-D arrays, i.e. private copies
+    blocks = [make_block(values if isinstance(values, pd.api.extensions.ExtensionArray) else values.reshape(1, -1),
+                         placement=[i]) for i, values in enumerate(columns)]
+    manager = BlockManager(blocks, [pd.Index([spec["name"] for spec in layout]), pd.RangeIndex(table.num_rows)])
+    return pd.DataFrame._from_mgr(manager, manager.axes)
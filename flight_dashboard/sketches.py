@@ -0,0 +1,161 @@
+"""Mergeable delay quantile sketches behind the percentile charts.
+
+A sketch is a vector of counts over one fixed set of delay buckets. There is one
+bucket per whole minute for delays within ``LINEAR_MINUTES`` of zero. Beyond
+that, buckets grow geometrically by ``GAMMA``, as in DDSketch. All sketches share
+the same buckets, so merging two sketches is adding their counts. They are kept
+per group x month (x flight status), stored per partition, and summed on every
+rerun for the selected months, groups and statuses.
+
+Error bounds, checked by ``tests/test_sketches.py``: percentiles use the
+nearest-rank definition (``np.quantile(..., method="inverted_cdf")``) and
+the rank is exact. The value returned is the representative of the bucket
+holding that rank:
+
+* exact for whole-minute delays within ``LINEAR_MINUTES`` of zero (at most
+  half a minute off for fractional ones);
+* within ``RELATIVE_ACCURACY`` of the true value beyond that, up to
+  ``MAX_MINUTES``; larger delays are clamped into the last bucket.
+
+Both bounds are tight: delays at the edges of a bucket are off by exactly the
+bound, so the worst observed error reaching 100% of it is expected.
+"""
+
+import numpy as np
+import pandas as pd
+
+from flight_dashboard.aggregations import _group_ids, _key_columns
+
+LINEAR_MINUTES = 120
+RELATIVE_ACCURACY = 0.01
+MAX_MINUTES = 10_000
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+# Geometric buckets on each side; bucket i covers (L * GAMMA**(i-1), L * GAMMA**i]
+_LOG_BUCKETS = int(np.ceil(np.log(MAX_MINUTES / LINEAR_MINUTES) / np.log(GAMMA)))
+_ZERO = _LOG_BUCKETS + LINEAR_MINUTES
+N_BUCKETS = 2 * _ZERO + 1
+
+# Representative delay of every bucket: the minute itself, or the value within
+# RELATIVE_ACCURACY of both ends of a geometric bucket
+_steps = np.arange(1, _LOG_BUCKETS + 1)
+_tail = LINEAR_MINUTES * 2 * GAMMA ** _steps / (GAMMA + 1)
+VALUES = np.concatenate([-_tail[::-1], np.arange(-LINEAR_MINUTES, LINEAR_MINUTES + 1), _tail])
+
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+# Sketch name -> (group column, delay column, filter keys besides the month)
+SKETCHES = {
+    "airline_dep": ("airline", "dep_delay", ["flight_status"]),
+    "airline_arr": ("airline", "arr_delay", ["flight_status"]),
+    "origin_dep": ("origin", "dep_delay", []),
+    "origin_arr": ("origin", "arr_delay", []),
+}
+
+
+def percentile_column(q):
+    return f"p{round(q * 100):g}"
+
+
+def error_bound(value):
+    """Largest documented distance between a sketch percentile and the exact ``value``."""
+    value = np.abs(np.asarray(value, dtype=np.float64))
+    return np.where(value <= LINEAR_MINUTES + 0.5, 0.5, RELATIVE_ACCURACY * np.minimum(value, MAX_MINUTES))
+
+
+def bucket_of(values):
+    """Bucket index of every delay in ``values`` (float minutes, not NaN)."""
+    minutes = np.rint(values)
+    linear = np.abs(minutes) <= LINEAR_MINUTES
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steps = np.ceil(np.log(np.abs(values) / LINEAR_MINUTES) / np.log(GAMMA))
+    steps = np.clip(np.nan_to_num(steps), 1, _LOG_BUCKETS)
+    buckets = np.where(linear, _ZERO + minutes, _ZERO + np.sign(values) * (LINEAR_MINUTES + steps))
+    return buckets.astype(np.int16)
+
+
+def quantiles(counts, qs=PERCENTILES):
+    """Nearest-rank percentiles ``qs`` of every row of a (sketches x ``N_BUCKETS``) count matrix."""
+    cumulative = np.cumsum(counts, axis=1)
+    ranks = np.maximum(np.ceil(np.outer(cumulative[:, -1], qs)), 1)
+    positions = (cumulative[:, None, :] >= ranks[:, :, None]).argmax(axis=2)
+    return VALUES[positions]
+
+
+class DelaySketches:
+    """Sketch cells of every ``SKETCHES`` entry: keys, ``bucket`` and ``count``, sorted by month.
+
+    Cells of disjoint months never overlap, so cells aggregated per partition
+    can simply be concatenated and passed to ``from_cells``.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    @classmethod
+    def build(cls, df, names=None):
+        return cls.from_cells([cls.aggregate(df, names)])
+
+    @classmethod
+    def aggregate(cls, df, names=None):
+        """{sketch name: cells} of ``df``."""
+        cells = {}
+        for name in names or SKETCHES:
+            group, delay, filters = SKETCHES[name]
+            keys = [group, "year_month", *filters]
+            delays = df[delay].to_numpy(dtype=np.float64, na_value=np.nan)
+            ids, valid, levels = _group_ids(df, keys)
+            has_delay = ~np.isnan(delays[valid])
+            combined = ids[has_delay] * N_BUCKETS + bucket_of(delays[valid][has_delay])
+            found, counts = np.unique(combined, return_counts=True)
+            frame = pd.DataFrame(_key_columns(found // N_BUCKETS, keys, levels, df))
+            cells[name] = frame.assign(bucket=(found % N_BUCKETS).astype(np.int16), count=counts.astype(np.int32))
+        return cells
+
+    @classmethod
+    def from_cells(cls, parts):
+        """Sketches from a list of ``aggregate`` results (e.g. one per partition)."""
+        cells = {}
+        for name in parts[0]:
+            group, _, filters = SKETCHES[name]
+            frame = pd.concat([part[name] for part in parts], ignore_index=True)
+            frame = frame.astype({col: "category" for col in [group, *filters]} | {"year_month": np.int32})
+            cells[name] = frame.sort_values("year_month", kind="stable", ignore_index=True)
+        return cls(cells)
+
+    def percentiles(self, name, by="group", first=None, last=None, groups=(), statuses=(), qs=PERCENTILES):
+        """Merged percentiles of sketch ``name`` per group (``by="group"``), per month (``"year_month"``) or overall (``None``).
+
+        ``first`` and ``last`` are inclusive yyyymm months; empty ``groups`` /
+        ``statuses`` mean all. Returns the key column, ``flights`` (delays counted)
+        and one ``pNN`` column per percentile.
+        """
+        group, _, filters = SKETCHES[name]
+        cells = self.cells[name]
+        months = cells["year_month"].to_numpy()
+        lo = 0 if first is None else int(np.searchsorted(months, first, "left"))
+        hi = len(cells) if last is None else int(np.searchsorted(months, last, "right"))
+        cells = cells.iloc[lo:hi]
+        mask = np.ones(len(cells), dtype=bool)
+        if groups:
+            mask &= cells[group].isin(list(groups)).to_numpy()
+        if statuses and "flight_status" in filters:
+            mask &= cells["flight_status"].isin(list(statuses)).to_numpy()
+        if not mask.all():
+            cells = cells[mask]
+
+        key = {"group": group, "year_month": "year_month", None: None}[by]
+        if key is None:
+            codes, labels = np.zeros(len(cells), dtype=np.int64), pd.Index([None])
+        elif isinstance(cells[key].dtype, pd.CategoricalDtype):
+            codes, labels = cells[key].cat.codes.to_numpy().astype(np.int64), cells[key].cat.categories
+        else:
+            codes, labels = pd.factorize(cells[key], sort=True)
+        counts = np.bincount(codes * N_BUCKETS + cells["bucket"].to_numpy(), weights=cells["count"].to_numpy(),
+                             minlength=len(labels) * N_BUCKETS).reshape(len(labels), N_BUCKETS)
+        present = counts.sum(axis=1) > 0
+        result = pd.DataFrame(quantiles(counts[present], qs), columns=[percentile_column(q) for q in qs])
+        result.insert(0, "flights", counts[present].sum(axis=1).astype(np.int64))
+        if key is not None:
+            result.insert(0, key, np.asarray(labels)[present])
+        return result
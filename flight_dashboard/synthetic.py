@@ -0,0 +1,235 @@
+"""Synthetic flights with the exact raw and cleaned schema, for offline runs and benchmarks.
+
+Rows are generated in the raw BTS layout (``flights_sample_3m.csv``) and cleaned
+with ``etl.clean_chunk``, so the cleaned frame has the same columns, dtypes and
+derived labels as ``Flight_Canselled_Delay_C.csv``. Cardinalities and skew follow
+the real sample: 15 airlines with their market shares, 380 airports in 370
+cities with Zipf-like traffic, Jan 2019 - Aug 2023, ~2% cancelled, ~0.25% diverted.
+
+    python -m flight_dashboard.synthetic data/flights.csv --rows 1000000
+    python -m flight_dashboard.synthetic data/flights --rows 30000000 --format partitioned
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from flight_dashboard.etl import clean_chunk, write_partitions
+
+FIRST_DATE = "2019-01-01"
+LAST_DATE = "2023-08-31"
+
+# (name, DOT code, share of flights) for the 15 largest carriers in the sample
+AIRLINES = [
+    ("Southwest Airlines Co.", "WN", 0.195), ("Delta Air Lines Inc.", "DL", 0.131),
+    ("American Airlines Inc.", "AA", 0.129), ("SkyWest Airlines Inc.", "OO", 0.115),
+    ("United Air Lines Inc.", "UA", 0.086), ("Republic Airline", "YX", 0.048),
+    ("Envoy Air", "MQ", 0.040), ("Endeavor Air Inc.", "9E", 0.038), ("JetBlue Airways", "B6", 0.038),
+    ("PSA Airlines Inc.", "OH", 0.036), ("Alaska Airlines Inc.", "AS", 0.031), ("Spirit Air Lines", "NK", 0.027),
+    ("Mesa Airlines Inc.", "YV", 0.022), ("Frontier Airlines Inc.", "F9", 0.018), ("Allegiant Air", "G4", 0.017),
+]
+N_AIRPORTS = 380
+N_CITIES = 370
+STATES = ["AL", "AZ", "CA", "CO", "FL", "GA", "IL", "LA", "MA", "MI", "MN", "NC", "NV", "NY", "OH", "OR", "PA", "TN", "TX", "WA"]
+
+CANCEL_RATE = 0.02
+DIVERT_RATE = 0.0025
+# A = carrier, B = weather, C = national air system, D = security
+CANCELLATION_CODES = (["A", "B", "C", "D"], [0.27, 0.45, 0.27, 0.01])
+DELAY_CAUSES = ["DELAY_DUE_CARRIER", "DELAY_DUE_WEATHER", "DELAY_DUE_NAS", "DELAY_DUE_SECURITY", "DELAY_DUE_LATE_AIRCRAFT"]
+
+# Scheduled departures per hour of day, 0-23
+DEPARTURE_HOURS = np.array([1, 0, 0, 0, 1, 12, 40, 45, 45, 42, 40, 40, 42, 40, 38, 40, 42, 40, 38, 32, 24, 14, 8, 3], dtype=float)
+
+RAW_COLUMNS = [
+    "FL_DATE", "AIRLINE", "AIRLINE_DOT", "AIRLINE_CODE", "DOT_CODE", "FL_NUMBER",
+    "ORIGIN", "ORIGIN_CITY", "DEST", "DEST_CITY", "CRS_DEP_TIME", "DEP_TIME", "DEP_DELAY",
+    "TAXI_OUT", "WHEELS_OFF", "WHEELS_ON", "TAXI_IN", "CRS_ARR_TIME", "ARR_TIME", "ARR_DELAY",
+    "CANCELLED", "CANCELLATION_CODE", "DIVERTED", "CRS_ELAPSED_TIME", "ELAPSED_TIME", "AIR_TIME", "DISTANCE",
+    *DELAY_CAUSES,
+]
+
+SIZES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000, "30m": 30_000_000}
+
+
+def _airports():
+    # Fixed network independent of the seed: codes, cities, coordinates and traffic weights
+    rng = np.random.default_rng(2019)
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    codes = []
+    while len(codes) < N_AIRPORTS:
+        code = "".join(rng.choice(letters, 3))
+        if code not in codes:
+            codes.append(code)
+    # The last few airports share a city with a busier one, like ORD/MDW or JFK/LGA
+    city_ids = np.concatenate([np.arange(N_CITIES), rng.choice(30, N_AIRPORTS - N_CITIES, replace=False)])
+    coords = rng.uniform([0, 0], [2500, 1200], size=(N_AIRPORTS, 2))
+    weights = 1 / np.arange(1, N_AIRPORTS + 1) ** 0.9
+    return codes, city_ids, coords, weights / weights.sum()
+
+
+AIRPORT_CODES, AIRPORT_CITY_IDS, AIRPORT_COORDS, AIRPORT_WEIGHTS = _airports()
+CITIES = [f"City {i:03d}, {STATES[i % len(STATES)]}" for i in range(N_CITIES)]
+
+
+def _labels(codes, categories):
+    # Categorical straight from integer codes: no per-row strings are built, and
+    # only the values that occur are kept, like a frame parsed from the CSV
+    return pd.Categorical.from_codes(codes, categories).remove_unused_categories()
+
+
+def _hhmm(minutes):
+    # Minutes after midnight (any day) to the BTS hhmm clock, where midnight is 2400
+    minutes = np.mod(minutes, 1440)
+    hhmm = (minutes // 60) * 100 + minutes % 60
+    return np.where(hhmm == 0, 2400, hhmm)
+
+
+def raw_chunk(n_rows, rng, first=FIRST_DATE, last=LAST_DATE):
+    """``n_rows`` raw BTS rows dated between ``first`` and ``last``, sorted by date."""
+    days = (np.datetime64(last, "D") - np.datetime64(first, "D")).astype(int) + 1
+    fl_date = np.datetime64(first, "D") + np.sort(rng.integers(0, days, n_rows))
+
+    airline = rng.choice(len(AIRLINES), n_rows, p=np.array([a[2] for a in AIRLINES]) / sum(a[2] for a in AIRLINES))
+    origin = rng.choice(N_AIRPORTS, n_rows, p=AIRPORT_WEIGHTS)
+    dest = rng.choice(N_AIRPORTS, n_rows, p=AIRPORT_WEIGHTS)
+    dest = np.where(dest == origin, (dest + 1) % N_AIRPORTS, dest)
+
+    distance = np.maximum(np.hypot(*(AIRPORT_COORDS[origin] - AIRPORT_COORDS[dest]).T).round(), 70)
+    crs_elapsed = (30 + distance / 8 + rng.normal(0, 5, n_rows)).round()
+    crs_dep = rng.choice(24, n_rows, p=DEPARTURE_HOURS / DEPARTURE_HOURS.sum()) * 60 + rng.integers(0, 60, n_rows)
+
+    # Most flights leave within a few minutes of schedule; a long tail leaves much later
+    late = rng.random(n_rows) < 0.2
+    dep_delay = np.where(late, 5 + rng.exponential(40, n_rows), rng.normal(-3, 5, n_rows)).round()
+    taxi_out = np.maximum(rng.gamma(4, 4, n_rows).round(), 1)
+    taxi_in = np.maximum(rng.gamma(3, 2.5, n_rows).round(), 1)
+    air_time = np.maximum(crs_elapsed - 25 + rng.normal(0, 6, n_rows), 15).round()
+    elapsed = taxi_out + air_time + taxi_in
+    arr_delay = dep_delay + elapsed - crs_elapsed
+
+    dep_minutes = crs_dep + dep_delay
+    cancelled = rng.random(n_rows) < CANCEL_RATE
+    diverted = ~cancelled & (rng.random(n_rows) < DIVERT_RATE)
+    flown, landed = ~cancelled, ~cancelled & ~diverted
+
+    # Delay causes are only reported for arrivals 15+ minutes late
+    shares = rng.gamma(0.7, size=(n_rows, len(DELAY_CAUSES)))
+    causes = shares / shares.sum(axis=1, keepdims=True) * np.maximum(arr_delay, 0)[:, None]
+    reported = landed & (arr_delay >= 15)
+
+    def when(mask, values):
+        return np.where(mask, values, np.nan)
+
+    raw = pd.DataFrame({
+        "FL_DATE": fl_date.astype("datetime64[ns]"),
+        "AIRLINE": _labels(airline, [a[0] for a in AIRLINES]),
+        "AIRLINE_DOT": _labels(airline, [f"{a[0]}: {a[1]}" for a in AIRLINES]),
+        "AIRLINE_CODE": _labels(airline, [a[1] for a in AIRLINES]),
+        "DOT_CODE": 19000 + airline * 37,
+        "FL_NUMBER": rng.integers(1, 7000, n_rows),
+        "ORIGIN": _labels(origin, AIRPORT_CODES),
+        "ORIGIN_CITY": _labels(AIRPORT_CITY_IDS[origin], CITIES),
+        "DEST": _labels(dest, AIRPORT_CODES),
+        "DEST_CITY": _labels(AIRPORT_CITY_IDS[dest], CITIES),
+        "CRS_DEP_TIME": _hhmm(crs_dep),
+        "DEP_TIME": when(flown, _hhmm(dep_minutes)),
+        "DEP_DELAY": when(flown, dep_delay),
+        "TAXI_OUT": when(flown, taxi_out),
+        "WHEELS_OFF": when(flown, _hhmm(dep_minutes + taxi_out)),
+        "WHEELS_ON": when(landed, _hhmm(dep_minutes + taxi_out + air_time)),
+        "TAXI_IN": when(landed, taxi_in),
+        "CRS_ARR_TIME": _hhmm(crs_dep + crs_elapsed),
+        "ARR_TIME": when(landed, _hhmm(dep_minutes + elapsed)),
+        "ARR_DELAY": when(landed, arr_delay),
+        "CANCELLED": cancelled.astype(float),
+        "CANCELLATION_CODE": _labels(np.where(cancelled, rng.choice(4, n_rows, p=CANCELLATION_CODES[1]), -1), CANCELLATION_CODES[0]),
+        "DIVERTED": diverted.astype(float),
+        "CRS_ELAPSED_TIME": crs_elapsed,
+        "ELAPSED_TIME": when(landed, elapsed),
+        "AIR_TIME": when(landed, air_time),
+        "DISTANCE": distance,
+    })
+    for i, column in enumerate(DELAY_CAUSES):
+        raw[column] = when(reported, causes[:, i].round())
+    return raw
+
+
+def _chunks(n_rows, seed, chunk_rows):
+    # Each chunk covers its own slice of the date range, so the output stays sorted by date
+    n_chunks = max(1, -(-n_rows // chunk_rows))
+    bounds = pd.date_range(FIRST_DATE, LAST_DATE, periods=n_chunks + 1).normalize()
+    for i in range(n_chunks):
+        first = bounds[i]
+        last = bounds[i + 1] - pd.Timedelta(days=1) if i + 1 < n_chunks else bounds[-1]
+        rows = n_rows // n_chunks + (i < n_rows % n_chunks)
+        yield raw_chunk(rows, np.random.default_rng([seed, i]), first.date(), last.date())
+
+
+def generate(n_rows, seed=0):
+    """Cleaned, typed frame of ``n_rows`` synthetic flights, sorted by date."""
+    return clean_chunk(raw_chunk(n_rows, np.random.default_rng(seed)))
+
+
+def _write_csv(df, path, append):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Dates are written as 2019-01-01 like the BTS files, not as midnight timestamps
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table[field.name].cast(pa.date32()))
+    with open(path, "ab" if append else "wb") as f:
+        pa_csv.write_csv(table, f, pa_csv.WriteOptions(include_header=not append))
+
+
+def write(path, n_rows, fmt="csv", seed=0, chunk_rows=1_000_000):
+    """Write ``n_rows`` synthetic flights to ``path`` chunk by chunk; returns ``path``.
+
+    ``fmt`` is ``"csv"`` (the cleaned CSV the app loads), ``"raw"`` (the raw BTS
+    CSV that ``etl``/``ingest`` take) or ``"partitioned"`` (the Parquet dataset
+    ``etl`` writes, including its cube aggregates).
+    """
+    from flight_dashboard.dataset import PartitionedDataset
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partitions = set()
+    for i, raw in enumerate(_chunks(n_rows, seed, chunk_rows)):
+        if fmt == "raw":
+            _write_csv(raw, path, append=i > 0)
+        elif fmt == "csv":
+            _write_csv(clean_chunk(raw), path, append=i > 0)
+        elif fmt == "partitioned":
+            partitions.update(write_partitions(clean_chunk(raw), path, f"part-{i:05d}"))
+        else:
+            raise ValueError(f"unknown format {fmt!r}")
+    if fmt == "partitioned":
+        PartitionedDataset(path).write_aggregates(sorted(partitions))
+    return path
+
+
+def parse_rows(value):
+    """Row count from ``"1m"``-style sizes or a plain integer."""
+    return SIZES.get(value.lower()) or int(value.replace("_", ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic flights with the dashboard's schema.")
+    parser.add_argument("out", help="output CSV file, or directory for --format partitioned")
+    parser.add_argument("--rows", type=parse_rows, default=SIZES["1m"], help="row count, e.g. 100k, 1m, 10m, 30m or 2500000")
+    parser.add_argument("--format", choices=["csv", "raw", "partitioned"], default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    write(args.out, args.rows, args.format, args.seed, args.chunk_rows)
+    print(f"{args.rows:,} rows -> {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Cache prewarming, so the first visitor after a deploy or restart does not wait for the data.
+
+``warm()`` runs the shared loaders behind the default view of every page, in
+the order a first visit would: the download, the Parquet and shared Arrow
+caches, the frame and its indexes (or the DuckDB connection), the overview
+cube, the route and airport indexes and the delay sketches. It also imports
+the plotting modules, and builds the sample when progressive charts are
+enabled server-wide (``FLIGHT_PROGRESSIVE=1``). Everything it builds is a
+``st.cache_resource`` entry or an on-disk cache the pages reuse.
+
+Two ways to run it:
+
+    python -m flight_dashboard.warmup
+    python -m flight_dashboard.warmup --ready-file /tmp/flight-ready --serve Home.py --server.port 8501
+
+Without ``--serve`` it builds the on-disk caches and exits; run it in the image
+build or before ``streamlit run``. With ``--serve`` it starts the Streamlit
+server straight away and warms the server's in-memory caches in a background
+thread. The Home, Project Presentation and About pages do not touch the data,
+so they render at once; a data page opened during the warm-up waits for the
+loader already running instead of starting its own. When the warm-up is done,
+the ready file is written with the time of every step, and a line is logged.
+Load balancers can probe that file before routing traffic to the instance.
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+def warm(report=log.info):
+    """Build every shared resource the pages load on their default view; returns {step: seconds}."""
+    # Imported here so `--serve` starts the server without waiting for pandas and plotly
+    from flight_dashboard import data
+    from flight_dashboard.backends import load_backend
+
+    timings = {}
+
+    def step(name, load):
+        start = time.perf_counter()
+        result = load()
+        timings[name] = round(time.perf_counter() - start, 3)
+        if report:
+            report(f"warm-up {name}: {timings[name]:.2f} s")
+        return result
+
+    _, charts = step("imports", lambda: [importlib.import_module(name) for name in ("plotly.express", "flight_dashboard.charts")])
+    step("source", lambda: data.fetch_source(data.DATA_SOURCE))
+    step("fingerprint", data.load_fingerprint)
+    backend = step("backend", load_backend)
+    first, last = step("date bounds", backend.date_bounds)
+    if backend.name == "pandas":
+        window = data.data_window(first, last)
+        step("frame", lambda: data.load_window(window))
+        step("indexes", lambda: data.load_window_indexes(window))
+        step("overview cube", lambda: data.load_overview_cube(window))
+        step("delay sketches", data.load_delay_sketches)
+    # The sample only serves progressive estimates; it is built a month at a time,
+    # so warming it never loads the whole frame
+    if charts.PROGRESSIVE:
+        step("sample", data.load_sample)
+    step("route index", backend.route_index)
+    step("airport index", backend.airport_index)
+    return timings
+
+
+def _warm_and_signal(ready_file):
+    try:
+        started = time.perf_counter()
+        timings = warm()
+        if ready_file:
+            partial = f"{ready_file}.part"
+            Path(partial).write_text(json.dumps(timings, indent=2))
+            os.replace(partial, ready_file)
+        log.info("warm-up finished in %.1f s; the dashboard is ready", time.perf_counter() - started)
+    except Exception:
+        log.exception("warm-up failed; pages will load their data on first view")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prewarm the dashboard's caches, optionally while serving it.")
+    parser.add_argument("--ready-file", help="written once the warm-up has finished (removed on start)")
+    parser.add_argument("--serve", nargs=argparse.REMAINDER, metavar="SCRIPT [STREAMLIT OPTIONS]",
+                        help="start `streamlit run SCRIPT ...` at once and warm its caches in the background")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if args.ready_file:
+        Path(args.ready_file).unlink(missing_ok=True)
+
+    if args.serve is None:
+        # The cached accessors warn about running outside `streamlit run` on every call;
+        # the config is parsed first so it cannot reset the level afterwards
+        import streamlit.config
+        import streamlit.logger
+
+        streamlit.config.get_option("logger.level")
+        streamlit.logger.set_log_level("error")
+        _warm_and_signal(args.ready_file)
+        return
+
+    # Same process as the server, so the warmed st.cache_resource entries are the ones the pages hit
+    from streamlit.web import cli
+
+    # Every cached accessor called outside a page warns about the missing script context
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        lambda record: record.threadName != "warmup")
+    threading.Thread(target=_warm_and_signal, args=(args.ready_file,), name="warmup", daemon=True).start()
+    cli.main(["run", *args.serve])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,8 @@
-
-
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from PIL import Image
+from flight_dashboard import charts, perf
+from flight_dashboard.backends import load_backend
+from flight_dashboard.cube import flights_by_year, kpis, status_counts
+from flight_dashboard.filters import sidebar_filters
 
 # Function to format large numbers
 def format_number(n):
@@ -18,6 +17,9 @@ def format_number(n):
 # Page configuration
 st.set_page_config(page_title="Flight Analysis Dashboard", page_icon="✈️", layout="wide", initial_sidebar_state="expanded")
 
+# Stage timings for this rerun, when enabled with FLIGHT_PERF=1 or ?perf=1
+perf.start("overview")
+
 
 # CSS style f
 st.markdown("""
@@ -60,41 +62,18 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# Load dataset
-@st.cache_data
-def load_data():
-    url = "https://www.dropbox.com/scl/fi/cdrfwk27h6sszbqg2k82b/Flight_Canselled_Delay_C.csv?rlkey=0nnticgct444wwqqjk50ctov4&st=aazxpeja&dl=1"
-    df = pd.read_csv(url, parse_dates=["fl_date"])
-    return df
-
-df = load_data()
-
 # Sidebar filters
 st.sidebar.markdown("## 🧭 Filters")
 st.sidebar.markdown("---")
 
-# Date Range Selector
-min_date = df['fl_date'].min().date()
-max_date = df['fl_date'].max().date()
-
-start_date, end_date = st.sidebar.date_input("📅 Select Date Range:", value=(min_date, max_date), min_value=min_date, max_value=max_date)
-
-selected_airline = st.sidebar.multiselect("Select Airline(s):", options=sorted(df['airline'].unique()), default=[])
-selected_origin = st.sidebar.multiselect("Select Origin City:", options=sorted(df['origin_city'].unique()), default=[])
-selected_dest = st.sidebar.multiselect("Select Destination City:", options=sorted(df['dest_city'].unique()), default=[])
-selected_status = st.sidebar.multiselect("Select Flight Status:", options=sorted(df['flight_status'].unique()), default=[])
+# Query backend (pandas cube by default, DuckDB over Parquet when configured)
+backend = load_backend()
 
-# Apply filters
-df_filtered = df[(df['fl_date'] >= pd.to_datetime(start_date)) & (df['fl_date'] <= pd.to_datetime(end_date))]
+# Date range and selections, shared with the other pages of this session
+filters = sidebar_filters(backend, ["airlines", "origin_cities", "dest_cities", "statuses"])
 
-if selected_airline:
-    df_filtered = df_filtered[df_filtered['airline'].isin(selected_airline)]
-if selected_origin:
-    df_filtered = df_filtered[df_filtered['origin_city'].isin(selected_origin)]
-if selected_dest:
-    df_filtered = df_filtered[df_filtered['dest_city'].isin(selected_dest)]
-if selected_status:
-    df_filtered = df_filtered[df_filtered['flight_status'].isin(selected_status)]
+# Apply filters in the backend; only per-year/status flight counts come back
+cells = backend.overview_cells(filters)
 
 # Overview 
 st.markdown("## 📊 Overview Dashboard")
@@ -102,10 +81,11 @@ st.markdown("## 📊 Overview Dashboard")
 # KPIs
 col1, col2, col3, col4 = st.columns(4)
 
-total_flights = df_filtered.shape[0]
-delayed_flights = df_filtered[df_filtered['dep_delay'] > 15].shape[0]
-cancelled_flights = df_filtered[df_filtered['flight_status'] == 'Cancelled'].shape[0]
-on_time_flights = total_flights - delayed_flights - cancelled_flights
+metrics = kpis(cells)
+total_flights = metrics['total_flights']
+delayed_flights = metrics['delayed_flights']
+cancelled_flights = metrics['cancelled_flights']
+on_time_flights = metrics['on_time_flights']
 
 delay_percent = (delayed_flights / total_flights) * 100 if total_flights > 0 else 0
 cancel_percent = (cancelled_flights / total_flights) * 100 if total_flights > 0 else 0
@@ -156,32 +136,43 @@ custom_colors = ["#114538", "#5e8d83", "#d2e1cc", "#161d23"]
 
 # Flights Over Time
 st.markdown("## 📅 Flights Over Time")
-chart_type = st.radio("Select Chart Type:", ["Line Chart", "Bar Chart"], horizontal=True)
-
-df_filtered["year"] = df_filtered["fl_date"].dt.year
-flights_over_time = df_filtered.groupby("year").size().reset_index(name="count")
-
-if chart_type == "Line Chart":
-    st.plotly_chart(px.line(flights_over_time, x="year", y="count", markers=True,
-                  title="Flights Count Over Time",
-                  labels={"year": "Year", "count": "Number of Flights"},
-                  template="plotly_white", color_discrete_sequence=custom_colors), use_container_width=True)
-else:
-    st.plotly_chart(px.bar(flights_over_time, x="year", y="count",
-                 title="Flights Count Over Time",
-                 labels={"year": "Year", "count": "Number of Flights"},
-                 template="plotly_white", color_discrete_sequence=custom_colors), use_container_width=True)
+
+# A fragment: switching the chart type reruns only this function with the cells
+# it was last given, instead of the filters, the query and the KPIs above
+@st.fragment
+def flights_over_time_section(filters, cells):
+    with perf.fragment("flights_over_time"):
+        chart_type = st.radio("Select Chart Type:", ["Line Chart", "Bar Chart"], horizontal=True)
+
+        flights_over_time = flights_by_year(cells)
+
+        if chart_type == "Line Chart":
+            charts.show_cached('flights_over_time', (filters, chart_type), lambda: charts.line(flights_over_time, x="year", y="count", markers=True,
+                          title="Flights Count Over Time",
+                          labels={"year": "Year", "count": "Number of Flights"},
+                          template="plotly_white", color_discrete_sequence=custom_colors))
+        else:
+            charts.show_cached('flights_over_time', (filters, chart_type), lambda: charts.bar(flights_over_time, x="year", y="count",
+                         title="Flights Count Over Time",
+                         labels={"year": "Year", "count": "Number of Flights"},
+                         template="plotly_white", color_discrete_sequence=custom_colors))
+
+
+flights_over_time_section(filters, cells)
 
 # Flight Status Distribution
 st.markdown("## 📌 Flight Status Distribution")
 
-status_counts = df_filtered['flight_status'].value_counts().reset_index()
-status_counts.columns = ['Status', 'Count']
+status_breakdown = status_counts(cells)
 
-st.plotly_chart(px.pie(status_counts, names='Status', values='Count',
+charts.show_cached('status_breakdown', filters, lambda: charts.pie(status_breakdown, names='Status', values='Count',
               title="Flight Status Breakdown", hole = 0.5,
-              color_discrete_sequence=['#114538', '#5e8d83', '#d2e1cc']), use_container_width=True)
+              color_discrete_sequence=['#114538', '#5e8d83', '#d2e1cc']))
+
+
 
+# Publish the stage timings (sidebar "perf" expander, logs, Prometheus text)
+perf.report()
 
 
 # Footer
@@ -1,62 +1,77 @@
 
+import dataclasses
+import functools
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from flight_dashboard import charts, perf
+from flight_dashboard.backends import estimated_metrics, load_backend, whole_months
+from flight_dashboard.filters import sidebar_filters
 
 # Page configuration
 st.set_page_config(page_title="Airline Insights", page_icon="📈", layout="wide")
 
-# Load dataset
-@st.cache_data
-def load_data():
-    url = "https://www.dropbox.com/scl/fi/cdrfwk27h6sszbqg2k82b/Flight_Canselled_Delay_C.csv?rlkey=0nnticgct444wwqqjk50ctov4&st=aazxpeja&dl=1"
-    df = pd.read_csv(url, parse_dates=["fl_date"])
-    return df
+# Stage timings for this rerun, when enabled with FLIGHT_PERF=1 or ?perf=1
+perf.start("airline")
 
-df = load_data()
+# Progressive estimates drawn in this run; none are left over from an interrupted one
+charts.begin()
 
 # Sidebar filters
 st.sidebar.markdown("## ✈️ Airline Insights Filters")
 st.sidebar.markdown("---")
 
-min_date = df['fl_date'].min().date()
-max_date = df['fl_date'].max().date()
+# Query backend (pandas by default, DuckDB over Parquet when configured)
+backend = load_backend()
 
-start_date, end_date = st.sidebar.date_input("📅 Select Date Range:", value=(min_date, max_date), min_value=min_date, max_value=max_date)
+# Date range and selections, shared with the other pages of this session;
+# filters are pushed down to the backend together with each group-by
+filters = sidebar_filters(backend, ["airlines", "statuses"])
 
-selected_airline = st.sidebar.multiselect("Select Airline(s):", options=sorted(df['airline'].unique()), default=[])
-selected_status = st.sidebar.multiselect("Select Flight Status:", options=sorted(df['flight_status'].unique()), default=[])
+# Per-airline metrics shared by every section, computed on first use: in progressive
+# mode (FLIGHT_PROGRESSIVE=1 or ?progressive=1) the charts first draw estimates from
+# the stratified sample and only charts.refine() at the end asks for the exact numbers
+@functools.cache
+def airline_metrics():
+    return backend.metrics(filters, ['airline'])
 
-# Filter data
-df_filtered = df[(df['fl_date'] >= pd.to_datetime(start_date)) & (df['fl_date'] <= pd.to_datetime(end_date))]
 
-if selected_airline:
-    df_filtered = df_filtered[df_filtered['airline'].isin(selected_airline)]
-if selected_status:
-    df_filtered = df_filtered[df_filtered['flight_status'].isin(selected_status)]
+@functools.cache
+def estimated_airline_metrics():
+    return estimated_metrics(filters, ['airline'])
 
 
-# tabs for choise
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "❌ Cancellation Analysis", "🕒 Delay Analysis", "🔁 Compare Airlines"])
+# Section navigation; unlike st.tabs, only the selected section runs on each rerun.
+# Figures of sections already visited stay in the figure cache for the same filters
+section = st.radio("Section", ["📊 Overview", "❌ Cancellation Analysis", "🕒 Delay Analysis", "🔁 Compare Airlines"],
+                   horizontal=True, label_visibility="collapsed", key="airline_section")
 
 
-# Top Airlines by Count (overview tab)
-with tab1:
+# Top Airlines by Count (overview section)
+if section == "📊 Overview":
     st.markdown("## 🏆 Top 10 Airlines by Flight Count")
-    top_airlines = df_filtered['airline'].value_counts().nlargest(10).reset_index()
-    top_airlines.columns = ['Airline', 'Flights']
 
-    st.plotly_chart(px.bar(top_airlines, x='Airline', y='Flights',
+    def top_airlines_chart(metrics):
+        top_airlines = metrics.nlargest(10, 'total_flights')[['airline', 'total_flights']]
+        top_airlines.columns = ['Airline', 'Flights']
+
+        return charts.bar(top_airlines, x='Airline', y='Flights',
                 title="Top 10 Airlines by Number of Flights",
                 color='Flights', color_continuous_scale='Tealgrn',
-                template='plotly_white'), use_container_width=True)
+                template='plotly_white')
+
+    charts.show_progressive('top_airlines', filters,
+        lambda: top_airlines_chart(estimated_airline_metrics()),
+        lambda: top_airlines_chart(airline_metrics()))
 
     # Flights Distribution by Time of Day
     st.markdown("## ☀️ Flights Distribution by Time of Day")
 
-    dep_period_counts = df_filtered.groupby(['airline', 'dep_time_Period']).size().reset_index(name='flight_count').sort_values(by= 'flight_count', ascending= False)
+    # Queried inside the builder, so a cached figure skips the query too
+    def dep_period_chart(query):
+        dep_period_counts = query(filters, ['airline', 'dep_time_Period']).rename(columns={'total_flights': 'flight_count'})[['airline', 'dep_time_Period', 'flight_count']].sort_values(by= 'flight_count', ascending= False)
 
-    st.plotly_chart(px.bar(dep_period_counts,
+        return charts.bar(dep_period_counts,
                 x='airline',
                 y='flight_count',
                 color='dep_time_Period',
@@ -64,174 +79,236 @@ with tab1:
                 barmode='group',
                 labels={'flight_count': 'Number of Flights', 'dep_time_Period': 'Time Period'},
                 template='plotly_white',
-                color_discrete_sequence=px.colors.sequential.Tealgrn), use_container_width=True)
+                color_discrete_sequence=px.colors.sequential.Tealgrn)
+
+    charts.show_progressive('dep_period', filters,
+        lambda: dep_period_chart(estimated_metrics), lambda: dep_period_chart(backend.metrics))
 
     
 
 # Cancellation Rate by Airline
-with tab2:
+elif section == "❌ Cancellation Analysis":
     st.markdown("## ❌ Cancellation Rate by Airline")
-    tab1, tab2 = st.tabs(["🥧 Pie Chart", "📊 Bar Chart"])
-
-    cancel_data = df_filtered.groupby("airline").agg(
-        total_flights=('flight_status', 'count'),
-        cancelled_flights=('flight_status', lambda x: (x == 'Cancelled').sum())).reset_index()
-
-    cancel_data['cancellation_rate'] = (cancel_data['cancelled_flights'] / cancel_data['total_flights']) * 100
+    # Fragment: switching pie/bar reruns only this part of the section
+    @st.fragment
+    def cancel_chart_section(filters, airline_metrics):
+        with perf.fragment("cancel_chart"):
+            # A fragment rerun does not run the page's charts.begin(); nothing drawn
+            # before this fragment in the section waits for refining
+            charts.begin()
+            chart_type = st.radio("Chart Type", ["🥧 Pie Chart", "📊 Bar Chart"], horizontal=True, label_visibility="collapsed", key="cancel_chart_type")
+
+            if chart_type == "🥧 Pie Chart":
+                def cancel_pie_chart(metrics):
+                    return charts.pie(metrics, names="airline", values="cancellation_rate",
+                        title="Pie Chart: Cancellation Rate Distribution",
+                        color_discrete_sequence=px.colors.sequential.Tealgrn)
+
+                charts.show_progressive('cancel_pie', filters,
+                    lambda: cancel_pie_chart(estimated_airline_metrics()),
+                    lambda: cancel_pie_chart(airline_metrics()))
+
+            else:  # Bar Chart
+                def cancel_bar_chart(metrics):
+                    cancel_data = metrics.sort_values(by="cancellation_rate", ascending=False)
+                    return charts.bar(cancel_data,
+                        x="airline", y="cancellation_rate",
+                        title="Bar Chart: Cancellation Rate by Airline (%)",
+                        labels={"airline": "Airline", "cancellation_rate": "Cancellation Rate (%)"},
+                        color="cancellation_rate", color_continuous_scale='Tealgrn',
+                        template="plotly_white", **charts.error_bars(cancel_data, "cancellation_rate"))
+
+                charts.show_progressive('cancel_bar', filters,
+                    lambda: cancel_bar_chart(estimated_airline_metrics()),
+                    lambda: cancel_bar_chart(airline_metrics()))
+
+            # Exact figures for the estimates drawn in this fragment
+            charts.refine()
+
+    cancel_chart_section(filters, airline_metrics)
 
     # Monthly Cancellation Rate per Airline
     st.markdown("## 📉 Monthly Cancellation Rate per Airline")
 
-    df_filtered['month'] = df_filtered['fl_date'].dt.to_period('M').astype(str)
-    monthly_cancel = df_filtered.groupby(['month', 'airline'])['cancelled'].mean().reset_index()
+    def monthly_cancel_chart(query):
+        monthly_cancel = query(filters, ['year_month', 'airline']).rename(columns={'year_month': 'month'})
 
-    st.plotly_chart(px.line(monthly_cancel, x='month', y='cancelled', color='airline',
+        return charts.line(monthly_cancel, x='month', y='cancellation_rate', color='airline',
                 title='Monthly Cancellation Rate per Airline',
-                labels={'cancelled': 'Cancellation Rate'},
-                template='plotly_white', color_discrete_sequence=px.colors.sequential.Tealgrn), use_container_width=True)
-
-
-    with tab1:  # Pie Chart
-        st.plotly_chart(
-            px.pie(cancel_data, names="airline", values="cancellation_rate",
-                title="Pie Chart: Cancellation Rate Distribution",
-                color_discrete_sequence=px.colors.sequential.Tealgrn), use_container_width=True)
+                labels={'cancellation_rate': 'Cancellation Rate (%)'},
+                template='plotly_white', color_discrete_sequence=px.colors.sequential.Tealgrn)
 
-
-    with tab2:  # Bar Chart
-        st.plotly_chart(
-            px.bar(cancel_data.sort_values(by="cancellation_rate", ascending=False),
-                x="airline", y="cancellation_rate",
-                title="Bar Chart: Cancellation Rate by Airline (%)",
-                labels={"airline": "Airline", "cancellation_rate": "Cancellation Rate (%)"},
-                color="cancellation_rate", color_continuous_scale='Tealgrn',
-                template="plotly_white"), use_container_width=True)
+    charts.show_progressive('monthly_cancel', filters,
+        lambda: monthly_cancel_chart(estimated_metrics), lambda: monthly_cancel_chart(backend.metrics))
 
 
 
 
 # Average Delay by Airline
-with tab3:
+elif section == "🕒 Delay Analysis":
     st.markdown("## 🕒 Average Departure Delay by Airline")
 
-    avg_delay = df_filtered.groupby('airline')['dep_delay'].mean().reset_index().sort_values(by='dep_delay', ascending=False)
+    def avg_dep_delay_chart(metrics):
+        avg_delay = metrics.rename(columns={'avg_dep_delay': 'dep_delay', 'avg_dep_delay_ci': 'dep_delay_ci'}).sort_values(by='dep_delay', ascending=False)
 
-    st.plotly_chart(px.bar(avg_delay, x='airline', y='dep_delay',
+        return charts.bar(avg_delay, x='airline', y='dep_delay',
                 title='Average Departure Delay (in minutes)',
                 labels={'airline': 'Airline', 'dep_delay': 'Avg Departure Delay'},
                 color='dep_delay', color_continuous_scale='Tealgrn',
-                template='plotly_white'), use_container_width=True)
+                template='plotly_white', **charts.error_bars(avg_delay, 'dep_delay'))
+
+    charts.show_progressive('avg_dep_delay', filters,
+        lambda: avg_dep_delay_chart(estimated_airline_metrics()),
+        lambda: avg_dep_delay_chart(airline_metrics()))
     
     # for arr delay
     st.markdown("## 🕒 Average Arrival Delay by Airline")
 
-    avg_delay = df_filtered.groupby('airline')['arr_delay'].mean().reset_index().sort_values(by='arr_delay', ascending=False)
+    def avg_arr_delay_chart(metrics):
+        avg_delay = metrics.rename(columns={'avg_arr_delay': 'arr_delay', 'avg_arr_delay_ci': 'arr_delay_ci'}).sort_values(by='arr_delay', ascending=False)
 
-    st.plotly_chart(px.bar(avg_delay, x='airline', y='arr_delay',
+        return charts.bar(avg_delay, x='airline', y='arr_delay',
                 title='Average Departure Delay (in minutes)',
                 labels={'airline': 'Airline', 'arr_delay': 'Avg Departure Delay'},
                 color='arr_delay', color_continuous_scale='Tealgrn',
-                template='plotly_white'), use_container_width=True)
+                template='plotly_white', **charts.error_bars(avg_delay, 'arr_delay'))
+
+    charts.show_progressive('avg_arr_delay', filters,
+        lambda: avg_arr_delay_chart(estimated_airline_metrics()),
+        lambda: avg_arr_delay_chart(airline_metrics()))
+
+    # Percentiles, merged from the precomputed delay sketches; unlike the means
+    # above they are not dominated by a few multi-hour delays
+    st.markdown("## 📏 Delay Percentiles by Airline")
+    months = whole_months(filters)
+    st.caption(f"Percentiles cover whole calendar months: {months.start:%d %b %Y} – {months.end:%d %b %Y}")
+
+    def delay_percentile_chart(delay, title):
+        percentiles = backend.delay_percentiles(filters, 'airline', delay).sort_values(by='p90', ascending=False)
+        return charts.percentile_bars(percentiles, 'airline', title=title,
+                labels={'airline': 'Airline', 'delay': 'Delay (minutes)', 'percentile': 'Percentile'},
+                template='plotly_white', color_discrete_sequence=['#94d2bd', '#0a9396', '#005f73'])
+
+    charts.show_cached('dep_delay_percentiles', filters,
+        lambda: delay_percentile_chart('dep_delay', 'Departure Delay p50 / p90 / p99 (minutes)'))
+    charts.show_cached('arr_delay_percentiles', filters,
+        lambda: delay_percentile_chart('arr_delay', 'Arrival Delay p50 / p90 / p99 (minutes)'))
+
+    def dep_delay_box_chart():
+        percentiles = backend.delay_percentiles(filters, 'airline', 'dep_delay').sort_values(by='p50', ascending=False)
+        return charts.percentile_box(percentiles, 'airline',
+                title='Departure Delay Spread (box p25-p75, whiskers p10-p90)')
+
+    charts.show_cached('dep_delay_box', filters, dep_delay_box_chart)
+
+    def monthly_percentile_chart():
+        monthly = backend.delay_percentiles(filters, 'airline', 'dep_delay', by='year_month').rename(columns={'year_month': 'month'})
+        return charts.line(monthly.melt(id_vars='month', value_vars=['p50', 'p90', 'p99'], var_name='percentile', value_name='delay'),
+                x='month', y='delay', color='percentile', title='Monthly Departure Delay Percentiles',
+                labels={'month': 'Month', 'delay': 'Delay (minutes)', 'percentile': 'Percentile'},
+                template='plotly_white', color_discrete_sequence=['#94d2bd', '#0a9396', '#005f73'])
+
+    charts.show_cached('monthly_delay_percentiles', filters, monthly_percentile_chart)
 
 
 # compare between 2 Airline
-with tab4:
-    st.markdown("## ✈️ Compare Airlines")
-
-    airlines_to_compare = st.multiselect(
-        "Select up to 2 Airlines to Compare:",
-        options=df_filtered['airline'].unique(),
-        default=df_filtered['airline'].unique()[:2],
-        max_selections=2
-    )
-
-    if len(airlines_to_compare) == 2:
-        compare_df = df_filtered[df_filtered['airline'].isin(airlines_to_compare)]
-
-        # Total per airlinee
-        compare_grouped = compare_df.groupby('airline').agg(
-            total_flights=('flight_status', 'count'),
-            cancelled_flights=('flight_status', lambda x: (x == 'Cancelled').sum()),
-            avg_delay=('dep_delay', 'mean')
-        ).reset_index()
-
-        compare_grouped['cancellation_rate'] = (compare_grouped['cancelled_flights'] / compare_grouped['total_flights']) * 100
-
-        # Kpis
-        st.markdown("### 📌 Key Metrics")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.metric(label=f"{airlines_to_compare[0]} - Total Flights", value=compare_grouped.loc[0, 'total_flights'])
-            st.metric(label=f"{airlines_to_compare[0]} - Cancellation Rate", value=f"{compare_grouped.loc[0, 'cancellation_rate']:.2f}%")
-            st.metric(label=f"{airlines_to_compare[0]} - Avg Delay", value=f"{compare_grouped.loc[0, 'avg_delay']:.2f} min")
-
-        with col2:
-            st.metric(label=f"{airlines_to_compare[1]} - Total Flights", value=compare_grouped.loc[1, 'total_flights'])
-            st.metric(label=f"{airlines_to_compare[1]} - Cancellation Rate", value=f"{compare_grouped.loc[1, 'cancellation_rate']:.2f}%")
-            st.metric(label=f"{airlines_to_compare[1]} - Avg Delay", value=f"{compare_grouped.loc[1, 'avg_delay']:.2f} min")
-
-        # Comparison Table
-        st.markdown("### 📊 Comparison Table")
-        st.dataframe(compare_grouped)
-
-        # charts
-        st.markdown("### 📈 Comparison Charts")
-        st.plotly_chart(
-            px.bar(compare_grouped, x='airline', y='total_flights',
-                title="Total Flights per Airline", color='total_flights',
-                color_continuous_scale='Tealgrn', template='plotly_white',
-                labels = {'airline' : 'AirLine', 'total_flights': 'Number Of Flights'},
-                text_auto=True),
-            use_container_width=True)
-
-        st.plotly_chart(
-            px.bar(compare_grouped, x='airline', y='cancellation_rate',
-                title="Cancellation Rate (%) per Airline", color='cancellation_rate',
-                color_continuous_scale='Tealgrn', template='plotly_white',
-                labels = {'airline' : 'AirLine', 'cancellation_rate': 'Cancellation Rate'},
-                text_auto='.2f'),
-            use_container_width=True)
-
-        st.plotly_chart(
-            px.bar(compare_grouped, x='airline', y='avg_delay',
-                title="Average Delay (minutes) per Airline", color='avg_delay',
-                color_continuous_scale='Tealgrn', template='plotly_white',
-                labels = {'airline' : 'AirLine', 'avg_delay': 'Avg Delay (min)'},
-                text_auto='.2f'),
-            use_container_width=True)
-
-        # Monthly Comparison
-        st.markdown("### 🗓️ Monthly Comparison")
-
-        monthly_compare = compare_df.copy()
-        monthly_compare['month'] = monthly_compare['fl_date'].dt.to_period('M').astype(str)
-
-        monthly_summary = monthly_compare.groupby(['month', 'airline']).agg(
-            total_flights=('flight_status', 'count'),
-            cancelled_flights=('flight_status', lambda x: (x == 'Cancelled').sum()),
-            avg_delay=('dep_delay', 'mean')
-        ).reset_index()
-
-        monthly_summary['cancellation_rate'] = (monthly_summary['cancelled_flights'] / monthly_summary['total_flights']) * 100
-
-        st.plotly_chart(px.line(monthly_summary, x='month', y='total_flights', color='airline',
-                      title='Monthly Flight Count per Airline',
-                      labels = {'month' : 'Month (year)', 'total_flights': 'Total Flights'},
-                      template='plotly_white'), use_container_width=True)
-        
-        
-        # Analysis insight 
-        st.markdown("### 🧠 Insight")
-
-        if compare_grouped.loc[0, 'avg_delay'] > compare_grouped.loc[1, 'avg_delay']:
-            worst_airline = compare_grouped.loc[0, 'airline']
-        else:
-            worst_airline = compare_grouped.loc[1, 'airline']
-
-        st.info(f"📌 Based on the current data, **{worst_airline}** has a higher average delay.")
+else:
+    # Fragment: picking airlines to compare reruns only this section, with the
+    # filters and per-airline metrics of the last full run
+    @st.fragment
+    def compare_airlines_section(filters, airline_metrics):
+        with perf.fragment("compare_airlines"):
+            st.markdown("## ✈️ Compare Airlines")
+
+            airlines_to_compare = st.multiselect(
+                "Select up to 2 Airlines to Compare:",
+                options=airline_metrics()['airline'].tolist(),
+                default=airline_metrics()['airline'].tolist()[:2],
+                max_selections=2
+            )
+
+            if len(airlines_to_compare) == 2:
+                compare_filters = dataclasses.replace(filters, airlines=tuple(airlines_to_compare))
+
+                # Total per airlinee
+                compare_grouped = backend.metrics(compare_filters, ['airline']).reset_index(drop=True).rename(columns={'avg_dep_delay': 'avg_delay'})
+                compare_grouped = compare_grouped[['airline', 'total_flights', 'cancelled_flights', 'avg_delay', 'cancellation_rate']]
+
+                # Kpis
+                st.markdown("### 📌 Key Metrics")
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    st.metric(label=f"{airlines_to_compare[0]} - Total Flights", value=compare_grouped.loc[0, 'total_flights'])
+                    st.metric(label=f"{airlines_to_compare[0]} - Cancellation Rate", value=f"{compare_grouped.loc[0, 'cancellation_rate']:.2f}%")
+                    st.metric(label=f"{airlines_to_compare[0]} - Avg Delay", value=f"{compare_grouped.loc[0, 'avg_delay']:.2f} min")
+
+                with col2:
+                    st.metric(label=f"{airlines_to_compare[1]} - Total Flights", value=compare_grouped.loc[1, 'total_flights'])
+                    st.metric(label=f"{airlines_to_compare[1]} - Cancellation Rate", value=f"{compare_grouped.loc[1, 'cancellation_rate']:.2f}%")
+                    st.metric(label=f"{airlines_to_compare[1]} - Avg Delay", value=f"{compare_grouped.loc[1, 'avg_delay']:.2f} min")
+
+                # Comparison Table
+                st.markdown("### 📊 Comparison Table")
+                st.dataframe(compare_grouped)
+
+                # charts
+                st.markdown("### 📈 Comparison Charts")
+                charts.show_cached('compare_flights', compare_filters,
+                    lambda: charts.bar(compare_grouped, x='airline', y='total_flights',
+                        title="Total Flights per Airline", color='total_flights',
+                        color_continuous_scale='Tealgrn', template='plotly_white',
+                        labels = {'airline' : 'AirLine', 'total_flights': 'Number Of Flights'},
+                        text_auto=True))
+
+                charts.show_cached('compare_cancellation', compare_filters,
+                    lambda: charts.bar(compare_grouped, x='airline', y='cancellation_rate',
+                        title="Cancellation Rate (%) per Airline", color='cancellation_rate',
+                        color_continuous_scale='Tealgrn', template='plotly_white',
+                        labels = {'airline' : 'AirLine', 'cancellation_rate': 'Cancellation Rate'},
+                        text_auto='.2f'))
+
+                charts.show_cached('compare_delay', compare_filters,
+                    lambda: charts.bar(compare_grouped, x='airline', y='avg_delay',
+                        title="Average Delay (minutes) per Airline", color='avg_delay',
+                        color_continuous_scale='Tealgrn', template='plotly_white',
+                        labels = {'airline' : 'AirLine', 'avg_delay': 'Avg Delay (min)'},
+                        text_auto='.2f'))
+
+                # Monthly Comparison
+                st.markdown("### 🗓️ Monthly Comparison")
+
+                def monthly_compare_chart():
+                    monthly_summary = backend.metrics(compare_filters, ['year_month', 'airline']).rename(columns={'year_month': 'month'})
+
+                    return charts.line(monthly_summary, x='month', y='total_flights', color='airline',
+                              title='Monthly Flight Count per Airline',
+                              labels = {'month' : 'Month (year)', 'total_flights': 'Total Flights'},
+                              template='plotly_white')
+
+                charts.show_cached('compare_monthly', compare_filters, monthly_compare_chart)
+
+
+                # Analysis insight 
+                st.markdown("### 🧠 Insight")
+
+                if compare_grouped.loc[0, 'avg_delay'] > compare_grouped.loc[1, 'avg_delay']:
+                    worst_airline = compare_grouped.loc[0, 'airline']
+                else:
+                    worst_airline = compare_grouped.loc[1, 'airline']
+
+                st.info(f"📌 Based on the current data, **{worst_airline}** has a higher average delay.")
+
+    compare_airlines_section(filters, airline_metrics)
+
+
+
 
+# Exact figures for the estimates drawn in this run
+charts.refine()
 
+# Publish the stage timings (sidebar "perf" expander, logs, Prometheus text)
+perf.report()
 
 
 # Footer
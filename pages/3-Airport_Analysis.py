@@ -1,86 +1,174 @@
 
-import streamlit as st
 import pandas as pd
-import plotly.express as px
+import streamlit as st
+from flight_dashboard import charts, perf
+from flight_dashboard.backends import FlightFilter, load_backend, whole_months
+from flight_dashboard.filters import sidebar_filters
 
 # Page configuration
 st.set_page_config(page_title="Airport Analysis", page_icon="🛫", layout="wide")
+
+# Stage timings for this rerun, when enabled with FLIGHT_PERF=1 or ?perf=1
+perf.start("airport")
+
 st.title("🛫 Airport Analysis")
 
-# Load dataset
-@st.cache_data
-def load_data():
-    url = "https://www.dropbox.com/scl/fi/cdrfwk27h6sszbqg2k82b/Flight_Canselled_Delay_C.csv?rlkey=0nnticgct444wwqqjk50ctov4&st=aazxpeja&dl=1"
-    df = pd.read_csv(url, parse_dates=["fl_date"])
-    return df
+# Query backend (pandas by default, DuckDB over Parquet when configured)
+backend = load_backend()
 
-df = load_data()
+# Airport index: per airport x side x month sums built once at load time; the
+# rankings and comparisons below sum its cells instead of rescanning flights.
+# The index is monthly, so the date range is widened to whole months
+airport_index = backend.airport_index()
 
-# Sidebar - Airport selection
+# Sidebar - Airport selection over every airport, busiest first; the search box
+# matches codes and city names. The selection is shared with the other pages of this session
 st.sidebar.header("✈️ Filter Airports")
-airport_options = df['origin'].value_counts().head(20).index.tolist()
-selected_airports = st.sidebar.multiselect("Select Origin Airports", airport_options, default=[])
+filters = sidebar_filters(backend, ["origins"], options={"origins": airport_index.codes},
+                          labels={"origins": lambda code: airport_index.labels.get(code, code)})
+# Rates and averages over a handful of flights say little, so thin airports are left out of the rankings
+min_flights = st.sidebar.number_input("Minimum flights per airport", min_value=1, value=500, step=100, key="airport_min_flights")
+first_month = filters.start.year * 100 + filters.start.month
+last_month = filters.end.year * 100 + filters.end.month
 
 
+def airport_metrics(side, airports=None, by=("airport",)):
+    """Metrics of the selected (or given) airports as origins or as destinations."""
+    with perf.stage(f"airports:{side},{','.join(by)}") as record:
+        metrics = airport_index.metrics(side, by, first_month, last_month, filters.origins if airports is None else airports)
+        record.rows_out = len(metrics)
+    return metrics
 
 
-if selected_airports:
-    df = df[df['origin'].isin(selected_airports)]
+origin_metrics = airport_metrics('origin')
+ranked_origins = origin_metrics[origin_metrics['total_flights'] >= min_flights]
 
 
-# Tabs for different analyses
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "❌ Cancellation Analysis", "⏱️ Delay Analysis", "🔍 Compare Airports"])
+# Section navigation; unlike st.tabs, only the selected section runs on each rerun.
+# Figures of sections already visited stay in the figure cache for the same filters
+section = st.radio("Section", ["📊 Overview", "❌ Cancellation Analysis", "⏱️ Delay Analysis", "🔍 Compare Airports"],
+                   horizontal=True, label_visibility="collapsed", key="airport_section")
 
-with tab1:
+if section == "📊 Overview":
     st.subheader("Top 10 Crowded Airports")
-    origin_counts = df['origin'].value_counts().head(10).reset_index()
+    origin_counts = origin_metrics.nlargest(10, 'total_flights')[['airport', 'total_flights']]
     origin_counts.columns = ['Origin Airport', 'Flight Count']
-    st.plotly_chart(px.bar(origin_counts, x='Origin Airport', y='Flight Count', 
-                    color_continuous_scale='Tealgrn', color= 'Flight Count'), use_container_width=True)
+    charts.show_cached('top_airports', filters, lambda: charts.bar(origin_counts, x='Origin Airport', y='Flight Count', 
+                    color_continuous_scale='Tealgrn', color= 'Flight Count'))
 
 
-with tab2:
+elif section == "❌ Cancellation Analysis":
     st.subheader("Cancellation Rate by Airport")
-    cancel_rate = df.groupby('origin')['cancelled'].mean().sort_values(ascending=False).head(10).reset_index()
-    cancel_rate.columns = ['Origin Airport', 'Cancellation Rate']
-    st.plotly_chart(px.bar(cancel_rate, x='Origin Airport', y='Cancellation Rate', title='Top 10 Airports by Cancellation Rate',
-                     color='Cancellation Rate', color_continuous_scale='Tealgrn'), use_container_width=True)
+    st.caption(f"Airports with at least {min_flights:,} departures in the selected period")
+    cancel_rate = ranked_origins.nlargest(10, 'cancellation_rate')[['airport', 'cancellation_rate']]
+    cancel_rate.columns = ['Origin Airport', 'Cancellation Rate (%)']
+    if cancel_rate.empty:
+        st.info("No airport has that many flights in the selected period.")
+    else:
+        charts.show_cached('cancel_rate', (filters, min_flights), lambda: charts.bar(cancel_rate, x='Origin Airport', y='Cancellation Rate (%)', title='Top 10 Airports by Cancellation Rate',
+                         color='Cancellation Rate (%)', color_continuous_scale='Tealgrn'))
 
 
-with tab3:
+elif section == "⏱️ Delay Analysis":
     st.subheader("Top 10 Airports by Average Departure Delay")
-    dep_delay = df.groupby('origin')['dep_delay'].mean().sort_values(ascending=False).head(10).reset_index()
+    st.caption(f"Airports with at least {min_flights:,} departures (arrivals for the arrival delay) in the selected period")
+    dep_delay = ranked_origins.nlargest(10, 'avg_dep_delay')[['airport', 'avg_dep_delay']]
     dep_delay.columns = ['Origin Airport', 'Average Departure Delay']
-    fig_dep = px.bar(dep_delay, x='Origin Airport', y='Average Departure Delay', 
-                     color='Average Departure Delay', color_continuous_scale='Tealgrn',
-                     title='Top 10 Airports by Average Departure Delay')
-    st.plotly_chart(fig_dep, use_container_width=True)
+    if dep_delay.empty:
+        st.info("No airport has that many flights in the selected period.")
+    else:
+        charts.show_cached('dep_delay', (filters, min_flights), lambda: charts.bar(dep_delay, x='Origin Airport', y='Average Departure Delay',
+                         color='Average Departure Delay', color_continuous_scale='Tealgrn',
+                         title='Top 10 Airports by Average Departure Delay'))
 
     st.subheader("Top 10 Airports by Average Arrival Delay")
-    arr_delay = df.groupby('dest')['arr_delay'].mean().sort_values(ascending=False).head(10).reset_index()
+
+    # Arrivals at the selected airports, from the destination side of the index
+    dest_metrics = airport_metrics('dest')
+    arr_delay = dest_metrics[dest_metrics['total_flights'] >= min_flights].nlargest(10, 'avg_arr_delay')[['airport', 'avg_arr_delay']]
     arr_delay.columns = ['Destination Airport', 'Average Arrival Delay']
-    fig_arr = px.bar(arr_delay, x='Destination Airport', y='Average Arrival Delay',
-                     color='Average Arrival Delay', color_continuous_scale='Tealgrn',
-                     title='Top 10 Airports by Average Arrival Delay')
-    st.plotly_chart(fig_arr, use_container_width=True)
-
-
-with tab4:
-    st.subheader("Compare Two Airports")
-    airport_compare = st.multiselect("Select Two Airports to Compare", df['origin'].unique(), default=df['origin'].unique()[:2])
-
-    if len(airport_compare) == 2:
-        airport_df = df[df['origin'].isin(airport_compare)]
-        comp_stats = airport_df.groupby('origin').agg({
-            'dep_delay': 'mean',
-            'arr_delay': 'mean',
-            'cancelled': 'mean'}).reset_index()
-
-        st.plotly_chart(px.bar(
-            comp_stats.melt(id_vars='origin', var_name='Metric', value_name='Value'),
-            x='origin', y='Value', color='Metric', barmode='group',
-            title='Airport Comparison: Cancellation Rate & Delay',
-            color_discrete_sequence=['#005f73', '#0a9396', '#ee9b00']), use_container_width=True)
+    if arr_delay.empty:
+        st.info("No airport has that many flights in the selected period.")
+    else:
+        charts.show_cached('arr_delay', (filters, min_flights), lambda: charts.bar(arr_delay, x='Destination Airport', y='Average Arrival Delay',
+                         color='Average Arrival Delay', color_continuous_scale='Tealgrn',
+                         title='Top 10 Airports by Average Arrival Delay'))
+
+    # Percentiles of the selected airports (or the top 20), merged from the precomputed delay sketches
+    st.subheader("Delay Percentiles by Airport")
+    months = whole_months(filters)
+    st.caption(f"Percentiles cover whole calendar months: {months.start:%d %b %Y} – {months.end:%d %b %Y}")
+    percentile_filters = FlightFilter(filters.start, filters.end, origins=filters.origins or tuple(airport_index.codes[:20]))
+
+    def airport_percentile_chart(delay, title):
+        percentiles = backend.delay_percentiles(percentile_filters, 'origin', delay).sort_values(by='p90', ascending=False)
+        return charts.percentile_bars(percentiles, 'origin', title=title,
+                labels={'origin': 'Origin Airport', 'delay': 'Delay (minutes)', 'percentile': 'Percentile'},
+                color_discrete_sequence=['#94d2bd', '#0a9396', '#005f73'])
+
+    charts.show_cached('airport_dep_percentiles', percentile_filters,
+        lambda: airport_percentile_chart('dep_delay', 'Departure Delay p50 / p90 / p99 (minutes)'))
+    charts.show_cached('airport_arr_percentiles', percentile_filters,
+        lambda: airport_percentile_chart('arr_delay', 'Arrival Delay p50 / p90 / p99 of Departing Flights (minutes)'))
+
+    def airport_box_chart():
+        percentiles = backend.delay_percentiles(percentile_filters, 'origin', 'dep_delay').sort_values(by='p50', ascending=False)
+        return charts.percentile_box(percentiles, 'origin',
+                title='Departure Delay Spread (box p25-p75, whiskers p10-p90)')
+
+    charts.show_cached('airport_dep_box', percentile_filters, airport_box_chart)
+
+
+else:
+    # Fragment: picking airports to compare reruns only this section, with the
+    # filters of the last full run. Any number of airports is a lookup in the index
+    @st.fragment
+    def compare_airports_section(filters):
+        with perf.fragment("compare_airports"):
+            st.subheader("Compare Airports")
+            options = list(filters.origins) or airport_index.codes
+            airport_compare = st.multiselect("Select Airports to Compare (code or city)", options, default=options[:2],
+                                             format_func=lambda code: airport_index.labels.get(code, code), key="airport_compare")
+
+            if len(airport_compare) >= 2:
+                departures = airport_metrics('origin', airport_compare).set_index('airport')
+                arrivals = airport_metrics('dest', airport_compare).set_index('airport')
+                comp_stats = pd.DataFrame({
+                    'Airport': departures['label'],
+                    'Departures': departures['total_flights'],
+                    'Arrivals': arrivals['total_flights'],
+                    'Avg Dep Delay': departures['avg_dep_delay'],
+                    'Avg Arr Delay': arrivals['avg_arr_delay'],
+                    'Cancellation Rate (%)': departures['cancellation_rate'],
+                }).reindex(airport_compare).dropna(subset=['Airport'])
+                st.dataframe(comp_stats, hide_index=True)
+
+                # Delays (minutes) and the cancellation rate (%) get a chart each, so neither
+                # is read off the other's axis
+                chart_stats = comp_stats.reset_index()
+                col1, col2 = st.columns(2)
+                with col1:
+                    charts.show_cached('compare_airports_delay', (filters, airport_compare), lambda: charts.bar(
+                        chart_stats.melt(id_vars='airport', value_vars=['Avg Dep Delay', 'Avg Arr Delay'],
+                                         var_name='Metric', value_name='Delay'),
+                        x='airport', y='Delay', color='Metric', barmode='group',
+                        title='Airport Comparison: Average Delay',
+                        labels={'airport': 'Airport', 'Delay': 'Average Delay (minutes)'},
+                        color_discrete_sequence=['#005f73', '#0a9396']))
+                with col2:
+                    charts.show_cached('compare_airports_cancel', (filters, airport_compare), lambda: charts.bar(
+                        chart_stats, x='airport', y='Cancellation Rate (%)',
+                        title='Airport Comparison: Cancellation Rate',
+                        labels={'airport': 'Airport'},
+                        color_discrete_sequence=['#ee9b00']))
+            else:
+                st.info("Pick at least two airports to compare.")
+
+    compare_airports_section(filters)
+
+
+# Publish the stage timings (sidebar "perf" expander, logs, Prometheus text)
+perf.report()
 
 
 # Footer
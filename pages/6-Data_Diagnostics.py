@@ -0,0 +1,90 @@
+import streamlit as st
+import pandas as pd
+from flight_dashboard import charts, data
+from flight_dashboard.backends import load_backend
+from flight_dashboard.filters import sidebar_filters
+
+# Page configuration
+st.set_page_config(page_title="Data Diagnostics", page_icon="🧮", layout="wide")
+st.title("🧮 Data Diagnostics")
+
+if data.is_partitioned():
+    # Partitioned datasets are loaded month-window by month-window, as on the analysis
+    # pages, so only the partitions of the shared date range are read here too
+    st.sidebar.header("🧮 Data Window")
+    filters = sidebar_filters(load_backend(), [])
+    window = data.data_window(filters.start, filters.end)
+    df = data.load_window(window)
+    (first_year, first_month), (last_year, last_month) = window
+    months = (last_year - first_year) * 12 + last_month - first_month + 1
+    st.caption(f"Partitioned dataset: the figures below describe only the {months} month partition(s) of the selected "
+               f"date range ({first_year}-{first_month:02d} to {last_year}-{last_month:02d}), the window the analysis pages load.")
+else:
+    # Load dataset (shared, loaded once per server process)
+    df = data.load_data()
+
+# Memory held by the loaded frame
+bytes_now = df.memory_usage(deep=True, index=False)
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Rows", f"{len(df):,}")
+col2.metric("Columns", df.shape[1])
+col3.metric("Memory in use", f"{bytes_now.sum() / 2**20:,.1f} MiB")
+
+# Before / after dtype policy
+st.markdown("## 📦 Memory per Column")
+
+report = data.load_memory_report()
+
+if report is None:
+    if data.is_partitioned():
+        st.info("Partitioned datasets are read without a Parquet cache, so no before/after report was recorded.")
+    else:
+        st.info("No memory report was recorded for this cache. Delete the `.cache/` directory and reload to rebuild it.")
+    report = pd.DataFrame({"column": bytes_now.index, "dtype_after": df.dtypes.astype(str).values, "bytes_after": bytes_now.values})
+else:
+    total_before, total_after = report["bytes_before"].sum(), report["bytes_after"].sum()
+    st.metric("Total (raw CSV dtypes → compact dtypes)", f"{total_after / 2**20:,.1f} MiB",
+              delta=f"-{(1 - total_after / total_before) * 100:.1f}% vs {total_before / 2**20:,.1f} MiB", delta_color="inverse")
+
+    chart_df = report.melt(id_vars="column", value_vars=["bytes_before", "bytes_after"], var_name="Stage", value_name="Bytes")
+    charts.show(charts.bar(chart_df, x="column", y="Bytes", color="Stage", barmode="group",
+                           title="Bytes per Column Before and After the Dtype Policy",
+                           labels={"column": "Column"}, template="plotly_white",
+                           color_discrete_sequence=["#5e8d83", "#114538"]), "memory_per_column")
+
+st.dataframe(report, use_container_width=True, hide_index=True)
+
+# Container sizing
+st.markdown("## 📐 Projected Memory")
+target_rows = st.number_input("Rows to size for:", min_value=1, value=10_000_000, step=1_000_000)
+if len(df):
+    bytes_per_row = report["bytes_after"].sum() / len(df)
+    st.write(f"About **{bytes_per_row:.0f} bytes/row**, so {target_rows:,} rows need roughly "
+             f"**{bytes_per_row * target_rows / 2**30:,.2f} GiB** for the frame alone.")
+else:
+    st.info("The selected date range holds no flights to size from.")
+
+# Chart payloads
+st.markdown("## 📡 Chart Payloads")
+payloads = st.session_state.get("chart_payloads", {})
+if payloads:
+    payload_df = pd.DataFrame({"chart": list(payloads), "KiB": [size / 1024 for size in payloads.values()]})
+    st.write(f"Figure JSON sent to the browser by the charts rendered in this session: **{payload_df['KiB'].sum():,.1f} KiB** in total.")
+    st.dataframe(payload_df.sort_values("KiB", ascending=False).round(1), use_container_width=True, hide_index=True)
+else:
+    st.info("Open one of the analysis pages to record the size of its charts.")
+
+figure_cache = charts.load_figure_cache()
+lookups = figure_cache.hits + figure_cache.misses
+st.write(f"Figure cache: **{len(figure_cache)}/{figure_cache.max_entries}** figures, "
+         f"{figure_cache.hits:,} hits / {lookups:,} lookups since the server started.")
+
+
+# Footer
+st.markdown("""---""")
+st.markdown("""
+    <p style='text-align: center; font-size: 14px;'>
+        © 2025 | Developed by <strong>Ahmed Shlaby</strong> | 📧 <a href="mailto:shalabyahmed299@gmail.com">Contact</a>
+    </p>
+""", unsafe_allow_html=True)
@@ -0,0 +1,131 @@
+import streamlit as st
+from flight_dashboard import charts, perf
+from flight_dashboard.backends import label_months, load_backend
+from flight_dashboard.filters import sidebar_filters
+
+# Page configuration
+st.set_page_config(page_title="Route Analysis", page_icon="🛣️", layout="wide")
+
+# Stage timings for this rerun, when enabled with FLIGHT_PERF=1 or ?perf=1
+perf.start("route")
+
+st.title("🛣️ Route Analysis")
+
+# Query backend (pandas by default, DuckDB over Parquet when configured)
+backend = load_backend()
+
+# Sidebar filters, shared with the other pages of this session
+st.sidebar.header("🛣️ Filter Routes")
+filters = sidebar_filters(backend, ["airlines"])
+
+# Route index: per route x month x airline sums built once at load time; every
+# ranking, search and drill-down below sums its cells instead of rescanning flights.
+# The index is monthly, so the date range is widened to whole months
+routes = backend.route_index()
+first_month = filters.start.year * 100 + filters.start.month
+last_month = filters.end.year * 100 + filters.end.month
+
+
+def route_metrics(by=("route_id",), airlines=None, route_ids=None):
+    with perf.stage(f"routes:{','.join(by)}") as record:
+        metrics = routes.metrics(by, first_month, last_month, filters.airlines if airlines is None else airlines, route_ids)
+        record.rows_out = len(metrics)
+    return metrics
+
+
+# Ranking -> (metric column, axis label)
+RANKINGS = {
+    "Number of flights": ("total_flights", "Flights"),
+    "Average arrival delay": ("avg_arr_delay", "Avg Arrival Delay (min)"),
+    "Average departure delay": ("avg_dep_delay", "Avg Departure Delay (min)"),
+    "Cancellation rate": ("cancellation_rate", "Cancellation Rate (%)"),
+}
+TABLE_COLUMNS = {'route': 'Route', 'total_flights': 'Flights', 'avg_dep_delay': 'Avg Dep Delay',
+                 'avg_arr_delay': 'Avg Arr Delay', 'cancellation_rate': 'Cancellation Rate (%)', 'avg_distance': 'Distance'}
+
+
+# Section navigation; unlike st.tabs, only the selected section runs on each rerun
+section = st.radio("Section", ["🏆 Top Routes", "🔎 Route Search", "✈️ Airline Routes"],
+                   horizontal=True, label_visibility="collapsed", key="route_section")
+
+if section == "🏆 Top Routes":
+    st.subheader("Top City Pairs")
+    col1, col2, col3 = st.columns(3)
+    ranking = col1.selectbox("Rank by", list(RANKINGS), key="route_ranking")
+    top_n = col2.slider("Routes shown", 5, 50, 10, key="route_top_n")
+    # Averages over a handful of flights say little, so thin routes can be left out
+    min_flights = col3.number_input("Minimum flights per route", min_value=1, value=50, step=25, key="route_min_flights")
+
+    column, label = RANKINGS[ranking]
+    route_stats = route_metrics()
+    top_routes = route_stats[route_stats['total_flights'] >= min_flights].nlargest(top_n, column)
+    if top_routes.empty:
+        st.info("No route has that many flights in the selected period.")
+    else:
+        charts.show_cached('top_routes', (filters, ranking, top_n, min_flights), lambda: charts.bar(
+            top_routes.iloc[::-1], x=column, y='route', orientation='h',
+            title=f"Top {top_n} Routes by {ranking}", labels={column: label, 'route': 'Route'},
+            color=column, color_continuous_scale='Tealgrn', template='plotly_white'))
+        st.dataframe(top_routes[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS), hide_index=True)
+
+
+elif section == "🔎 Route Search":
+    st.subheader("Find a Route")
+    query = st.text_input("Origin or destination city", placeholder="e.g. Chicago", key="route_query")
+
+    if query:
+        matches = route_metrics(route_ids=routes.search(query))
+        if matches.empty:
+            st.info("No route in the selected period touches a matching city.")
+        else:
+            busiest = matches.nlargest(50, 'total_flights')
+            st.caption(f"{len(matches):,} routes match; the 50 busiest are listed")
+            st.dataframe(busiest[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS), hide_index=True)
+
+            picked = st.selectbox("Route details", busiest['route'], key="route_pick")
+            route_id = int(busiest.loc[busiest['route'] == picked, 'route_id'].iloc[0])
+
+            monthly = label_months(route_metrics(['year_month'], route_ids=[route_id])).rename(columns={'year_month': 'month'})
+            charts.show_cached('route_monthly', (filters, route_id), lambda: charts.line(
+                monthly, x='month', y='total_flights', title=f"Monthly Flights: {picked}",
+                labels={'month': 'Month', 'total_flights': 'Flights'}, template='plotly_white'))
+            charts.show_cached('route_monthly_delay', (filters, route_id), lambda: charts.line(
+                monthly, x='month', y='avg_arr_delay', title=f"Monthly Average Arrival Delay: {picked}",
+                labels={'month': 'Month', 'avg_arr_delay': 'Avg Arrival Delay (min)'}, template='plotly_white'))
+
+            by_airline = route_metrics(['airline'], route_ids=[route_id]).sort_values('total_flights', ascending=False)
+            charts.show_cached('route_airlines', (filters, route_id), lambda: charts.bar(
+                by_airline, x='airline', y='total_flights', title=f"Airlines on {picked}",
+                labels={'airline': 'Airline', 'total_flights': 'Flights'},
+                color='avg_arr_delay', color_continuous_scale='Tealgrn', template='plotly_white'))
+
+
+else:
+    st.subheader("Routes of an Airline")
+    airline = st.selectbox("Airline", list(filters.airlines) or routes.airlines, key="route_airline")
+
+    airline_routes = route_metrics(airlines=[airline])
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Routes served", f"{len(airline_routes):,}")
+    col2.metric("Flights", f"{airline_routes['total_flights'].sum():,}")
+    col3.metric("Busiest route", airline_routes.nlargest(1, 'total_flights')['route'].iloc[0] if len(airline_routes) else "–")
+
+    busiest = airline_routes.nlargest(15, 'total_flights')
+    charts.show_cached('airline_routes', (filters, airline), lambda: charts.bar(
+        busiest.iloc[::-1], x='total_flights', y='route', orientation='h',
+        title=f"Busiest Routes of {airline}", labels={'total_flights': 'Flights', 'route': 'Route'},
+        color='avg_arr_delay', color_continuous_scale='Tealgrn', template='plotly_white'))
+    st.dataframe(busiest[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS), hide_index=True)
+
+
+# Publish the stage timings (sidebar "perf" expander, logs, Prometheus text)
+perf.report()
+
+
+# Footer
+st.markdown("""---""")
+st.markdown("""
+    <p style='text-align: center; font-size: 14px;'>
+        © 2025 | Developed by <strong>Ahmed Shlaby</strong> | 📧 <a href="mailto:shalabyahmed299@gmail.com">Contact</a>
+    </p>
+""", unsafe_allow_html=True)
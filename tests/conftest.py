@@ -0,0 +1,33 @@
+"""Fixtures pointing the data layer at small fixed-seed synthetic datasets."""
+
+import pytest
+import streamlit as st
+import streamlit.config
+import streamlit.logger
+
+from flight_dashboard import data
+from flight_dashboard.synthetic import write
+
+# The cached accessors warn about running outside `streamlit run` on every call;
+# the config is parsed first so it cannot reset the level afterwards
+streamlit.config.get_option("logger.level")
+streamlit.logger.set_log_level("error")
+
+ROWS = 20_000
+SEED = 0
+
+
+@pytest.fixture(scope="module")
+def dataset(request, tmp_path_factory):
+    """Synthetic flights in the test module's ``LAYOUT`` ("csv" or "partitioned"), loaded by the data layer."""
+    layout = getattr(request.module, "LAYOUT", "csv")
+    work = tmp_path_factory.mktemp("flights")
+    source = write(work / ("flights.csv" if layout == "csv" else "flights"), ROWS, layout, SEED)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(data, "DATA_SOURCE", str(source))
+        patch.setattr(data, "CACHE_DIR", work / "cache")
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        yield source
+    st.cache_data.clear()
+    st.cache_resource.clear()
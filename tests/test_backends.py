@@ -0,0 +1,74 @@
+"""The DuckDB backend answers every query the way the pandas backend does."""
+
+import random
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from flight_dashboard.backends import DuckDBBackend, FlightFilter, PandasBackend  # noqa: E402
+
+LAYOUT = "partitioned"
+CASES = 10
+OPTION_COLUMNS = ["airline", "origin_city", "dest_city", "flight_status", "origin"]
+GROUPINGS = [["airline"], ["origin"], ["dest"], ["airline", "dep_time_Period"], ["year_month", "airline"], []]
+
+
+@pytest.fixture(scope="module")
+def backends(dataset):
+    return PandasBackend(rows_cache=OrderedDict()), DuckDBBackend()
+
+
+@pytest.fixture(scope="module")
+def filters(backends):
+    pandas_backend, _ = backends
+    first, last = pandas_backend.date_bounds()
+    options = {column: pandas_backend.options(column) for column in OPTION_COLUMNS}
+    days = list(pd.date_range(first, last).date)
+    rng = random.Random(0)
+    pick = lambda column, k: tuple(rng.sample(options[column], rng.randint(0, k)))  # noqa: E731
+    return [
+        FlightFilter(*sorted(rng.sample(days, 2)), pick("airline", 3), pick("origin_city", 2), pick("dest_city", 2),
+                     pick("flight_status", 1), pick("origin", 3))
+        for _ in range(CASES)
+    ]
+
+
+def normalized(frame):
+    # Key columns come back categorical from pandas and as strings from DuckDB
+    frame = frame.reset_index(drop=True)
+    for column in frame.columns:
+        if not pd.api.types.is_numeric_dtype(frame[column]):
+            frame[column] = frame[column].astype(object).astype(str)
+        else:
+            frame[column] = frame[column].astype(np.float64)
+    return frame.sort_values(list(frame.columns[:2])).reset_index(drop=True)
+
+
+def test_date_bounds(backends):
+    pandas_backend, duckdb_backend = backends
+    assert pandas_backend.date_bounds() == duckdb_backend.date_bounds()
+
+
+@pytest.mark.parametrize("column", OPTION_COLUMNS)
+def test_options(backends, column):
+    pandas_backend, duckdb_backend = backends
+    assert pandas_backend.options(column) == duckdb_backend.options(column)
+
+
+@pytest.mark.parametrize("by", GROUPINGS, ids=lambda by: ",".join(by) or "total")
+def test_metrics(backends, filters, by):
+    pandas_backend, duckdb_backend = backends
+    for flt in filters:
+        pd.testing.assert_frame_equal(normalized(pandas_backend.metrics(flt, by)), normalized(duckdb_backend.metrics(flt, by)),
+                                      rtol=1e-4, obj=repr(flt))
+
+
+def test_overview_cells(backends, filters):
+    for flt in filters:
+        cells = [backend.overview_cells(flt) for backend in backends]
+        for column in ["flights", "delayed"]:
+            assert cells[0][column].sum() == cells[1][column].sum(), (flt, column)
@@ -0,0 +1,128 @@
+"""Delay sketch percentiles stay within ``sketches.error_bound`` of the exact nearest-rank percentiles."""
+
+import random
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight_dashboard import data
+from flight_dashboard.backends import DuckDBBackend, FlightFilter, PandasBackend, whole_months
+from flight_dashboard.sketches import (
+    LINEAR_MINUTES, MAX_MINUTES, PERCENTILES, SKETCHES, VALUES, DelaySketches, bucket_of, error_bound, percentile_column,
+)
+from flight_dashboard.synthetic import generate
+
+LAYOUT = "csv"
+ROWS = 20_000
+CASES = 10
+
+# Group column -> a column its sketches cannot filter on, and the FlightFilter field of each column
+UNSKETCHED = {"airline": "origin_city", "origin": "airline"}
+FIELDS = {"airline": "airlines", "origin": "origins", "origin_city": "origin_cities"}
+
+
+def exact_percentiles(df, key, delay):
+    """Nearest-rank percentiles of ``delay`` per ``key`` (or overall), sorted by the key."""
+    rows = df[df[delay].notna()]
+    groups = [(name, values) for name, values in rows.groupby(key, observed=True)[delay]] if key else [(None, rows[delay])]
+    result = pd.DataFrame([
+        [len(values), *(np.quantile(values.to_numpy(np.float64), q, method="inverted_cdf") for q in PERCENTILES)]
+        for _, values in groups if len(values)
+    ], columns=["flights", *(percentile_column(q) for q in PERCENTILES)])
+    if key is not None:
+        result.insert(0, key, [str(name) for name, values in groups if len(values)])
+        result = result.sort_values(key, ignore_index=True)
+    return result
+
+
+def assert_within_bound(answer, exact, key):
+    if key is not None:
+        answer = answer.astype({key: str}).sort_values(key, ignore_index=True)
+        assert answer[key].tolist() == exact[key].tolist()
+    assert answer["flights"].tolist() == exact["flights"].tolist()
+    for q in PERCENTILES:
+        column = percentile_column(q)
+        error = np.abs(answer[column].to_numpy() - exact[column].to_numpy())
+        bound = error_bound(exact[column].to_numpy())
+        assert (error <= bound * (1 + 1e-9)).all(), column
+
+
+@pytest.mark.parametrize("values", [
+    np.arange(-3 * LINEAR_MINUTES, MAX_MINUTES + 1.0),
+    np.arange(-3 * LINEAR_MINUTES, 3 * LINEAR_MINUTES, 0.25),
+], ids=["minutes", "quarter-minutes"])
+def test_bucket_values_within_bound(values):
+    ratio = np.abs(VALUES[bucket_of(values)] - values) / error_bound(values)
+    assert ratio.max() <= 1 + 1e-9
+    # The bound is tight: a geometric bucket's representative is RELATIVE_ACCURACY away from
+    # both of its ends, and a half minute rounds by half a minute, so the worst case reaches it
+    assert ratio.max() > 0.99
+
+
+def test_whole_minutes_near_zero_are_exact():
+    values = np.arange(-LINEAR_MINUTES, LINEAR_MINUTES + 1.0)
+    assert (VALUES[bucket_of(values)] == values).all()
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return generate(ROWS, 0)
+
+
+@pytest.fixture(scope="module")
+def merged(frame):
+    # Built per month and merged, the way partitioned datasets store them
+    return DelaySketches.from_cells([DelaySketches.aggregate(month) for _, month in frame.groupby("year_month", sort=True)])
+
+
+@pytest.mark.parametrize("name", sorted(SKETCHES))
+@pytest.mark.parametrize("by", ["group", "year_month", None])
+def test_merged_sketches(frame, merged, name, by):
+    group, delay, filters = SKETCHES[name]
+    months = sorted(frame["year_month"].unique())
+    rng = random.Random(f"{name}-{by}")
+    for _ in range(CASES):
+        first, last = sorted(rng.sample(months, 2))
+        groups = tuple(rng.sample(sorted(frame[group].cat.categories), rng.randint(0, 3)))
+        statuses = tuple(rng.sample(sorted(frame["flight_status"].cat.categories), rng.randint(0, 1))) if filters else ()
+        rows = frame[frame["year_month"].between(first, last)]
+        if groups:
+            rows = rows[rows[group].isin(groups)]
+        if statuses:
+            rows = rows[rows["flight_status"].isin(statuses)]
+        key = {"group": group, "year_month": "year_month", None: None}[by]
+        exact = exact_percentiles(rows, key, delay)
+        assert_within_bound(merged.percentiles(name, by, first, last, groups, statuses), exact, key)
+
+
+@pytest.mark.parametrize("unsketched", [False, True], ids=["sketches", "filtered-rows"])
+@pytest.mark.parametrize("backend_name", ["pandas", "duckdb"])
+def test_backends_cover_whole_months(dataset, backend_name, unsketched):
+    # The pages pass day ranges; every answer counts exactly the flights of the whole months.
+    # A selection the sketches cannot filter on makes the pandas backend sketch the filtered rows
+    if backend_name == "duckdb":
+        pytest.importorskip("duckdb")
+        backend = DuckDBBackend()
+    else:
+        backend = PandasBackend(rows_cache=OrderedDict())
+    df = data.load_flights()
+    days = list(pd.date_range(df["fl_date"].min(), df["fl_date"].max()).date)
+    rng = random.Random(f"{backend_name}-{unsketched}")
+    for _ in range(CASES):
+        start, end = sorted(rng.sample(days, 2))
+        name = rng.choice(sorted(SKETCHES))
+        group, delay, _ = SKETCHES[name]
+        selected = {group: rng.sample(sorted(df[group].cat.categories), rng.randint(0, 3))}
+        if unsketched:
+            other = UNSKETCHED[group]
+            selected[other] = rng.sample(sorted(df[other].cat.categories), rng.randint(1, 3))
+        flt = FlightFilter(start, end, **{FIELDS[column]: tuple(values) for column, values in selected.items()})
+
+        months = whole_months(flt)
+        rows = df[df["fl_date"].between(pd.Timestamp(months.start), pd.Timestamp(months.end))]
+        for column, values in selected.items():
+            if values:
+                rows = rows[rows[column].isin(values)]
+        assert_within_bound(backend.delay_percentiles(flt, group, delay), exact_percentiles(rows, group, delay), group)